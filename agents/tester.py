@@ -2,16 +2,34 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from orchestrator.llm_util import call_llm
+from orchestrator.llm_util import acall_llm, astream_llm, call_llm, stream_llm
 
 
 REQUIRED_PAYLOAD_FIELDS = ("intent",)
 
+# Called with the content streamed so far; returns True/False once the check
+# is decided, or None to keep reading.
+Decider = Callable[[str], Optional[bool]]
 
-def run_tester_flow(payload: Dict[str, Any]) -> Dict[str, Any]:
-    """Validate tester payload and execute the LLM call."""
+# Validation errors listed when a suite is rejected; the rest are counted.
+MAX_REPORTED_PAYLOAD_ERRORS = 20
+
+
+def _expect_decider(expected: str) -> Decider:
+    return lambda content: True if expected in content else None
+
+
+def _prepare(payload: Dict[str, Any], decide: Optional[Decider]) -> Tuple[str, Optional[Decider]]:
+    """Validate ``payload``; returns the intent and the decider to stream with, if any."""
 
     if not isinstance(payload, dict):
         raise ValueError("payload must be an object")
@@ -24,11 +42,226 @@ def run_tester_flow(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(intent, str) or not intent.strip():
         raise ValueError("payload.intent must be a non-empty string")
 
-    # Use the modern argument name; `prompt_intent` support remains in llm_util
-    llm_result = call_llm(prompt=intent)
+    expected = payload.get("expect")
+    if expected is not None and (not isinstance(expected, str) or not expected):
+        raise ValueError("payload.expect must be a non-empty string")
+    if decide is None and expected is not None:
+        decide = _expect_decider(expected)
+    return intent, decide
 
-    return {
+
+def _result(
+    intent: str, llm_result: Dict[str, Any], passed: Optional[bool] = None, stopped_early: bool = False
+) -> Dict[str, Any]:
+    result = {
         "status": "ok",
         "intent": intent,
         "llm": llm_result,
     }
+    if passed is not None:
+        result["passed"] = passed
+        result["stopped_early"] = stopped_early
+    return result
+
+
+def run_tester_flow(
+    payload: Dict[str, Any],
+    *,
+    llm_client: Optional[Callable[[str], Any]] = None,
+    decide: Optional[Decider] = None,
+) -> Dict[str, Any]:
+    """Validate tester payload and execute the LLM call.
+
+    With a ``decide`` callback, or an ``expect`` string in the payload, the
+    completion is streamed and the call is stopped as soon as the verdict is
+    known; the result then also carries ``passed`` and ``stopped_early``.
+    A stream that ends undecided fails.
+    """
+
+    intent, decide = _prepare(payload, decide)
+    if decide is None:
+        # Use the modern argument name; `prompt_intent` support remains in llm_util
+        return _result(intent, call_llm(prompt=intent, llm_client=llm_client))
+
+    passed: Optional[bool] = None
+    with stream_llm(prompt=intent, llm_client=llm_client) as stream:
+        for _ in stream:
+            passed = decide(stream.content)
+            if passed is not None:
+                break
+        stopped_early = not stream.done
+    # Closed streams are done, so this returns the content read so far.
+    return _result(intent, stream.result(), bool(passed), stopped_early)
+
+
+async def arun_tester_flow(
+    payload: Dict[str, Any],
+    *,
+    llm_client: Optional[Callable[[str], Any]] = None,
+    decide: Optional[Decider] = None,
+) -> Dict[str, Any]:
+    """Async :func:`run_tester_flow`; sync clients run in worker threads."""
+
+    intent, decide = _prepare(payload, decide)
+    if decide is None:
+        return _result(intent, await acall_llm(prompt=intent, llm_client=llm_client))
+
+    passed: Optional[bool] = None
+    async with astream_llm(prompt=intent, llm_client=llm_client) as stream:
+        async for _ in stream:
+            passed = decide(stream.content)
+            if passed is not None:
+                break
+        stopped_early = not stream.done
+    return _result(intent, await stream.result(), bool(passed), stopped_early)
+
+
+def _payload_keys(payloads: List[Any]) -> List[str]:
+    """Checkpoint keys: a hash of each payload, suffixed for repeats so duplicates still run."""
+    seen: Dict[str, int] = {}
+    keys = []
+    for payload in payloads:
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=repr).encode("utf-8")).hexdigest()[:16]
+        seen[digest] = seen.get(digest, 0) + 1
+        keys.append(digest if seen[digest] == 1 else f"{digest}#{seen[digest]}")
+    return keys
+
+
+def _load_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """Successful records from a previous run; a torn last line from a crash is ignored."""
+    if not os.path.exists(path):
+        return {}
+    records: Dict[str, Dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "key" in record:
+                records[record["key"]] = record
+    return {key: record for key, record in records.items() if record.get("status") == "ok"}
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    rank = math.ceil(fraction * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def _summarize(records: List[Dict[str, Any]], resumed: int, elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(record["latency_seconds"] for record in records)
+    ok = [record for record in records if record["status"] == "ok"]
+    judged = [record for record in ok if "passed" in record]
+    return {
+        "total": len(records),
+        "resumed": resumed,
+        "ok": len(ok),
+        "errors": len(records) - len(ok),
+        "passed": sum(1 for record in judged if record["passed"]),
+        "failed": sum(1 for record in judged if not record["passed"]),
+        "elapsed_seconds": elapsed,
+        "latency_seconds": {
+            "p50": _percentile(latencies, 0.50),
+            "p90": _percentile(latencies, 0.90),
+            "p99": _percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+    }
+
+
+async def arun_tester_suite(
+    payloads: Iterable[Dict[str, Any]],
+    *,
+    concurrency: int = 8,
+    llm_client: Optional[Callable[[str], Any]] = None,
+    output: Optional[IO[str]] = None,
+    checkpoint_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run many tester payloads concurrently; see :func:`run_tester_suite`."""
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    payloads = list(payloads)
+    problems = []
+    for index, payload in enumerate(payloads):
+        try:
+            _prepare(payload, None)
+        except ValueError as exc:
+            problems.append(f"payloads[{index}]: {exc}")
+    if problems:
+        listed = "; ".join(problems[:MAX_REPORTED_PAYLOAD_ERRORS])
+        more = len(problems) - MAX_REPORTED_PAYLOAD_ERRORS
+        raise ValueError(f"{len(problems)} invalid payload(s): {listed}" + (f"; and {more} more" if more > 0 else ""))
+
+    keys = _payload_keys(payloads)
+    done = _load_checkpoint(checkpoint_path) if checkpoint_path else {}
+    records: List[Dict[str, Any]] = [done[key] for key in keys if key in done]
+    resumed = len(records)
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+    slots = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    def emit(record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=repr) + "\n"
+        for stream in (output, checkpoint):
+            if stream is not None:
+                stream.write(line)
+                stream.flush()
+
+    async def run_one(index: int, key: str, payload: Dict[str, Any]) -> None:
+        async with slots:
+            begun = time.perf_counter()
+            try:
+                result = await arun_tester_flow(payload, llm_client=llm_client)
+            except Exception as exc:
+                record = {"status": "error", "intent": payload["intent"], "error": f"{type(exc).__name__}: {exc}"}
+            else:
+                record = result
+            record.update(key=key, index=index, latency_seconds=time.perf_counter() - begun)
+        records.append(record)
+        emit(record)
+
+    try:
+        pending = [(index, key, payload) for index, (key, payload) in enumerate(zip(keys, payloads)) if key not in done]
+        await asyncio.gather(*(run_one(index, key, payload) for index, key, payload in pending))
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    return _summarize(records, resumed, time.perf_counter() - started)
+
+
+def run_tester_suite(
+    payloads: Iterable[Dict[str, Any]],
+    *,
+    concurrency: int = 8,
+    llm_client: Optional[Callable[[str], Any]] = None,
+    output: Optional[IO[str]] = None,
+    checkpoint_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Validate every payload, then run their LLM checks with at most ``concurrency`` in flight.
+
+    Any invalid payload rejects the whole suite before a call is made. Each
+    finished check is written to ``output`` as one NDJSON record (the
+    :func:`run_tester_flow` result, or ``status: "error"`` with the message,
+    plus ``key``, ``index`` and ``latency_seconds``) in completion order. The
+    same records are appended to ``checkpoint_path``; rerunning with that file
+    skips checks that already succeeded there and retries the rest. Returns
+    counts and latency percentiles over all records, resumed ones included.
+    """
+
+    async def main() -> Dict[str, Any]:
+        # Sync clients run via asyncio.to_thread; size the pool so it never caps concurrency.
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="tester-suite") as executor:
+            asyncio.get_running_loop().set_default_executor(executor)
+            return await arun_tester_suite(
+                payloads,
+                concurrency=concurrency,
+                llm_client=llm_client,
+                output=output,
+                checkpoint_path=checkpoint_path,
+            )
+
+    return asyncio.run(main())
@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, AsyncIterator, Mapping, Sequence
 
-from app.mcp_tooling import call_tool_by_name, register_tools
+from app.mcp_tooling import astream_tool_by_name, call_tool_by_name, call_tools_batch, register_tools
 
 
-def initialize_gateway(mcp: Any) -> dict[str, Any]:
+def initialize_gateway(mcp: Any) -> Mapping[str, Any]:
     """Initialize gateway state by registering the canonical tool set."""
     return register_tools(mcp)
 
@@ -25,3 +25,26 @@ def dispatch_tool_request(
         authorization_header=authorization_header,
         request_id=request_id,
     )
+
+
+async def dispatch_tool_requests(
+    requests: Sequence[Mapping[str, Any]],
+    authorization_header: str | None = None,
+) -> list[dict[str, Any]]:
+    """Dispatch a batch of tool calls concurrently; envelopes keep input order."""
+    return await call_tools_batch(requests, authorization_header)
+
+
+def stream_tool_request(
+    tool_name: str,
+    arguments: dict[str, Any] | None,
+    authorization_header: str | None,
+    request_id: str | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Streaming ``dispatch_tool_request``: chunk envelopes, then a final ``done`` envelope."""
+    return astream_tool_by_name(
+        tool_name=tool_name,
+        arguments=arguments,
+        authorization_header=authorization_header,
+        request_id=request_id,
+    )
@@ -2,8 +2,22 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Callable
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Mapping, Sequence
+
+from app.tool_cache import NO_CACHE, PURE, CacheKey, CachePolicy, ToolResultCache, cache_key
+from app.tool_quota import UNLIMITED, QuotaExceeded, QuotaPolicy, ToolQuotas, principal_from_authorization
+from app.tool_schema import SchemaValidationError, compile_schema
+from orchestrator.metrics import Histogram, histogram
 
 
 class ToolError(Exception):
@@ -28,30 +42,96 @@ class UnauthorizedError(ToolError):
     code = "unauthorized"
 
 
+class ToolTimeoutError(ToolError):
+    code = "timeout"
+
+
+class ToolExecutionError(ToolError):
+    code = "execution_failed"
+
+
+class RateLimitedError(ToolError):
+    code = "rate_limited"
+
+
 @dataclass(frozen=True)
 class ToolSpec:
     name: str
-    handler: Callable[..., Any]
-    validator: Callable[[dict[str, Any]], None]
+    handler: Callable[..., Any]  # function, ``async def``, or (async) generator for streamed results
+    validator: Callable[[dict[str, Any]], None] | None = None
+    schema: dict[str, Any] | None = None  # JSON schema for the arguments object
+    description: str = ""
+    cache: CachePolicy = NO_CACHE
+    rate_limit: QuotaPolicy = UNLIMITED  # per principal, on top of the gateway-wide principal quota
 
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.handler) or inspect.isasyncgenfunction(self.handler)
 
-_TOOL_REGISTRY: dict[str, Callable[..., Any]] = {}
-_VALIDATORS: dict[str, Callable[[dict[str, Any]], None]] = {}
+    @property
+    def is_streaming(self) -> bool:
+        return inspect.isgeneratorfunction(self.handler) or inspect.isasyncgenfunction(self.handler)
 
 
-def _validate_echo(arguments: dict[str, Any]) -> None:
-    if not isinstance(arguments, dict):
-        raise InvalidArgumentsError("arguments must be an object")
-    message = arguments.get("message")
-    if not isinstance(message, str) or not message:
-        raise InvalidArgumentsError("'message' must be a non-empty string")
+@dataclass(frozen=True)
+class RegisteredTool:
+    spec: ToolSpec
+    validate: Callable[[dict[str, Any]], None]
+    listing: Mapping[str, Any]
 
 
-def _validate_health(arguments: dict[str, Any]) -> None:
-    if arguments is None:
-        return
-    if not isinstance(arguments, dict):
-        raise InvalidArgumentsError("arguments must be an object")
+class ToolRegistry(Mapping[str, Callable[..., Any]]):
+    """Immutable snapshot of the registered tools, mapping names to handlers.
+
+    Updates build a new snapshot and swap it in, so dispatch reads one
+    consistent snapshot without locking and every holder shares it uncopied.
+    """
+
+    __slots__ = ("_tools", "version")
+
+    def __init__(self, tools: Mapping[str, RegisteredTool], version: int = 0) -> None:
+        self._tools = MappingProxyType(dict(tools))
+        self.version = version
+
+    def __getitem__(self, name: str) -> Callable[..., Any]:
+        return self._tools[name].spec.handler
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tools)
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def tool(self, name: str) -> RegisteredTool | None:
+        return self._tools.get(name)
+
+    def tools(self) -> Iterable[RegisteredTool]:
+        return self._tools.values()
+
+    def _with(self, name: str, tool: RegisteredTool | None) -> "ToolRegistry":
+        tools = dict(self._tools)
+        if tool is None:
+            tools.pop(name, None)
+        else:
+            tools[name] = tool
+        return ToolRegistry(tools, self.version + 1)
+
+
+_REGISTRY = ToolRegistry({})
+_REGISTRY_WRITE_LOCK = threading.Lock()
+_CANONICAL_INSTALLED = False
+# MCP objects passed to register_tools; tools added later are registered with them too.
+_ATTACHED_MCPS: list[Any] = []
+
+_RESULT_CACHE = ToolResultCache(max_entries=int(os.getenv("MCP_TOOL_CACHE_MAX_ENTRIES", "10000")))
+
+_OBJECT_SCHEMA: dict[str, Any] = {"type": "object"}
+
+_ECHO_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {"message": {"type": "string", "minLength": 1}},
+    "required": ["message"],
+}
 
 
 def _tool_echo(*, message: str, **_: Any) -> dict[str, str]:
@@ -64,11 +144,39 @@ def _tool_health_check(**_: Any) -> dict[str, str]:
 
 def _tool_specs() -> tuple[ToolSpec, ...]:
     return (
-        ToolSpec(name="echo", handler=_tool_echo, validator=_validate_echo),
-        ToolSpec(name="health.check", handler=_tool_health_check, validator=_validate_health),
+        ToolSpec(
+            name="echo",
+            handler=_tool_echo,
+            schema=_ECHO_SCHEMA,
+            description="Return the given message.",
+            cache=PURE,
+        ),
+        ToolSpec(
+            name="health.check",
+            handler=_tool_health_check,
+            schema=_OBJECT_SCHEMA,
+            description="Report gateway health.",
+            cache=CachePolicy.ttl(1.0),
+        ),
     )
 
 
+def _compile_validator(spec: ToolSpec) -> Callable[[dict[str, Any]], None]:
+    """Build the per-call validator: the compiled schema, then any custom validator."""
+    check_schema = compile_schema(spec.schema if spec.schema is not None else _OBJECT_SCHEMA)
+    custom = spec.validator
+
+    def validate_arguments(arguments: dict[str, Any]) -> None:
+        try:
+            check_schema(arguments)
+        except SchemaValidationError as exc:
+            raise InvalidArgumentsError(str(exc), details={"path": exc.location}) from exc
+        if custom is not None:
+            custom(arguments)
+
+    return validate_arguments
+
+
 def _register_with_mcp(mcp: Any, spec: ToolSpec) -> None:
     """Register a tool to any MCP object that supports decorator or direct registration styles."""
     if hasattr(mcp, "tool") and callable(getattr(mcp, "tool")):
@@ -78,17 +186,101 @@ def _register_with_mcp(mcp: Any, spec: ToolSpec) -> None:
         mcp.register_tool(spec.name, spec.handler)
 
 
-def register_tools(mcp: Any) -> dict[str, Callable[..., Any]]:
-    """Register all MCP tools and return the canonical runtime registry."""
-    _TOOL_REGISTRY.clear()
-    _VALIDATORS.clear()
+def _registered(spec: ToolSpec) -> RegisteredTool:
+    return RegisteredTool(
+        spec=spec,
+        validate=_compile_validator(spec),
+        listing=MappingProxyType(
+            {
+                "name": spec.name,
+                "description": spec.description,
+                "inputSchema": spec.schema if spec.schema is not None else _OBJECT_SCHEMA,
+            }
+        ),
+    )
+
 
-    for spec in _tool_specs():
-        _TOOL_REGISTRY[spec.name] = spec.handler
-        _VALIDATORS[spec.name] = spec.validator
+def tool_registry() -> ToolRegistry:
+    """Return the current registry snapshot."""
+    return _REGISTRY
+
+
+def register_tools(mcp: Any) -> ToolRegistry:
+    """Register all MCP tools with ``mcp`` and return the shared registry snapshot.
+
+    The canonical tools are compiled into the registry on the first call only;
+    later calls (another server or gateway) just attach ``mcp`` to it.
+    """
+    global _REGISTRY, _CANONICAL_INSTALLED
+    with _REGISTRY_WRITE_LOCK:
+        if not _CANONICAL_INSTALLED:
+            tools = dict(_REGISTRY._tools)
+            for spec in _tool_specs():
+                tools[spec.name] = _registered(spec)
+                _RESULT_CACHE.invalidate(spec.name)
+            _REGISTRY = ToolRegistry(tools, _REGISTRY.version + 1)
+            _CANONICAL_INSTALLED = True
+        registry = _REGISTRY
+        if all(attached is not mcp for attached in _ATTACHED_MCPS):
+            _ATTACHED_MCPS.append(mcp)
+    for tool in registry.tools():
+        _register_with_mcp(mcp, tool.spec)
+    return registry
+
+
+def add_tool(spec: ToolSpec, *, replace: bool = False) -> ToolRegistry:
+    """Add ``spec`` (or replace it with ``replace=True``) and publish a new snapshot.
+
+    The schema is compiled before the swap, so in-flight calls keep using the
+    snapshot they started with and never see a half-registered tool.
+    """
+    global _REGISTRY
+    tool = _registered(spec)
+    with _REGISTRY_WRITE_LOCK:
+        if not replace and spec.name in _REGISTRY:
+            raise ValueError(f"MCP tool already registered: {spec.name}")
+        _REGISTRY = _REGISTRY._with(spec.name, tool)
+        _RESULT_CACHE.invalidate(spec.name)
+        registry, targets = _REGISTRY, list(_ATTACHED_MCPS)
+    for mcp in targets:
         _register_with_mcp(mcp, spec)
+    return registry
+
 
-    return dict(_TOOL_REGISTRY)
+def remove_tool(name: str) -> bool:
+    """Unregister ``name``; returns False if it was not registered."""
+    global _REGISTRY
+    with _REGISTRY_WRITE_LOCK:
+        if name not in _REGISTRY:
+            return False
+        _REGISTRY = _REGISTRY._with(name, None)
+        _RESULT_CACHE.invalidate(name)
+        targets = list(_ATTACHED_MCPS)
+    for mcp in targets:
+        remove = getattr(mcp, "remove_tool", None)
+        if callable(remove):
+            remove(name)
+    return True
+
+
+def list_tools() -> list[dict[str, Any]]:
+    """Registered tools in MCP ``tools/list`` form, including each ``inputSchema``."""
+    return [dict(tool.listing) for tool in _REGISTRY.tools()]
+
+
+def _cacheable_key(tool: RegisteredTool, args: dict[str, Any]) -> CacheKey | None:
+    if not tool.spec.cache.enabled:
+        return None
+    return cache_key(tool.spec.name, args)
+
+
+def invalidate_tool_cache(tool_name: str | None = None, arguments: dict[str, Any] | None = None) -> int:
+    """Drop cached results for one call, every call of one tool, or all tools."""
+    return _RESULT_CACHE.invalidate(tool_name, arguments)
+
+
+def tool_cache_stats() -> dict[str, dict[str, float]]:
+    return _RESULT_CACHE.stats()
 
 
 def _enforce_authorization(tool_name: str, authorization_header: str | None, arguments: dict[str, Any]) -> None:
@@ -110,29 +302,513 @@ def _error_envelope(*, request_id: str | None, tool_name: str, error: ToolError)
     }
 
 
+def _result_envelope(*, request_id: str | None, tool_name: str, result: Any) -> dict[str, Any]:
+    return {
+        "ok": True,
+        "request_id": request_id,
+        "tool_name": tool_name,
+        "result": result,
+    }
+
+
+def _optional_float(name: str) -> float | None:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+# Gateway-wide limits per bearer principal; unset variables leave that limit off.
+_QUOTAS = ToolQuotas(
+    QuotaPolicy(
+        rate_per_second=_optional_float("MCP_RATE_LIMIT_PER_SECOND"),
+        burst=_optional_float("MCP_RATE_LIMIT_BURST"),
+        max_in_flight=int(os.environ["MCP_MAX_IN_FLIGHT"]) if os.getenv("MCP_MAX_IN_FLIGHT") else None,
+    ),
+    idle_seconds=float(os.getenv("MCP_RATE_LIMIT_IDLE_SECONDS", "300")),
+)
+
+
+def _release_nothing() -> None:
+    return None
+
+
+def _admit(tool: RegisteredTool, authorization_header: str | None) -> Callable[[], None]:
+    """Charge the caller's quotas for one call, returning the callback that ends it."""
+    policy = tool.spec.rate_limit
+    if not (policy.enabled or _QUOTAS.principal_policy.enabled):
+        return _release_nothing
+    principal = principal_from_authorization(authorization_header)
+    try:
+        _QUOTAS.acquire(principal, tool.spec.name, policy)
+    except QuotaExceeded as exc:
+        raise RateLimitedError(
+            f"Rate limited: {exc}",
+            details={"retry_after_seconds": round(exc.retry_after_seconds, 3), "scope": exc.scope, "limit": exc.reason},
+        ) from exc
+    return functools.partial(_QUOTAS.release, principal, tool.spec.name, policy)
+
+
+def _prepare_call(tool_name: str, args: dict[str, Any], authorization_header: str | None) -> RegisteredTool:
+    """Validate and authorize a call against the current registry snapshot."""
+    tool = _REGISTRY.tool(tool_name)
+    if tool is None:
+        raise ToolNotFoundError(f"Unknown MCP tool: {tool_name}")
+
+    tool.validate(args)
+    _enforce_authorization(tool_name, authorization_header, args)
+    return tool
+
+
+class _CallContext:
+    __slots__ = ("deadline", "cancelled")
+
+    def __init__(self, deadline: float | None) -> None:
+        self.deadline = deadline
+        self.cancelled = threading.Event()
+
+
+_CALL_CONTEXT: contextvars.ContextVar[_CallContext | None] = contextvars.ContextVar("mcp_tool_call", default=None)
+
+
+def current_deadline() -> float | None:
+    """``time.monotonic()`` deadline of the tool call being handled, if any."""
+    ctx = _CALL_CONTEXT.get()
+    return ctx.deadline if ctx is not None else None
+
+
+def cancellation_requested() -> bool:
+    """True once the current call timed out or was cancelled; sync handlers should poll this."""
+    ctx = _CALL_CONTEXT.get()
+    return ctx is not None and ctx.cancelled.is_set()
+
+
+_TOOL_METRICS: dict[str, tuple[Histogram, Histogram]] = {}
+
+
+def _tool_metrics(tool_name: str) -> tuple[Histogram, Histogram]:
+    handles = _TOOL_METRICS.get(tool_name)
+    if handles is None:
+        labels = (("tool", tool_name),)
+        handles = _TOOL_METRICS.setdefault(
+            tool_name,
+            (
+                histogram(f"mcp.tool.wall_seconds.{tool_name}", family="mcp.tool.wall_seconds", labels=labels),
+                histogram(f"mcp.tool.cpu_seconds.{tool_name}", family="mcp.tool.cpu_seconds", labels=labels),
+            ),
+        )
+    return handles
+
+
+class _CPUTimed:
+    """Await a coroutine, summing the thread CPU time spent in each of its steps."""
+
+    __slots__ = ("_coro", "cpu_seconds")
+
+    def __init__(self, coro: Any) -> None:
+        self._coro = coro
+        self.cpu_seconds = 0.0
+
+    def __await__(self) -> Any:
+        coro = self._coro
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            start = time.thread_time()
+            try:
+                signal = coro.send(value) if error is None else coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.cpu_seconds += time.thread_time() - start
+            try:
+                value, error = (yield signal), None
+            except BaseException as exc:  # noqa: BLE001 - forwarded into the coroutine
+                value, error = None, exc
+
+
+def _invoke_sync(handler: Callable[..., Any], args: dict[str, Any], tool_name: str) -> Any:
+    """Run a sync handler, recording its CPU time in the calling thread."""
+    start = time.thread_time()
+    try:
+        result = handler(**args)
+        # Generator handlers called without streaming return all their chunks as a list.
+        return list(result) if inspect.isgenerator(result) else result
+    finally:
+        _tool_metrics(tool_name)[1].observe(time.thread_time() - start)
+
+
+def _execute_sync(tool: RegisteredTool, args: dict[str, Any]) -> Any:
+    key = _cacheable_key(tool, args)
+    if key is None:
+        return _run_sync(tool.spec.name, tool.spec.handler, args)
+    return _RESULT_CACHE.get_or_compute(key, tool.spec.cache, lambda: _run_sync(tool.spec.name, tool.spec.handler, args))
+
+
+def _run_sync(tool_name: str, handler: Callable[..., Any], args: dict[str, Any]) -> Any:
+    if inspect.iscoroutinefunction(handler) or inspect.isasyncgenfunction(handler):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(_run_handler(tool_name, handler, args, None))
+        raise ToolExecutionError(f"{tool_name} is async; use acall_tool_by_name inside an event loop")
+    start = time.perf_counter()
+    try:
+        return _invoke_sync(handler, args, tool_name)
+    finally:
+        _tool_metrics(tool_name)[0].observe(time.perf_counter() - start)
+
+
 def call_tool_by_name(
     tool_name: str,
     arguments: dict[str, Any] | None,
     authorization_header: str | None,
     request_id: str | None = None,
 ) -> dict[str, Any]:
-    """Dispatch a tool by name with validation, auth, and stable envelopes."""
+    """Dispatch a tool by name with validation, auth, and stable envelopes.
+
+    Coroutine handlers are driven to completion here, so this must not be
+    called from a running event loop for them; use :func:`acall_tool_by_name`.
+    """
+    args = arguments if arguments is not None else {}
+
+    try:
+        tool = _prepare_call(tool_name, args, authorization_header)
+        release = _admit(tool, authorization_header)
+        try:
+            result = _execute_sync(tool, args)
+        finally:
+            release()
+        return _result_envelope(request_id=request_id, tool_name=tool_name, result=result)
+    except ToolError as error:
+        return _error_envelope(request_id=request_id, tool_name=tool_name, error=error)
+
+
+DEFAULT_TOOL_TIMEOUT_SECONDS = float(os.getenv("MCP_TOOL_TIMEOUT_SECONDS", "30"))
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    """Bounded pool for sync handlers called from async dispatch (``MCP_TOOL_THREADS``)."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(
+            max_workers=int(os.getenv("MCP_TOOL_THREADS", "16")),
+            thread_name_prefix="mcp-tool",
+        )
+    return _EXECUTOR
+
+
+def _deadline(timeout_seconds: float | None, deadline: float | None) -> float | None:
+    """Combine a timeout, an explicit deadline and the enclosing call's deadline."""
+    candidates = [d for d in (deadline, current_deadline()) if d is not None]
+    if timeout_seconds is not None:
+        candidates.append(time.monotonic() + timeout_seconds)
+    return min(candidates) if candidates else None
+
+
+async def _run_handler(tool_name: str, handler: Callable[..., Any], args: dict[str, Any], deadline: float | None) -> Any:
+    """Run ``handler`` until ``deadline``, exposing it via :func:`current_deadline`.
+
+    On timeout or cancellation, coroutine handlers are cancelled and sync
+    handlers see :func:`cancellation_requested` (their thread is not interrupted).
+    """
+    ctx = _CallContext(deadline)
+    token = _CALL_CONTEXT.set(ctx)
+    wall, cpu = _tool_metrics(tool_name)
+    start = time.perf_counter()
+    timed: _CPUTimed | None = None
+    try:
+        if inspect.iscoroutinefunction(handler):
+            timed = _CPUTimed(handler(**args))
+            call: Any = timed
+        elif inspect.isasyncgenfunction(handler):
+            timed = _CPUTimed(_collect(handler(**args)))
+            call = timed
+        else:
+            call = asyncio.get_running_loop().run_in_executor(
+                _executor(), contextvars.copy_context().run, _invoke_sync, handler, args, tool_name
+            )
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        return await asyncio.wait_for(call, timeout)
+    except asyncio.TimeoutError as exc:
+        ctx.cancelled.set()
+        raise ToolTimeoutError(f"{tool_name} exceeded its deadline", details={"deadline": deadline}) from exc
+    except asyncio.CancelledError:
+        ctx.cancelled.set()
+        raise
+    except ToolError:
+        raise
+    except Exception as exc:
+        raise ToolExecutionError(f"{type(exc).__name__}: {exc}") from exc
+    finally:
+        _CALL_CONTEXT.reset(token)
+        wall.observe(time.perf_counter() - start)
+        if timed is not None:
+            cpu.observe(timed.cpu_seconds)
+
+
+async def _collect(chunks: AsyncIterator[Any]) -> list[Any]:
+    return [chunk async for chunk in chunks]
+
+
+async def _execute(tool: RegisteredTool, args: dict[str, Any], deadline: float | None) -> Any:
+    spec = tool.spec
+    key = _cacheable_key(tool, args)
+    if key is None:
+        return await _run_handler(spec.name, spec.handler, args, deadline)
+    return await _RESULT_CACHE.aget_or_compute(
+        key, spec.cache, lambda: _run_handler(spec.name, spec.handler, args, deadline)
+    )
+
+
+async def acall_tool_by_name(
+    tool_name: str,
+    arguments: dict[str, Any] | None,
+    authorization_header: str | None,
+    request_id: str | None = None,
+    *,
+    timeout_seconds: float | None = DEFAULT_TOOL_TIMEOUT_SECONDS,
+    deadline: float | None = None,
+) -> dict[str, Any]:
+    """Async :func:`call_tool_by_name` that never blocks the loop.
+
+    The call ends at the earliest of ``timeout_seconds`` from now, ``deadline``
+    (a ``time.monotonic()`` value) and the deadline of an enclosing tool call,
+    so nested tool calls inherit their caller's budget. Cancelling the awaiting
+    task cancels the handler.
+    """
     args = arguments if arguments is not None else {}
 
     try:
-        if tool_name not in _TOOL_REGISTRY:
-            raise ToolNotFoundError(f"Unknown MCP tool: {tool_name}")
-
-        validator = _VALIDATORS[tool_name]
-        validator(args)
-        _enforce_authorization(tool_name, authorization_header, args)
-
-        result = _TOOL_REGISTRY[tool_name](**args)
-        return {
-            "ok": True,
-            "request_id": request_id,
-            "tool_name": tool_name,
-            "result": result,
-        }
+        tool = _prepare_call(tool_name, args, authorization_header)
+        call_deadline = _deadline(timeout_seconds, deadline)
+        if call_deadline is not None and call_deadline <= time.monotonic():
+            raise ToolTimeoutError(f"{tool_name} deadline already passed", details={"deadline": call_deadline})
+        release = _admit(tool, authorization_header)
+        try:
+            result = await _execute(tool, args, call_deadline)
+        finally:
+            release()
+        return _result_envelope(request_id=request_id, tool_name=tool_name, result=result)
     except ToolError as error:
         return _error_envelope(request_id=request_id, tool_name=tool_name, error=error)
+
+
+async def call_tools_batch(
+    requests: Sequence[Mapping[str, Any]],
+    authorization_header: str | None = None,
+    *,
+    timeout_seconds: float | None = DEFAULT_TOOL_TIMEOUT_SECONDS,
+) -> list[dict[str, Any]]:
+    """Dispatch many tool calls concurrently, returning envelopes in input order.
+
+    Each request is a mapping with ``tool_name`` and optional ``arguments``,
+    ``request_id`` and ``authorization_header`` (defaulting to the batch's).
+    Every request is validated and authorized before any handler runs; those
+    that fail get an error envelope and the rest still run. Coroutine handlers
+    run on the loop, sync handlers in a bounded thread pool, each under
+    ``timeout_seconds``.
+    """
+    envelopes: list[dict[str, Any] | None] = [None] * len(requests)
+    pending: list[tuple[int, str, str | None, RegisteredTool, dict[str, Any], Callable[[], None]]] = []
+
+    for index, request in enumerate(requests):
+        tool_name = request.get("tool_name", "")
+        request_id = request.get("request_id")
+        args = request.get("arguments")
+        args = args if args is not None else {}
+        try:
+            header = request.get("authorization_header", authorization_header)
+            tool = _prepare_call(tool_name, args, header)
+            release = _admit(tool, header)
+        except ToolError as error:
+            envelopes[index] = _error_envelope(request_id=request_id, tool_name=tool_name, error=error)
+        else:
+            pending.append((index, tool_name, request_id, tool, args, release))
+
+    async def run(
+        tool_name: str,
+        request_id: str | None,
+        tool: RegisteredTool,
+        args: dict[str, Any],
+        release: Callable[[], None],
+    ) -> dict[str, Any]:
+        try:
+            result = await _execute(tool, args, _deadline(timeout_seconds, None))
+        except ToolError as error:
+            return _error_envelope(request_id=request_id, tool_name=tool_name, error=error)
+        finally:
+            release()
+        return _result_envelope(request_id=request_id, tool_name=tool_name, result=result)
+
+    results = await asyncio.gather(*(run(*call) for _, *call in pending))
+    for (index, *_), envelope in zip(pending, results):
+        envelopes[index] = envelope
+    return envelopes  # type: ignore[return-value]
+
+
+DEFAULT_STREAM_BUFFER_CHUNKS = int(os.getenv("MCP_TOOL_STREAM_BUFFER", "16"))
+
+_CHUNK, _DONE, _FAILED = range(3)
+
+
+def _final_envelope(envelope: dict[str, Any]) -> dict[str, Any]:
+    envelope["done"] = True
+    return envelope
+
+
+async def _stream_chunks(
+    tool_name: str,
+    handler: Callable[..., Any],
+    args: dict[str, Any],
+    deadline: float | None,
+    max_buffered_chunks: int,
+) -> AsyncIterator[Any]:
+    """Yield a generator handler's chunks through a bounded buffer.
+
+    The producer (a task for async generators, a pool thread for sync ones)
+    blocks once ``max_buffered_chunks`` are waiting, so a slow consumer
+    throttles it. Closing this iterator or hitting ``deadline`` stops the
+    producer: async generators are cancelled, sync ones stop at the next chunk.
+    """
+    loop = asyncio.get_running_loop()
+    buffer: asyncio.Queue[tuple[int, Any]] = asyncio.Queue(maxsize=max(1, max_buffered_chunks))
+    call = _CallContext(deadline)
+    context = contextvars.copy_context()
+    context.run(_CALL_CONTEXT.set, call)
+    wall, cpu = _tool_metrics(tool_name)
+    start = time.perf_counter()
+
+    async def pump(chunks: Any) -> None:
+        try:
+            async for chunk in chunks:
+                await buffer.put((_CHUNK, chunk))
+        except Exception as exc:
+            await buffer.put((_FAILED, exc))
+        else:
+            await buffer.put((_DONE, None))
+        finally:
+            await chunks.aclose()
+
+    async def produce_async() -> None:
+        timed = _CPUTimed(pump(handler(**args)))
+        try:
+            await timed
+        finally:
+            cpu.observe(timed.cpu_seconds)
+
+    def offer(item: tuple[int, Any]) -> bool:
+        """Hand ``item`` to the loop, waiting while the buffer is full; False once cancelled."""
+        put = buffer.put(item)
+        try:
+            pending = asyncio.run_coroutine_threadsafe(put, loop)
+        except RuntimeError:  # loop closed
+            put.close()
+            return False
+        while not call.cancelled.is_set():
+            try:
+                pending.result(timeout=0.05)
+                return True
+            except TimeoutError:
+                continue
+        pending.cancel()
+        return False
+
+    def produce_sync() -> None:
+        started = time.thread_time()
+        chunks = None
+        try:
+            chunks = handler(**args)
+            for chunk in chunks:
+                if not offer((_CHUNK, chunk)):
+                    return
+            offer((_DONE, None))
+        except Exception as exc:
+            offer((_FAILED, exc))
+        finally:
+            if chunks is not None and inspect.isgenerator(chunks):
+                chunks.close()
+            cpu.observe(time.thread_time() - started)
+
+    if inspect.isasyncgenfunction(handler):
+        producer: Any = loop.create_task(produce_async(), context=context)
+    else:
+        producer = loop.run_in_executor(_executor(), context.run, produce_sync)
+
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                kind, value = await asyncio.wait_for(buffer.get(), timeout)
+            except asyncio.TimeoutError as exc:
+                raise ToolTimeoutError(f"{tool_name} exceeded its deadline", details={"deadline": deadline}) from exc
+            if kind == _CHUNK:
+                yield value
+            elif kind == _DONE:
+                return
+            elif isinstance(value, ToolError):
+                raise value
+            else:
+                raise ToolExecutionError(f"{type(value).__name__}: {value}") from value
+    finally:
+        call.cancelled.set()
+        if isinstance(producer, asyncio.Task):
+            producer.cancel()
+        wall.observe(time.perf_counter() - start)
+
+
+async def astream_tool_by_name(
+    tool_name: str,
+    arguments: dict[str, Any] | None,
+    authorization_header: str | None,
+    request_id: str | None = None,
+    *,
+    timeout_seconds: float | None = DEFAULT_TOOL_TIMEOUT_SECONDS,
+    deadline: float | None = None,
+    max_buffered_chunks: int = DEFAULT_STREAM_BUFFER_CHUNKS,
+) -> AsyncIterator[dict[str, Any]]:
+    """Stream a tool call as chunk envelopes followed by one final envelope.
+
+    Chunk envelopes carry ``sequence`` and ``chunk``. The final envelope has
+    ``done: True`` and is either a result envelope (``result`` holds the
+    chunk count for generator tools, or the plain result for other tools) or
+    an :func:`_error_envelope`, so a failure mid-stream follows the chunks
+    already sent. Close the iterator (e.g. with ``contextlib.aclosing``) to
+    stop the producer early.
+    """
+    args = arguments if arguments is not None else {}
+
+    try:
+        tool = _prepare_call(tool_name, args, authorization_header)
+        call_deadline = _deadline(timeout_seconds, deadline)
+        if call_deadline is not None and call_deadline <= time.monotonic():
+            raise ToolTimeoutError(f"{tool_name} deadline already passed", details={"deadline": call_deadline})
+        release = _admit(tool, authorization_header)
+    except ToolError as error:
+        yield _final_envelope(_error_envelope(request_id=request_id, tool_name=tool_name, error=error))
+        return
+
+    try:
+        if not tool.spec.is_streaming:
+            try:
+                result = await _execute(tool, args, call_deadline)
+            except ToolError as error:
+                yield _final_envelope(_error_envelope(request_id=request_id, tool_name=tool_name, error=error))
+            else:
+                yield _final_envelope(_result_envelope(request_id=request_id, tool_name=tool_name, result=result))
+            return
+
+        sequence = 0
+        chunks = _stream_chunks(tool_name, tool.spec.handler, args, call_deadline, max_buffered_chunks)
+        try:
+            async for chunk in chunks:
+                yield {"ok": True, "request_id": request_id, "tool_name": tool_name, "sequence": sequence, "chunk": chunk}
+                sequence += 1
+        except ToolError as error:
+            yield _final_envelope(_error_envelope(request_id=request_id, tool_name=tool_name, error=error))
+            return
+        finally:
+            await chunks.aclose()
+        yield _final_envelope(_result_envelope(request_id=request_id, tool_name=tool_name, result={"chunks": sequence}))
+    finally:
+        release()
@@ -0,0 +1,219 @@
+"""Result cache for MCP tools whose output depends only on their arguments."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from orchestrator.metrics import Counter, counter
+
+CacheKey = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How a tool's results may be reused.
+
+    ``mode`` is ``"none"`` (never cached), ``"pure"`` (cached until evicted
+    or invalidated) or ``"ttl"`` (cached for ``ttl_seconds``).
+    """
+
+    mode: str = "none"
+    ttl_seconds: float | None = None
+
+    def __post_init__(self) -> None:
+        if self.mode not in ("none", "pure", "ttl"):
+            raise ValueError(f"Unknown cache mode: {self.mode}")
+        if self.mode == "ttl" and (self.ttl_seconds is None or self.ttl_seconds <= 0):
+            raise ValueError("ttl cache policy needs a positive ttl_seconds")
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "none"
+
+    @classmethod
+    def ttl(cls, seconds: float) -> "CachePolicy":
+        return cls("ttl", seconds)
+
+
+NO_CACHE = CachePolicy()
+PURE = CachePolicy("pure")
+
+
+def cache_key(tool_name: str, arguments: dict[str, Any]) -> CacheKey | None:
+    """Key on the tool name and canonical JSON of the arguments; ``None`` if not JSON-serializable."""
+    try:
+        canonical = json.dumps(arguments, sort_keys=True, separators=(",", ":"), allow_nan=False)
+    except (TypeError, ValueError):
+        return None
+    return (tool_name, canonical)
+
+
+def _copy_if_possible(value: Any) -> Any:
+    try:
+        return copy.deepcopy(value)
+    except Exception:
+        return value
+
+
+class ToolResultCache:
+    """Size-bounded LRU of tool results with single-flight computation.
+
+    Concurrent identical calls share one computation: the first caller runs
+    it and the rest wait for its result (or its exception, which is not
+    cached). The cache keeps its own deep copy of each result and hands every
+    hit or waiter a fresh copy, so callers may mutate what they get back.
+    Results that cannot be deep-copied are passed to waiters as-is and not
+    cached. A
+    sync caller never blocks on a computation led from its own thread (an
+    async leader on the loop it is running in, or a re-entrant call); it
+    computes directly instead.
+    """
+
+    def __init__(self, *, max_entries: int = 10_000) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[CacheKey, tuple[float | None, Any]] = OrderedDict()
+        # key -> (future, ident of the thread leading the computation)
+        self._inflight: dict[CacheKey, tuple[Future, int]] = {}
+        self._metrics: dict[str, tuple[Counter, Counter]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _counters(self, tool_name: str) -> tuple[Counter, Counter]:
+        handles = self._metrics.get(tool_name)
+        if handles is None:
+            labels = (("tool", tool_name),)
+            handles = self._metrics.setdefault(
+                tool_name,
+                (
+                    counter(f"mcp.tool_cache.hits.{tool_name}", family="mcp.tool_cache.hits", labels=labels),
+                    counter(f"mcp.tool_cache.misses.{tool_name}", family="mcp.tool_cache.misses", labels=labels),
+                ),
+            )
+        return handles
+
+    def _claim(self, key: CacheKey, *, blocking: bool = False) -> tuple[str, Any]:
+        """Return ``("hit", value)``, ``("wait", future)``, ``("lead", future)`` or ``("bypass", None)``.
+
+        ``blocking`` callers get ``"bypass"`` rather than waiting on a leader in
+        their own thread, which could only finish once they return.
+        """
+        hits, misses = self._counters(key[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    hits.inc()
+                    return "hit", copy.deepcopy(value)
+                del self._entries[key]
+            pending = self._inflight.get(key)
+            if pending is not None:
+                if blocking and pending[1] == threading.get_ident():
+                    misses.inc()
+                    return "bypass", None
+                hits.inc()
+                return "wait", pending[0]
+            misses.inc()
+            future: Future = Future()
+            self._inflight[key] = (future, threading.get_ident())
+            return "lead", future
+
+    def _settle(self, key: CacheKey, future: Future, policy: CachePolicy, value: Any, error: BaseException | None) -> None:
+        try:
+            cacheable = error is None
+            if cacheable:
+                try:
+                    value = copy.deepcopy(value)  # detach from the leader's object
+                except Exception:
+                    # Locks, generators, sockets...: hand waiters the original and cache nothing.
+                    cacheable = False
+            with self._lock:
+                pending = self._inflight.get(key)
+                if pending is not None and pending[0] is future:
+                    del self._inflight[key]
+                    if cacheable:
+                        expires_at = time.monotonic() + policy.ttl_seconds if policy.mode == "ttl" else None
+                        self._entries[key] = (expires_at, value)
+                        self._entries.move_to_end(key)
+                        while len(self._entries) > self.max_entries:
+                            self._entries.popitem(last=False)
+        finally:
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(error)
+
+    def get_or_compute(self, key: CacheKey, policy: CachePolicy, compute: Callable[[], Any]) -> Any:
+        state, value = self._claim(key, blocking=True)
+        if state == "hit":
+            return value
+        if state == "wait":
+            return _copy_if_possible(value.result())
+        if state == "bypass":
+            return compute()
+        try:
+            result = compute()
+        except Exception as exc:
+            self._settle(key, value, policy, None, exc)
+            raise
+        self._settle(key, value, policy, result, None)
+        return result
+
+    async def aget_or_compute(self, key: CacheKey, policy: CachePolicy, compute: Callable[[], Awaitable[Any]]) -> Any:
+        state, value = self._claim(key)
+        if state == "hit":
+            return value
+        if state == "wait":
+            return _copy_if_possible(await asyncio.wrap_future(value))
+        try:
+            result = await compute()
+        except Exception as exc:
+            self._settle(key, value, policy, None, exc)
+            raise
+        except BaseException:
+            # Cancelled leader: drop the in-flight slot so waiters and retries recompute.
+            self._settle(key, value, policy, None, RuntimeError("Coalesced tool call was cancelled"))
+            raise
+        self._settle(key, value, policy, result, None)
+        return result
+
+    def invalidate(self, tool_name: str | None = None, arguments: dict[str, Any] | None = None) -> int:
+        """Drop cached results for one call, one tool, or everything; returns the count removed."""
+        with self._lock:
+            if tool_name is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            if arguments is not None:
+                key = cache_key(tool_name, arguments)
+                return 1 if key is not None and self._entries.pop(key, None) is not None else 0
+            stale = [key for key in self._entries if key[0] == tool_name]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Per-tool hits, misses and hit rate since process start."""
+        result = {}
+        for tool_name, (hits, misses) in list(self._metrics.items()):
+            hit_count, miss_count = hits.value(), misses.value()
+            total = hit_count + miss_count
+            result[tool_name] = {
+                "hits": hit_count,
+                "misses": miss_count,
+                "hit_rate": hit_count / total if total else 0.0,
+            }
+        return result
@@ -0,0 +1,140 @@
+"""Per-principal and per-tool admission limits for the MCP tool gateway.
+
+Each (principal) and (principal, tool) pair that has been seen recently owns
+one small bucket holding its token-bucket level and in-flight count, so memory
+grows with active principals only. Buckets idle for ``idle_seconds`` with no
+call in flight are dropped by an occasional sweep; a dropped bucket would have
+refilled anyway, so evicting it never loosens a limit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class QuotaPolicy:
+    """Token-bucket rate and concurrency cap; ``None`` disables that limit."""
+
+    rate_per_second: float | None = None
+    burst: float | None = None  # defaults to max(1, rate_per_second)
+    max_in_flight: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_second is not None or self.max_in_flight is not None
+
+    @property
+    def capacity(self) -> float:
+        if self.burst is not None:
+            return self.burst
+        return max(1.0, self.rate_per_second or 1.0)
+
+
+UNLIMITED = QuotaPolicy()
+
+# Concurrency slots free up when calls finish, which cannot be predicted; suggest a short wait.
+IN_FLIGHT_RETRY_AFTER_SECONDS = 0.5
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, scope: str, reason: str, retry_after_seconds: float) -> None:
+        super().__init__(f"{scope} {reason} limit exceeded")
+        self.scope = scope
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "in_flight")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+        self.in_flight = 0
+
+
+def principal_from_authorization(authorization_header: str | None) -> str:
+    """Stable, non-reversible principal id for a bearer token."""
+    token = (authorization_header or "").removeprefix("Bearer ").strip()
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+class ToolQuotas:
+    """Admission control keyed by principal and by (principal, tool)."""
+
+    def __init__(
+        self,
+        principal_policy: QuotaPolicy = UNLIMITED,
+        *,
+        idle_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.principal_policy = principal_policy
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: dict[tuple[str, ...], _Bucket] = {}
+        self._next_sweep = clock() + idle_seconds
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _bucket(self, key: tuple[str, ...], policy: QuotaPolicy, now: float) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(policy.capacity, now)
+        elif policy.rate_per_second is not None:
+            elapsed = now - bucket.updated
+            bucket.tokens = min(policy.capacity, bucket.tokens + elapsed * policy.rate_per_second)
+            bucket.updated = now
+        return bucket
+
+    @staticmethod
+    def _check(bucket: _Bucket, policy: QuotaPolicy, scope: str) -> None:
+        if policy.max_in_flight is not None and bucket.in_flight >= policy.max_in_flight:
+            raise QuotaExceeded(scope, "concurrency", IN_FLIGHT_RETRY_AFTER_SECONDS)
+        if policy.rate_per_second is not None and bucket.tokens < 1.0:
+            raise QuotaExceeded(scope, "rate", (1.0 - bucket.tokens) / policy.rate_per_second)
+
+    def _sweep(self, now: float) -> None:
+        cutoff = now - self.idle_seconds
+        idle = [key for key, bucket in self._buckets.items() if bucket.in_flight == 0 and bucket.updated <= cutoff]
+        for key in idle:
+            del self._buckets[key]
+        self._next_sweep = now + self.idle_seconds
+
+    def acquire(self, principal: str, tool_name: str, tool_policy: QuotaPolicy = UNLIMITED) -> None:
+        """Admit one call or raise :class:`QuotaExceeded`; pair every success with :meth:`release`.
+
+        Both limits are checked before either is charged, so a call rejected
+        by one limit does not consume the other's budget.
+        """
+        now = self._clock()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            scopes = []
+            if self.principal_policy.enabled:
+                scopes.append((self._bucket((principal,), self.principal_policy, now), self.principal_policy, "principal"))
+            if tool_policy.enabled:
+                scopes.append((self._bucket((principal, tool_name), tool_policy, now), tool_policy, "tool"))
+            for bucket, policy, scope in scopes:
+                self._check(bucket, policy, scope)
+            for bucket, policy, _ in scopes:
+                bucket.updated = now
+                if policy.rate_per_second is not None:
+                    bucket.tokens -= 1.0
+                bucket.in_flight += 1
+
+    def release(self, principal: str, tool_name: str, tool_policy: QuotaPolicy = UNLIMITED) -> None:
+        with self._lock:
+            for key, policy in (((principal,), self.principal_policy), ((principal, tool_name), tool_policy)):
+                if policy.enabled:
+                    bucket = self._buckets.get(key)
+                    if bucket is not None and bucket.in_flight:
+                        bucket.in_flight -= 1
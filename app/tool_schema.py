@@ -0,0 +1,352 @@
+"""JSON-schema validation for MCP tool arguments.
+
+:func:`compile_schema` turns a schema into nested closures once, at
+registration time, so validating a call never re-reads the schema.
+:func:`validate` interprets the schema directly and is kept as the reference
+implementation (and benchmark baseline). Both support the subset of JSON
+Schema used for tool arguments: ``type``, ``enum``, ``const``, string and
+numeric bounds, ``pattern``, ``properties``/``required``/
+``additionalProperties``, ``items``/``minItems``/``maxItems`` and the
+``allOf``/``anyOf``/``oneOf``/``not`` combinators.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Callable
+
+Validator = Callable[[Any], None]
+
+
+class SchemaValidationError(ValueError):
+    """Instance does not match the schema; ``path`` locates the offending value."""
+
+    def __init__(self, message: str, path: list[str | int] | None = None) -> None:
+        super().__init__(message)
+        self.message = message
+        self.path = path if path is not None else []
+
+    @property
+    def location(self) -> str:
+        return "$" + "".join(f"[{part}]" if isinstance(part, int) else f".{part}" for part in self.path)
+
+    def __str__(self) -> str:
+        return f"{self.location}: {self.message}" if self.path else self.message
+
+
+_TYPES: dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+_ANNOTATIONS = frozenset({"$schema", "$id", "title", "description", "default", "examples", "$comment"})
+_KEYWORDS = frozenset(
+    {
+        "type", "enum", "const",
+        "minLength", "maxLength", "pattern",
+        "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum",
+        "properties", "required", "additionalProperties",
+        "items", "minItems", "maxItems",
+        "allOf", "anyOf", "oneOf", "not",
+    }
+)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _accept(value: Any) -> None:
+    return None
+
+
+def _nested(check: Validator, value: Any, part: str | int) -> None:
+    try:
+        check(value)
+    except SchemaValidationError as exc:
+        exc.path.insert(0, part)
+        raise
+
+
+def _type_check(expected: str | list[str]) -> Validator:
+    names = [expected] if isinstance(expected, str) else list(expected)
+    unknown = [name for name in names if name not in _TYPES]
+    if unknown:
+        raise ValueError(f"Unknown JSON schema type(s): {unknown}")
+    if len(names) == 1:
+        test = _TYPES[names[0]]
+        python_types = {"object": dict, "array": list, "string": str, "null": type(None)}
+        exact = python_types.get(names[0])
+        if exact is not None:
+            # Fast path: a plain isinstance check for types without bool exclusions.
+            def check(value: Any) -> None:
+                if not isinstance(value, exact):
+                    raise SchemaValidationError(f"expected {names[0]}")
+
+            return check
+    else:
+        tests = [_TYPES[name] for name in names]
+
+        def test(value: Any) -> bool:
+            return any(t(value) for t in tests)
+
+    label = " or ".join(names)
+
+    def check(value: Any) -> None:
+        if not test(value):
+            raise SchemaValidationError(f"expected {label}")
+
+    return check
+
+
+def _compile(schema: Any) -> Validator:
+    if schema is True or schema == {}:
+        return _accept
+    if schema is False:
+        def reject(value: Any) -> None:
+            raise SchemaValidationError("no value is allowed here")
+
+        return reject
+    if not isinstance(schema, dict):
+        raise ValueError(f"Schema must be an object or boolean, got {type(schema).__name__}")
+    unknown = set(schema) - _KEYWORDS - _ANNOTATIONS
+    if unknown:
+        raise ValueError(f"Unsupported JSON schema keyword(s): {sorted(unknown)}")
+
+    checks: list[Validator] = []
+    if "type" in schema:
+        checks.append(_type_check(schema["type"]))
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value: Any) -> None:
+            if value not in allowed:
+                raise SchemaValidationError(f"must be one of {allowed}")
+
+        checks.append(check_enum)
+    if "const" in schema:
+        expected = schema["const"]
+
+        def check_const(value: Any) -> None:
+            if value != expected:
+                raise SchemaValidationError(f"must equal {expected!r}")
+
+        checks.append(check_const)
+
+    min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+    pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+    if min_length is not None or max_length is not None or pattern is not None:
+        def check_string(value: Any) -> None:
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                raise SchemaValidationError(f"shorter than {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                raise SchemaValidationError(f"longer than {max_length} characters")
+            if pattern is not None and pattern.search(value) is None:
+                raise SchemaValidationError(f"does not match pattern {pattern.pattern!r}")
+
+        checks.append(check_string)
+
+    bounds = [(schema.get(key), key) for key in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")]
+    if any(bound is not None for bound, _ in bounds):
+        (minimum, _), (maximum, _), (exclusive_min, _), (exclusive_max, _) = bounds
+
+        def check_number(value: Any) -> None:
+            if not _is_number(value):
+                return
+            if minimum is not None and value < minimum:
+                raise SchemaValidationError(f"less than minimum {minimum}")
+            if maximum is not None and value > maximum:
+                raise SchemaValidationError(f"greater than maximum {maximum}")
+            if exclusive_min is not None and value <= exclusive_min:
+                raise SchemaValidationError(f"not greater than {exclusive_min}")
+            if exclusive_max is not None and value >= exclusive_max:
+                raise SchemaValidationError(f"not less than {exclusive_max}")
+
+        checks.append(check_number)
+
+    if "properties" in schema or "required" in schema or "additionalProperties" in schema:
+        properties = {name: _compile(sub) for name, sub in schema.get("properties", {}).items()}
+        required = tuple(schema.get("required", ()))
+        additional = schema.get("additionalProperties", True)
+        extra: Validator | None = None if additional is True else _compile(additional)
+
+        def check_object(value: Any) -> None:
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    raise SchemaValidationError(f"missing required property '{name}'")
+            for key, item in value.items():
+                sub = properties.get(key, extra)
+                if sub is not None:
+                    _nested(sub, item, key)
+
+        checks.append(check_object)
+
+    if "items" in schema or "minItems" in schema or "maxItems" in schema:
+        items = _compile(schema["items"]) if "items" in schema else _accept
+        min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+
+        def check_array(value: Any) -> None:
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                raise SchemaValidationError(f"fewer than {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                raise SchemaValidationError(f"more than {max_items} items")
+            if items is not _accept:
+                for index, item in enumerate(value):
+                    _nested(items, item, index)
+
+        checks.append(check_array)
+
+    if "allOf" in schema:
+        checks.extend(_compile(sub) for sub in schema["allOf"])
+    for keyword in ("anyOf", "oneOf"):
+        if keyword in schema:
+            options = [_compile(sub) for sub in schema[keyword]]
+            checks.append(_combinator(keyword, options))
+    if "not" in schema:
+        negated = _compile(schema["not"])
+
+        def check_not(value: Any) -> None:
+            try:
+                negated(value)
+            except SchemaValidationError:
+                return
+            raise SchemaValidationError("must not match the 'not' schema")
+
+        checks.append(check_not)
+
+    if not checks:
+        return _accept
+    if len(checks) == 1:
+        return checks[0]
+    fused = tuple(checks)
+
+    def check_all(value: Any) -> None:
+        for check in fused:
+            check(value)
+
+    return check_all
+
+
+def _combinator(keyword: str, options: list[Validator]) -> Validator:
+    def matches(check: Validator, value: Any) -> bool:
+        try:
+            check(value)
+        except SchemaValidationError:
+            return False
+        return True
+
+    if keyword == "anyOf":
+        def check_any(value: Any) -> None:
+            if not any(matches(option, value) for option in options):
+                raise SchemaValidationError("matches none of the 'anyOf' schemas")
+
+        return check_any
+
+    def check_one(value: Any) -> None:
+        if sum(matches(option, value) for option in options) != 1:
+            raise SchemaValidationError("must match exactly one of the 'oneOf' schemas")
+
+    return check_one
+
+
+def compile_schema(schema: dict[str, Any] | bool) -> Validator:
+    """Compile ``schema`` into a validator that raises :class:`SchemaValidationError`.
+
+    Unsupported keywords and malformed schemas raise ``ValueError`` here, at
+    compile time, rather than on the first call.
+    """
+    return _compile(schema)
+
+
+def validate(schema: dict[str, Any] | bool, instance: Any) -> None:
+    """Validate ``instance`` by walking ``schema`` on every call (reference implementation)."""
+    if schema is True:
+        return
+    if schema is False:
+        raise SchemaValidationError("no value is allowed here")
+
+    expected = schema.get("type")
+    if expected is not None:
+        names = [expected] if isinstance(expected, str) else expected
+        if not any(_TYPES[name](instance) for name in names):
+            raise SchemaValidationError(f"expected {' or '.join(names)}")
+    if "enum" in schema and instance not in schema["enum"]:
+        raise SchemaValidationError(f"must be one of {list(schema['enum'])}")
+    if "const" in schema and instance != schema["const"]:
+        raise SchemaValidationError(f"must equal {schema['const']!r}")
+
+    if isinstance(instance, str):
+        if "minLength" in schema and len(instance) < schema["minLength"]:
+            raise SchemaValidationError(f"shorter than {schema['minLength']} characters")
+        if "maxLength" in schema and len(instance) > schema["maxLength"]:
+            raise SchemaValidationError(f"longer than {schema['maxLength']} characters")
+        if "pattern" in schema and re.search(schema["pattern"], instance) is None:
+            raise SchemaValidationError(f"does not match pattern {schema['pattern']!r}")
+    if _is_number(instance):
+        if "minimum" in schema and instance < schema["minimum"]:
+            raise SchemaValidationError(f"less than minimum {schema['minimum']}")
+        if "maximum" in schema and instance > schema["maximum"]:
+            raise SchemaValidationError(f"greater than maximum {schema['maximum']}")
+        if "exclusiveMinimum" in schema and instance <= schema["exclusiveMinimum"]:
+            raise SchemaValidationError(f"not greater than {schema['exclusiveMinimum']}")
+        if "exclusiveMaximum" in schema and instance >= schema["exclusiveMaximum"]:
+            raise SchemaValidationError(f"not less than {schema['exclusiveMaximum']}")
+    if isinstance(instance, dict):
+        for name in schema.get("required", ()):
+            if name not in instance:
+                raise SchemaValidationError(f"missing required property '{name}'")
+        properties = schema.get("properties", {})
+        additional = schema.get("additionalProperties", True)
+        for key, item in instance.items():
+            sub = properties.get(key, additional)
+            if sub is not True:
+                try:
+                    validate(sub, item)
+                except SchemaValidationError as exc:
+                    exc.path.insert(0, key)
+                    raise
+    if isinstance(instance, list):
+        if "minItems" in schema and len(instance) < schema["minItems"]:
+            raise SchemaValidationError(f"fewer than {schema['minItems']} items")
+        if "maxItems" in schema and len(instance) > schema["maxItems"]:
+            raise SchemaValidationError(f"more than {schema['maxItems']} items")
+        if "items" in schema:
+            for index, item in enumerate(instance):
+                try:
+                    validate(schema["items"], item)
+                except SchemaValidationError as exc:
+                    exc.path.insert(0, index)
+                    raise
+
+    for sub in schema.get("allOf", ()):
+        validate(sub, instance)
+    for keyword in ("anyOf", "oneOf"):
+        if keyword in schema:
+            matched = 0
+            for sub in schema[keyword]:
+                try:
+                    validate(sub, instance)
+                except SchemaValidationError:
+                    continue
+                matched += 1
+            if keyword == "anyOf" and not matched:
+                raise SchemaValidationError("matches none of the 'anyOf' schemas")
+            if keyword == "oneOf" and matched != 1:
+                raise SchemaValidationError("must match exactly one of the 'oneOf' schemas")
+    if "not" in schema:
+        try:
+            validate(schema["not"], instance)
+        except SchemaValidationError:
+            return
+        raise SchemaValidationError("must not match the 'not' schema")
@@ -0,0 +1,205 @@
+"""Cached signing keys with zero-downtime rotation.
+
+A :class:`Keyring` resolves secrets once, keeps a pre-keyed HMAC object per
+key id and ``.copy()``s it for each request instead of re-reading the
+environment and re-keying on every call. During a rotation it accepts a small,
+bounded set of active keys (newest first); the first key is the primary one.
+
+Sources, in order of precedence for :meth:`Keyring.from_env`:
+
+- ``{NAME}_FILE``: path to JSON ``{"keys": [{"id": "...", "secret": "..."}]}``,
+  re-read when its mtime changes (checked at most every ``reload_interval_seconds``).
+- ``{NAME}`` and optional ``{NAME}_PREVIOUS`` environment variables, exposed as
+  key ids ``current`` and ``previous``; re-keyed whenever their values change.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class KeyringEmpty(Exception):
+    """Raised when no secret is configured for a keyring."""
+
+
+@dataclass(slots=True)
+class KeyStats:
+    verified: int = 0
+    seconds_total: float = 0.0
+    seconds_max: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class _Key:
+    key_id: str
+    secret: str
+    mac: Any  # pre-keyed ``hmac.HMAC``; only ever used via ``.copy()``
+
+
+class Keyring:
+    """Set of active secrets with cached HMAC contexts and per-key metrics."""
+
+    def __init__(
+        self,
+        *,
+        env_var: str | None = None,
+        previous_env_var: str | None = None,
+        path: str | None = None,
+        default: str | None = None,
+        max_active_keys: int = 2,
+        reload_interval_seconds: float = 5.0,
+    ) -> None:
+        if max_active_keys < 1:
+            raise ValueError("max_active_keys must be >= 1")
+        self.env_var = env_var
+        self.previous_env_var = previous_env_var
+        self.path = path
+        self.default = default
+        self.max_active_keys = max_active_keys
+        self.reload_interval_seconds = reload_interval_seconds
+        self._keys: tuple[_Key, ...] = ()
+        self._source_marker: Any = object()
+        self._next_check = 0.0
+        self._lock = Lock()
+        self._stats: dict[str | None, KeyStats] = {}
+
+    @classmethod
+    def from_env(cls, name: str, *, default: str | None = None, **kwargs: Any) -> "Keyring":
+        path = os.getenv(f"{name}_FILE")
+        if path:
+            return cls(path=path, **kwargs)
+        return cls(env_var=name, previous_env_var=f"{name}_PREVIOUS", default=default, **kwargs)
+
+    @property
+    def source(self) -> str:
+        return self.path or self.env_var or "<unset>"
+
+    def _env_marker(self) -> tuple[str | None, str | None]:
+        current = os.environ.get(self.env_var) if self.env_var else None
+        previous = os.environ.get(self.previous_env_var) if self.previous_env_var else None
+        return current or self.default, previous
+
+    def _load_env(self, marker: tuple[str | None, str | None]) -> list[tuple[str, str]]:
+        current, previous = marker
+        entries = []
+        if current:
+            entries.append(("current", current))
+        if previous and previous != current:
+            entries.append(("previous", previous))
+        return entries
+
+    def _load_file(self) -> list[tuple[str, str]]:
+        with open(self.path, encoding="utf-8") as handle:
+            document = json.load(handle)
+        entries = []
+        for item in document.get("keys", []):
+            key_id, secret = item.get("id"), item.get("secret")
+            if not isinstance(key_id, str) or not isinstance(secret, str) or not secret:
+                raise ValueError(f"Invalid key entry in {self.path}")
+            entries.append((key_id, secret))
+        return entries
+
+    def _install(self, entries: list[tuple[str, str]]) -> None:
+        if len(entries) > self.max_active_keys:
+            logger.warning(
+                "Keyring %s has %d keys; only the newest %d are active",
+                self.source,
+                len(entries),
+                self.max_active_keys,
+            )
+            entries = entries[: self.max_active_keys]
+        self._keys = tuple(
+            _Key(key_id, secret, hmac.new(secret.encode(), digestmod=hashlib.sha256)) for key_id, secret in entries
+        )
+
+    def reload(self, *, force: bool = True) -> None:
+        """Re-read the key source; a failed file reload keeps the previous keys."""
+        with self._lock:
+            if self.path:
+                now = time.monotonic()
+                if not force and now < self._next_check:
+                    return
+                self._next_check = now + self.reload_interval_seconds
+                try:
+                    marker: Any = os.stat(self.path).st_mtime_ns
+                    if force or marker != self._source_marker:
+                        self._install(self._load_file())
+                        self._source_marker = marker
+                except (OSError, ValueError) as exc:
+                    logger.error("Keyring reload from %s failed: %s", self.path, exc)
+            else:
+                marker = self._env_marker()
+                if force or marker != self._source_marker:
+                    self._install(self._load_env(marker))
+                    self._source_marker = marker
+
+    def _active(self) -> tuple[_Key, ...]:
+        if self.path:
+            if time.monotonic() >= self._next_check:
+                self.reload(force=False)
+        elif self._env_marker() != self._source_marker:
+            self.reload(force=False)
+        keys = self._keys
+        if not keys:
+            raise KeyringEmpty(f"Missing server secret: {self.source}")
+        return keys
+
+    def key_ids(self) -> list[str]:
+        return [key.key_id for key in self._active()]
+
+    def sign(self, message: bytes) -> str:
+        """Hex HMAC-SHA256 of ``message`` under the primary key."""
+        mac = self._active()[0].mac.copy()
+        mac.update(message)
+        return mac.hexdigest()
+
+    def verify(self, message: bytes, signature: str) -> str | None:
+        """Return the id of the active key whose HMAC matches ``signature``."""
+        keys = self._active()
+        start = time.perf_counter()
+        matched = None
+        for key in keys:
+            mac = key.mac.copy()
+            mac.update(message)
+            if hmac.compare_digest(signature, mac.hexdigest()):
+                matched = key.key_id
+                break
+        self._record(matched, time.perf_counter() - start)
+        return matched
+
+    def match_secret(self, candidate: str) -> str | None:
+        """Return the id of the active key whose secret equals ``candidate``."""
+        keys = self._active()
+        start = time.perf_counter()
+        matched = None
+        for key in keys:
+            if hmac.compare_digest(candidate, key.secret):
+                matched = key.key_id
+                break
+        self._record(matched, time.perf_counter() - start)
+        return matched
+
+    def _record(self, key_id: str | None, seconds: float) -> None:
+        with self._lock:
+            stats = self._stats.get(key_id)
+            if stats is None:
+                stats = self._stats[key_id] = KeyStats()
+            stats.verified += 1
+            stats.seconds_total += seconds
+            if seconds > stats.seconds_max:
+                stats.seconds_max = seconds
+
+    def stats(self) -> dict[str | None, KeyStats]:
+        """Per key id verification counts and timings; ``None`` collects rejections."""
+        with self._lock:
+            return {key_id: KeyStats(s.verified, s.seconds_total, s.seconds_max) for key_id, s in self._stats.items()}
@@ -0,0 +1,458 @@
+"""OIDC bearer-token (JWT) validation.
+
+:class:`OIDCValidator` checks ``iss``/``aud``/``exp``/``nbf`` and HS256, RS256
+or ES256 signatures without third-party crypto dependencies:
+
+- HS256 tokens are checked against a :class:`auth.keyring.Keyring`, so shared
+  secrets rotate the same way as service signing keys.
+- RS256/ES256 keys come from a JWKS document held in :class:`JWKSCache`, which
+  honours a TTL, can refresh in a background thread, and backs off when
+  tokens reference an unknown ``kid``.
+- Successfully verified tokens are remembered (by SHA-256 of the token) in a
+  bounded LRU until their own ``exp``, so hot clients skip signature checks.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from auth.keyring import Keyring, KeyringEmpty
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_ALGORITHMS = ("HS256", "RS256", "ES256")
+
+
+class TokenValidationError(Exception):
+    """Raised when a bearer token fails parsing, signature or claim checks."""
+
+
+def _b64url_decode(data: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    except (ValueError, TypeError) as exc:
+        raise TokenValidationError("Malformed token encoding") from exc
+
+
+def _b64url_uint(data: str) -> int:
+    return int.from_bytes(_b64url_decode(data), "big")
+
+
+# --- RS256 -----------------------------------------------------------------
+
+_SHA256_DIGEST_INFO = bytes.fromhex("3031300d060960864801650304020105000420")
+
+
+def _rsa_verify(n: int, e: int, message: bytes, signature: bytes) -> bool:
+    size = (n.bit_length() + 7) // 8
+    if len(signature) != size:
+        return False
+    sig_int = int.from_bytes(signature, "big")
+    if sig_int >= n:
+        return False
+    encoded = pow(sig_int, e, n).to_bytes(size, "big")
+    suffix = _SHA256_DIGEST_INFO + hashlib.sha256(message).digest()
+    expected = b"\x00\x01" + b"\xff" * (size - len(suffix) - 3) + b"\x00" + suffix
+    return encoded == expected
+
+
+# --- ES256 (NIST P-256) ----------------------------------------------------
+
+_P = 0xFFFFFFFF00000001000000000000000000000000FFFFFFFFFFFFFFFFFFFFFFFF
+_B = 0x5AC635D8AA3A93E7B3EBBD55769886BC651D06B0CC53B0F63BCE3C3E27D2604B
+_N = 0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551
+_G = (
+    0x6B17D1F2E12C4247F8BCE6E563A440F277037D812DEB33A0F4A13945D898C296,
+    0x4FE342E2FE1A7F9B8EE7EB4A7C0F9E162BCE33576B315ECECBB6406837BF51F5,
+    1,
+)
+_INFINITY = (0, 1, 0)
+
+
+def _jacobian_double(point: tuple[int, int, int]) -> tuple[int, int, int]:
+    x, y, z = point
+    if z == 0 or y == 0:
+        return _INFINITY
+    delta = z * z % _P
+    gamma = y * y % _P
+    beta = x * gamma % _P
+    alpha = 3 * (x - delta) * (x + delta) % _P
+    x3 = (alpha * alpha - 8 * beta) % _P
+    z3 = ((y + z) ** 2 - gamma - delta) % _P
+    y3 = (alpha * (4 * beta - x3) - 8 * gamma * gamma) % _P
+    return x3, y3, z3
+
+
+def _jacobian_add(p1: tuple[int, int, int], p2: tuple[int, int, int]) -> tuple[int, int, int]:
+    x1, y1, z1 = p1
+    x2, y2, z2 = p2
+    if z1 == 0:
+        return p2
+    if z2 == 0:
+        return p1
+    z1z1 = z1 * z1 % _P
+    z2z2 = z2 * z2 % _P
+    u1 = x1 * z2z2 % _P
+    u2 = x2 * z1z1 % _P
+    s1 = y1 * z2 * z2z2 % _P
+    s2 = y2 * z1 * z1z1 % _P
+    if u1 == u2:
+        return _jacobian_double(p1) if s1 == s2 else _INFINITY
+    h = u2 - u1
+    i = 4 * h * h % _P
+    j = h * i % _P
+    r = 2 * (s2 - s1) % _P
+    v = u1 * i % _P
+    x3 = (r * r - j - 2 * v) % _P
+    y3 = (r * (v - x3) - 2 * s1 * j) % _P
+    z3 = ((z1 + z2) ** 2 - z1z1 - z2z2) * h % _P
+    return x3, y3, z3
+
+
+def _p256_double_mul(k1: int, p1: tuple[int, int, int], k2: int, p2: tuple[int, int, int]) -> tuple[int, int, int]:
+    """Compute ``k1*p1 + k2*p2`` with Shamir's trick."""
+    both = _jacobian_add(p1, p2)
+    result = _INFINITY
+    for bit in range(max(k1.bit_length(), k2.bit_length()) - 1, -1, -1):
+        result = _jacobian_double(result)
+        b1, b2 = (k1 >> bit) & 1, (k2 >> bit) & 1
+        if b1 and b2:
+            result = _jacobian_add(result, both)
+        elif b1:
+            result = _jacobian_add(result, p1)
+        elif b2:
+            result = _jacobian_add(result, p2)
+    return result
+
+
+def _p256_affine_x(point: tuple[int, int, int]) -> int | None:
+    x, _, z = point
+    if z == 0:
+        return None
+    z_inv = pow(z, -1, _P)
+    return x * z_inv * z_inv % _P
+
+
+def _p256_on_curve(x: int, y: int) -> bool:
+    return 0 <= x < _P and 0 <= y < _P and (y * y - (x * x * x - 3 * x + _B)) % _P == 0
+
+
+def _ecdsa_p256_verify(x: int, y: int, message: bytes, signature: bytes) -> bool:
+    if len(signature) != 64:
+        return False
+    r = int.from_bytes(signature[:32], "big")
+    s = int.from_bytes(signature[32:], "big")
+    if not (0 < r < _N and 0 < s < _N):
+        return False
+    z = int.from_bytes(hashlib.sha256(message).digest(), "big")
+    w = pow(s, -1, _N)
+    point = _p256_double_mul(z * w % _N, _G, r * w % _N, (x, y, 1))
+    affine_x = _p256_affine_x(point)
+    return affine_x is not None and affine_x % _N == r
+
+
+# --- JWKS ------------------------------------------------------------------
+
+
+@dataclass(frozen=True, slots=True)
+class PublicKey:
+    kid: str | None
+    alg: str
+    params: tuple[int, int]  # RSA (n, e) or EC P-256 (x, y)
+
+    def verify(self, message: bytes, signature: bytes) -> bool:
+        if self.alg == "RS256":
+            return _rsa_verify(*self.params, message, signature)
+        return _ecdsa_p256_verify(*self.params, message, signature)
+
+
+def parse_jwks(document: dict[str, Any]) -> dict[str | None, PublicKey]:
+    """Parse the RS256/ES256 signing keys of a JWKS document, keyed by ``kid``."""
+    keys: dict[str | None, PublicKey] = {}
+    for jwk in document.get("keys", []):
+        if jwk.get("use", "sig") != "sig":
+            continue
+        kty, kid = jwk.get("kty"), jwk.get("kid")
+        try:
+            if kty == "RSA" and jwk.get("alg", "RS256") == "RS256":
+                keys[kid] = PublicKey(kid, "RS256", (_b64url_uint(jwk["n"]), _b64url_uint(jwk["e"])))
+            elif kty == "EC" and jwk.get("crv") == "P-256" and jwk.get("alg", "ES256") == "ES256":
+                x, y = _b64url_uint(jwk["x"]), _b64url_uint(jwk["y"])
+                if not _p256_on_curve(x, y):
+                    raise TokenValidationError("EC key is not on P-256")
+                keys[kid] = PublicKey(kid, "ES256", (x, y))
+        except (KeyError, TokenValidationError) as exc:
+            logger.warning("Skipping invalid JWK %r: %s", kid, exc)
+    return keys
+
+
+def fetch_json(url: str, timeout_seconds: float = 5.0) -> dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=timeout_seconds) as response:  # noqa: S310 - configured URL
+        return json.loads(response.read().decode("utf-8"))
+
+
+class JWKSCache:
+    """TTL cache of JWKS signing keys with background refresh and kid-miss backoff.
+
+    A fetch failure keeps serving the last good key set. When the TTL lapses,
+    concurrent lookups share a single refetch rather than each hitting the
+    provider. With ``background_refresh`` the refresh thread is started by the
+    first lookup rather than at construction. Lookups for an unknown
+    ``kid`` trigger a refetch, but consecutive misses back off exponentially
+    from ``miss_backoff_seconds`` up to ``max_miss_backoff_seconds`` so forged
+    ``kid`` values cannot hammer the identity provider.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        ttl_seconds: float = 300.0,
+        miss_backoff_seconds: float = 1.0,
+        max_miss_backoff_seconds: float = 60.0,
+        fetcher: Callable[[str], dict[str, Any]] = fetch_json,
+        clock: Callable[[], float] = time.monotonic,
+        background_refresh: bool = False,
+    ) -> None:
+        self.url = url
+        self.background_refresh = background_refresh
+        self.ttl_seconds = ttl_seconds
+        self.miss_backoff_seconds = miss_backoff_seconds
+        self.max_miss_backoff_seconds = max_miss_backoff_seconds
+        self._fetcher = fetcher
+        self._clock = clock
+        self._keys: dict[str | None, PublicKey] = {}
+        self._expires_at = 0.0
+        self._next_miss_fetch = 0.0
+        self._miss_backoff = miss_backoff_seconds
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.fetches = 0
+
+    def refresh(self) -> bool:
+        """Fetch the JWKS now; returns ``False`` (keeping old keys) on failure."""
+        try:
+            keys = parse_jwks(self._fetcher(self.url))
+        except Exception as exc:  # network, JSON and provider errors all degrade the same way
+            logger.warning("JWKS refresh from %s failed: %s", self.url, exc)
+            return False
+        finally:
+            self.fetches += 1
+        with self._lock:
+            self._keys = keys
+            self._expires_at = self._clock() + self.ttl_seconds
+        return True
+
+    def _refresh_expired(self) -> None:
+        seen = self.fetches
+        with self._refresh_lock:
+            if self.fetches == seen:  # nobody else fetched while we waited
+                self.refresh()
+
+    def get(self, kid: str | None, alg: str) -> PublicKey | None:
+        if self.background_refresh and self._thread is None:
+            self._spawn()
+        now = self._clock()
+        if now >= self._expires_at and (self._thread is None or not self._keys):
+            self._refresh_expired()
+        key = self._lookup(kid, alg)
+        if key is not None:
+            return key
+
+        with self._lock:
+            if now < self._next_miss_fetch:
+                return None
+            self._next_miss_fetch = now + self._miss_backoff
+            self._miss_backoff = min(self._miss_backoff * 2, self.max_miss_backoff_seconds)
+        if self.refresh():
+            key = self._lookup(kid, alg)
+            if key is not None:
+                with self._lock:
+                    self._miss_backoff = self.miss_backoff_seconds
+        return key
+
+    def _lookup(self, kid: str | None, alg: str) -> PublicKey | None:
+        keys = self._keys
+        key = keys.get(kid)
+        if key is None and kid is None:
+            candidates = [k for k in keys.values() if k.alg == alg]
+            key = candidates[0] if len(candidates) == 1 else None
+        return key if key is not None and key.alg == alg else None
+
+    def start(self) -> None:
+        """Refresh in a daemon thread at 80% of the TTL so requests never block on a fetch."""
+        if self._thread is not None:
+            return
+        self.refresh()
+        self._spawn()
+
+    def _spawn(self) -> None:
+        def run() -> None:
+            while not self._stop.wait(self.ttl_seconds * 0.8):
+                self.refresh()
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = thread = threading.Thread(target=run, name="jwks-refresh", daemon=True)
+        thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+
+# --- Validator -------------------------------------------------------------
+
+
+class OIDCValidator:
+    """Validate JWT bearer tokens for one issuer/audience pair."""
+
+    def __init__(
+        self,
+        *,
+        issuer: str,
+        audience: str,
+        jwks: JWKSCache | None = None,
+        hs256_keyring: Keyring | None = None,
+        algorithms: Iterable[str] = SUPPORTED_ALGORITHMS,
+        leeway_seconds: int = 30,
+        cache_size: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        unsupported = set(algorithms) - set(SUPPORTED_ALGORITHMS)
+        if unsupported:
+            raise ValueError(f"Unsupported algorithms: {', '.join(sorted(unsupported))}")
+        self.issuer = issuer
+        self.audience = audience
+        self.jwks = jwks
+        self.hs256_keyring = hs256_keyring
+        self.algorithms = frozenset(algorithms)
+        self.leeway_seconds = leeway_seconds
+        self.cache_size = cache_size
+        self._clock = clock
+        self._verified: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def validate(self, token: str) -> dict[str, Any]:
+        """Return the token's claims or raise :class:`TokenValidationError`."""
+        now = self._clock()
+        token_hash = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            cached = self._verified.get(token_hash)
+            if cached is not None:
+                if cached[0] > now:
+                    self._verified.move_to_end(token_hash)
+                    self.cache_hits += 1
+                    return cached[1]
+                del self._verified[token_hash]
+            self.cache_misses += 1
+
+        claims = self._validate_uncached(token, now)
+        if self.cache_size > 0:
+            with self._lock:
+                self._verified[token_hash] = (float(claims["exp"]) + self.leeway_seconds, claims)
+                self._verified.move_to_end(token_hash)
+                while len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+        return claims
+
+    def _validate_uncached(self, token: str, now: float) -> dict[str, Any]:
+        parts = token.split(".")
+        if len(parts) != 3:
+            raise TokenValidationError("Token must have three segments")
+        encoded_header, encoded_claims, encoded_sig = parts
+        try:
+            header = json.loads(_b64url_decode(encoded_header))
+            claims = json.loads(_b64url_decode(encoded_claims))
+        except ValueError as exc:
+            raise TokenValidationError("Malformed token JSON") from exc
+        if not isinstance(header, dict) or not isinstance(claims, dict):
+            raise TokenValidationError("Malformed token JSON")
+
+        alg = header.get("alg")
+        if alg not in self.algorithms:
+            raise TokenValidationError(f"Algorithm not allowed: {alg}")
+        signing_input = f"{encoded_header}.{encoded_claims}".encode("ascii")
+        signature = _b64url_decode(encoded_sig)
+        if alg == "HS256":
+            if self.hs256_keyring is None:
+                raise TokenValidationError("HS256 is not configured")
+            try:
+                verified = self.hs256_keyring.verify(signing_input, signature.hex()) is not None
+            except KeyringEmpty as exc:
+                raise TokenValidationError("HS256 is not configured") from exc
+        else:
+            key = self.jwks.get(header.get("kid"), alg) if self.jwks is not None else None
+            if key is None:
+                raise TokenValidationError("No matching signing key")
+            verified = key.verify(signing_input, signature)
+        if not verified:
+            raise TokenValidationError("Invalid token signature")
+
+        self._check_claims(claims, now)
+        return claims
+
+    def _check_claims(self, claims: dict[str, Any], now: float) -> None:
+        if claims.get("iss") != self.issuer:
+            raise TokenValidationError("Invalid issuer")
+        audience = claims.get("aud")
+        audiences = audience if isinstance(audience, list) else [audience]
+        if self.audience not in audiences:
+            raise TokenValidationError("Invalid audience")
+        try:
+            exp = float(claims["exp"])
+            nbf = float(claims.get("nbf", now))
+        except (KeyError, TypeError, ValueError) as exc:
+            raise TokenValidationError("Missing or invalid exp/nbf") from exc
+        if not (math.isfinite(exp) and math.isfinite(nbf)):
+            raise TokenValidationError("Missing or invalid exp/nbf")
+        if exp + self.leeway_seconds <= now:
+            raise TokenValidationError("Token expired")
+        if nbf - self.leeway_seconds > now:
+            raise TokenValidationError("Token not yet valid")
+
+
+def oidc_validator_from_env(prefix: str = "ORCHESTRATOR_OIDC") -> OIDCValidator | None:
+    """Build a validator from ``{prefix}_ISSUER``/``_AUDIENCE``/``_JWKS_URL``/``_HS256_SECRET``.
+
+    Returns ``None`` unless both issuer and audience are set. Nothing is
+    fetched here: the JWKS is loaded by the first token that needs it, which
+    also starts the background refresh thread.
+    """
+    issuer = os.getenv(f"{prefix}_ISSUER")
+    audience = os.getenv(f"{prefix}_AUDIENCE")
+    if not issuer or not audience:
+        return None
+    jwks = None
+    jwks_url = os.getenv(f"{prefix}_JWKS_URL")
+    if jwks_url:
+        jwks = JWKSCache(
+            jwks_url,
+            ttl_seconds=float(os.getenv(f"{prefix}_JWKS_TTL_SECONDS", "300")),
+            background_refresh=True,
+        )
+    return OIDCValidator(
+        issuer=issuer,
+        audience=audience,
+        jwks=jwks,
+        hs256_keyring=Keyring.from_env(f"{prefix}_HS256_SECRET"),
+    )
@@ -0,0 +1,309 @@
+"""Shared replay-protection backends for multi-worker deployments.
+
+``auth.security.replay_cache`` lives inside a single process, so a replayed
+signature routed to a different uvicorn worker would be accepted. The stores
+here implement :class:`auth.security.ReplayStore` on top of state that every
+worker sees:
+
+- :class:`SharedMemoryReplayStore` -- an mmap-backed hash table in a file
+  (typically under ``/dev/shm``) shared by all worker processes on one host.
+- :class:`RedisReplayStore` -- an asyncio Redis-protocol client with a small
+  connection pool, for deployments spanning hosts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any
+from urllib.parse import urlparse
+
+from auth.security import ReplayCacheOverflow, ReplayStore, ReplayStoreUnavailable
+
+_MAGIC = b"RPLYSHM1"
+_HEADER = struct.Struct("<8sQQQ")  # magic, slots, stripes, max_probe
+_SLOT = struct.Struct("<16sd")  # blake2b-128 key digest, expiry (0.0 = never used)
+
+
+class SharedMemoryReplayStore:
+    """Fixed-size replay table in a memory-mapped file shared across processes.
+
+    The table is split into ``stripes``; a key's digest picks its stripe and
+    home slot, and it is stored within ``max_probe`` slots of home using linear
+    probing that wraps inside the stripe. Each stripe is guarded by a thread
+    lock plus an ``fcntl`` byte-range lock, so workers only contend when they
+    hit the same stripe. Expired slots are reused in place, and a stripe with
+    no free slot inside the probe window raises :class:`ReplayCacheOverflow`.
+
+    The first process to open ``path`` sizes the file; later openers adopt the
+    geometry recorded in its header.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        slots: int = 1 << 20,
+        stripes: int = 64,
+        max_probe: int = 32,
+    ) -> None:
+        if stripes < 1 or slots < stripes or slots % stripes:
+            raise ValueError("slots must be a positive multiple of stripes")
+        if not 1 <= max_probe <= slots // stripes:
+            raise ValueError("max_probe must be between 1 and slots per stripe")
+
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, _HEADER.size + slots * _SLOT.size)
+                    os.pwrite(self._fd, _HEADER.pack(_MAGIC, slots, stripes, max_probe), 0)
+                header = os.pread(self._fd, _HEADER.size, 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            magic, slots, stripes, max_probe = _HEADER.unpack(header)
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a replay store file")
+            self._mm = mmap.mmap(self._fd, _HEADER.size + slots * _SLOT.size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+        self._slots_per_stripe = slots // stripes
+        self._stripes = stripes
+        self._max_probe = max_probe
+        self._locks = tuple(threading.Lock() for _ in range(stripes))
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    def check_and_store(self, key: str, ttl_seconds: int, *, shard_key: str | None = None) -> bool:
+        del shard_key  # placement is by key digest; every stripe is already shared
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        point = int.from_bytes(digest[:8], "little")
+        stripe = point % self._stripes
+        home = (point // self._stripes) % self._slots_per_stripe
+        stripe_offset = _HEADER.size + stripe * self._slots_per_stripe * _SLOT.size
+        stripe_len = self._slots_per_stripe * _SLOT.size
+
+        mm = self._mm
+        with self._locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, stripe_len, stripe_offset)
+            try:
+                now = time.time()
+                free_offset = -1
+                for probe in range(self._max_probe):
+                    offset = stripe_offset + ((home + probe) % self._slots_per_stripe) * _SLOT.size
+                    slot_digest, expires_at = _SLOT.unpack_from(mm, offset)
+                    if expires_at == 0.0:
+                        if free_offset < 0:
+                            free_offset = offset
+                        break
+                    if expires_at <= now:
+                        if free_offset < 0:
+                            free_offset = offset
+                    elif slot_digest == digest:
+                        return False
+                if free_offset < 0:
+                    raise ReplayCacheOverflow("Replay store stripe full")
+                _SLOT.pack_into(mm, free_offset, digest, now + ttl_seconds)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, stripe_len, stripe_offset)
+        return True
+
+
+class RedisProtocolError(Exception):
+    """Raised for malformed or error replies from the Redis server."""
+
+
+def _encode_command(*args: Any) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        raw = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(raw), raw))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by Redis server")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise RedisProtocolError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(payload)
+        if length < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(length)]
+    raise RedisProtocolError(f"Unknown reply type: {line!r}")
+
+
+class _RedisConnection:
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def pipeline(self, *commands: tuple[Any, ...]) -> list[Any]:
+        self.writer.write(b"".join(_encode_command(*command) for command in commands))
+        await self.writer.drain()
+        replies = []
+        error: RedisProtocolError | None = None
+        for _ in commands:
+            try:
+                replies.append(await _read_reply(self.reader))
+            except RedisProtocolError as exc:
+                # Keep draining so the connection stays in sync for reuse.
+                error = error or exc
+                replies.append(None)
+        if error is not None:
+            raise error
+        return replies
+
+    def close(self) -> None:
+        try:
+            self.writer.close()
+        except RuntimeError:
+            # Pooled on an event loop that has since been closed; nothing left to schedule on.
+            pass
+
+
+class RedisReplayStore:
+    """Async replay store speaking the Redis protocol over pooled connections.
+
+    Each check issues ``SET key 1 NX EX ttl`` so the set-if-absent and expiry
+    are applied atomically in one round trip. Up to ``pool_size`` connections
+    are opened lazily and reused; a pool belongs to the event loop it was
+    created on and is rebuilt if used from another loop. Connection failures
+    surface as :class:`ReplayStoreUnavailable` so callers fail closed, as do
+    error replies (auth failures, OOM, read-only replicas).
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://127.0.0.1:6379/0",
+        *,
+        pool_size: int = 8,
+        key_prefix: str = "rbac:replay:",
+        timeout_seconds: float = 1.0,
+    ) -> None:
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError("Only redis:// URLs are supported")
+        if pool_size < 1:
+            raise ValueError("pool_size must be >= 1")
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.pool_size = pool_size
+        self.key_prefix = key_prefix
+        self.timeout_seconds = timeout_seconds
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._idle: list[_RedisConnection] = []
+        self._slots: asyncio.Semaphore | None = None
+
+    def _bind_loop(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._slots is None:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.pool_size)
+        return self._slots
+
+    async def _connect(self) -> _RedisConnection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        conn = _RedisConnection(reader, writer)
+        setup: list[tuple[Any, ...]] = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            try:
+                await conn.pipeline(*setup)
+            except BaseException:
+                conn.close()
+                raise
+        return conn
+
+    async def execute(self, *commands: tuple[Any, ...]) -> list[Any]:
+        """Send ``commands`` as one pipeline on a pooled connection."""
+        slots = self._bind_loop()
+        async with slots:
+            conn = self._idle.pop() if self._idle else None
+            try:
+                async with asyncio.timeout(self.timeout_seconds):
+                    if conn is None:
+                        conn = await self._connect()
+                    replies = await conn.pipeline(*commands)
+            except RedisProtocolError as exc:
+                # Error replies are drained, so the connection is still in sync.
+                if conn is not None:
+                    self._idle.append(conn)
+                raise ReplayStoreUnavailable(f"Redis replay store error: {exc}") from exc
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, TimeoutError) as exc:
+                if conn is not None:
+                    conn.close()
+                raise ReplayStoreUnavailable(f"Redis replay store unreachable: {exc}") from exc
+            except BaseException:
+                # Cancelled mid-pipeline: unread replies would desync the next caller.
+                if conn is not None:
+                    conn.close()
+                raise
+            self._idle.append(conn)
+            return replies
+
+    async def check_and_store(self, key: str, ttl_seconds: int, *, shard_key: str | None = None) -> bool:
+        del shard_key
+        (reply,) = await self.execute(("SET", self.key_prefix + key, 1, "NX", "EX", int(ttl_seconds)))
+        return reply == "OK"
+
+    async def aclose(self) -> None:
+        for conn in self._idle:
+            conn.close()
+        self._idle = []
+
+
+def replay_store_from_env(prefix: str = "RBAC_REPLAY") -> ReplayStore | None:
+    """Build a replay store from ``{prefix}_BACKEND`` (``memory``, ``shm`` or ``redis``).
+
+    Returns ``None`` for the default in-process backend.
+    """
+    backend = os.getenv(f"{prefix}_BACKEND", "memory").strip().lower()
+    if backend == "memory":
+        return None
+    if backend == "shm":
+        return SharedMemoryReplayStore(
+            os.getenv(f"{prefix}_PATH", "/dev/shm/rbac-replay"),
+            slots=int(os.getenv(f"{prefix}_SLOTS", str(1 << 20))),
+        )
+    if backend == "redis":
+        return RedisReplayStore(
+            os.getenv(f"{prefix}_REDIS_URL", "redis://127.0.0.1:6379/0"),
+            pool_size=int(os.getenv(f"{prefix}_POOL_SIZE", "8")),
+        )
+    raise ValueError(f"Unknown replay backend: {backend}")
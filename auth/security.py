@@ -1,36 +1,181 @@
 import hashlib
-import hmac
-import os
+import heapq
+import inspect
+import math
 import time
 from dataclasses import dataclass, field
 from threading import Lock
-from typing import Iterable
+from typing import Awaitable, Iterable, Literal, Protocol
 
+from auth.keyring import Keyring, KeyringEmpty
+from auth.oidc import TokenValidationError, oidc_validator_from_env
 from fastapi import HTTPException, Request
 
 
-class ReplayCache:
-    """In-memory replay cache with TTL cleanup."""
+class ReplayCacheOverflow(Exception):
+    """Raised when the replay cache is at capacity and configured to reject."""
+
+
+class ReplayStoreUnavailable(Exception):
+    """Raised when a shared replay backend cannot be reached."""
+
+
+class ReplayStore(Protocol):
+    """Backend that records signature replay keys.
+
+    ``check_and_store`` returns ``True`` when ``key`` was not seen within its
+    TTL (and records it), ``False`` on replay. Implementations may be sync or
+    return an awaitable.
+    """
+
+    def check_and_store(
+        self, key: str, ttl_seconds: int, *, shard_key: str | None = None
+    ) -> bool | Awaitable[bool]: ...
+
+
+class _ReplayShard:
+    __slots__ = ("lock", "seen", "buckets", "bucket_heap")
 
     def __init__(self) -> None:
-        self._seen: dict[str, float] = {}
-        self._lock = Lock()
+        self.lock = Lock()
+        self.seen: dict[str, float] = {}
+        self.buckets: dict[int, list[str]] = {}
+        self.bucket_heap: list[int] = []
 
-    def check_and_store(self, key: str, ttl_seconds: int) -> bool:
-        now = time.time()
-        with self._lock:
-            self._seen = {k: exp for k, exp in self._seen.items() if exp > now}
-            if key in self._seen:
+
+class ReplayCache:
+    """In-memory replay cache with time-bucketed expiry and sharded locks.
+
+    Keys are grouped into expiry buckets of ``bucket_seconds`` width and a
+    min-heap of bucket ids drives cleanup, so each key is inserted and expired
+    exactly once (amortized O(1)) instead of rescanning every live key on every
+    call. Keys are spread over ``shards`` independently locked partitions by
+    hash, so one busy caller cannot fill a partition on its own; ``shard_key``
+    is accepted for :class:`ReplayStore` compatibility but does not affect
+    placement.
+
+    ``max_entries`` caps the live keys of the whole cache, counted across
+    shards. When it is reached, ``overflow="reject"`` raises
+    :class:`ReplayCacheOverflow` (fail closed) and ``overflow="evict"`` drops
+    the bucket closest to expiry in the key's shard to make room (if that shard
+    is empty the key is stored anyway, so the cap can be exceeded by at most
+    one key per concurrently inserting shard).
+    """
+
+    def __init__(
+        self,
+        *,
+        shards: int = 16,
+        max_entries: int = 1_000_000,
+        bucket_seconds: float = 1.0,
+        overflow: Literal["reject", "evict"] = "reject",
+    ) -> None:
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
+        if max_entries < shards:
+            raise ValueError("max_entries must be >= shards")
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be > 0")
+        if overflow not in ("reject", "evict"):
+            raise ValueError("overflow must be 'reject' or 'evict'")
+        self._shards = tuple(_ReplayShard() for _ in range(shards))
+        self._max_entries = max_entries
+        # Live keys across all shards; only touched on insert and expiry.
+        self._size = 0
+        self._size_lock = Lock()
+        self._bucket_seconds = bucket_seconds
+        self._overflow = overflow
+
+    def __len__(self) -> int:
+        return sum(len(shard.seen) for shard in self._shards)
+
+    def _shard_for(self, key: str) -> _ReplayShard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _reserve(self) -> bool:
+        with self._size_lock:
+            if self._size >= self._max_entries:
                 return False
-            self._seen[key] = now + ttl_seconds
-        return True
+            self._size += 1
+            return True
+
+    def _expire(self, shard: _ReplayShard, now: float, *, force: bool = False) -> None:
+        before = len(shard.seen)
+        self._expire_buckets(shard, now, force=force)
+        removed = before - len(shard.seen)
+        if removed:
+            with self._size_lock:
+                self._size -= removed
+
+    def _expire_buckets(self, shard: _ReplayShard, now: float, *, force: bool) -> None:
+        heap = shard.bucket_heap
+        seen = shard.seen
+        while heap and (force or heap[0] * self._bucket_seconds <= now):
+            bucket_id = heapq.heappop(heap)
+            bucket_end = bucket_id * self._bucket_seconds
+            for key in shard.buckets.pop(bucket_id):
+                # Keys re-stored after expiring live in a later bucket; leave those alone.
+                exp = seen.get(key)
+                if exp is not None and exp <= bucket_end:
+                    del seen[key]
+            if force:
+                return
+
+    def _sweep(self, now: float) -> None:
+        """Drop expired keys from every shard, so stale keys stop counting against the cap."""
+        for shard in self._shards:
+            with shard.lock:
+                self._expire(shard, now)
+
+    def _store(self, shard: _ReplayShard, key: str, expires_at: float) -> None:
+        shard.seen[key] = expires_at
+        bucket_id = math.ceil(expires_at / self._bucket_seconds)
+        bucket = shard.buckets.get(bucket_id)
+        if bucket is None:
+            shard.buckets[bucket_id] = bucket = []
+            heapq.heappush(shard.bucket_heap, bucket_id)
+        bucket.append(key)
+
+    def check_and_store(self, key: str, ttl_seconds: int, *, shard_key: str | None = None) -> bool:
+        now = time.time()
+        expires_at = now + ttl_seconds
+        shard = self._shard_for(key)
+        swept = False
+        while True:
+            with shard.lock:
+                self._expire(shard, now)
+                exp = shard.seen.get(key)
+                if exp is not None and exp > now:
+                    return False
+                # An expired key still in ``seen`` is already counted.
+                if exp is not None or self._reserve():
+                    self._store(shard, key, expires_at)
+                    return True
+                if swept:
+                    if self._overflow == "reject":
+                        raise ReplayCacheOverflow("Replay cache capacity exceeded")
+                    while shard.bucket_heap:
+                        self._expire(shard, now, force=True)
+                        if self._reserve():
+                            break
+                    else:
+                        with self._size_lock:
+                            self._size += 1
+                    self._store(shard, key, expires_at)
+                    return True
+            # Full: other shards may hold expired keys nobody has touched yet.
+            self._sweep(now)
+            swept = True
 
 
 replay_cache = ReplayCache()
 
 
+bearer_keyring = Keyring.from_env("ORCHESTRATOR_BEARER_TOKEN", default="change-me")
+oidc_validator = oidc_validator_from_env()
+
+
 def require_bearer(request: Request) -> str:
-    expected = os.getenv("ORCHESTRATOR_BEARER_TOKEN", "change-me")
     authz = request.headers.get("authorization")
     if not authz:
         raise HTTPException(status_code=401, detail="Missing bearer token")
@@ -40,20 +185,75 @@ def require_bearer(request: Request) -> str:
         raise HTTPException(status_code=401, detail="Invalid auth scheme")
 
     token = parts[1]
-    if not hmac.compare_digest(token, expected):
+    if oidc_validator is not None and token.count(".") == 2:
+        try:
+            oidc_validator.validate(token)
+        except TokenValidationError as exc:
+            raise HTTPException(status_code=403, detail="Invalid bearer token") from exc
+        return token
+
+    try:
+        key_id = bearer_keyring.match_secret(token)
+    except KeyringEmpty as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    if key_id is None:
         raise HTTPException(status_code=403, detail="Invalid bearer token")
     return token
 
 
 @dataclass(slots=True)
 class ServiceSignatureVerifier:
+    """FastAPI dependency enforcing HMAC request signatures with replay protection.
+
+    Header, timestamp, secret and ``content-length`` checks all run before any
+    body bytes are read. With ``stream_body`` the body is hashed chunk by chunk
+    from ``request.stream()`` and rejected as soon as it exceeds
+    ``max_body_bytes``; the bytes are then cached on the request (so
+    ``await request.body()`` in the handler does not re-read) and the hex
+    digest is exposed as ``request.state.body_sha256``.
+
+    Secrets come from ``keyring``, by default :meth:`Keyring.from_env` on
+    ``secret_env``, so rotation is picked up without a restart.
+    """
+
     secret_env: str = "RBAC_SECRET"
     allowed_clock_skew_seconds: int = 300
     replay_ttl_seconds: int = 300
+    replay_store: ReplayStore | None = None
+    max_body_bytes: int | None = None
+    stream_body: bool = True
+    keyring: Keyring | None = None
     required_headers: Iterable[str] = field(
         default_factory=lambda: ("x-service-id", "x-timestamp", "x-signature")
     )
 
+    def __post_init__(self) -> None:
+        if self.keyring is None:
+            self.keyring = Keyring.from_env(self.secret_env)
+
+    async def _hash_body(self, request: Request) -> str:
+        limit = self.max_body_bytes
+        if not self.stream_body or not hasattr(request, "stream"):
+            body = await request.body()
+            if limit is not None and len(body) > limit:
+                raise HTTPException(status_code=413, detail="Request body too large")
+            return hashlib.sha256(body).hexdigest()
+
+        hasher = hashlib.sha256()
+        chunks: list[bytes] = []
+        received = 0
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            received += len(chunk)
+            if limit is not None and received > limit:
+                raise HTTPException(status_code=413, detail="Request body too large")
+            hasher.update(chunk)
+            chunks.append(chunk)
+        # Starlette's Request.body() returns ``_body`` when set, so handlers reuse these bytes.
+        request._body = b"".join(chunks)
+        return hasher.hexdigest()
+
     async def __call__(self, request: Request) -> str:
         missing = [h for h in self.required_headers if not request.headers.get(h)]
         if missing:
@@ -69,24 +269,47 @@ class ServiceSignatureVerifier:
         if abs(now - timestamp) > self.allowed_clock_skew_seconds:
             raise HTTPException(status_code=403, detail="Timestamp outside allowed window")
 
-        body = await request.body()
-        body_hash = hashlib.sha256(body).hexdigest()
-        signing_string = f"{request.method}\n{request.url.path}\n{timestamp_raw}\n{body_hash}"
+        try:
+            self.keyring.key_ids()
+        except KeyringEmpty as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+        content_length = request.headers.get("content-length")
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail="Invalid content-length") from exc
+            if self.max_body_bytes is not None and declared > self.max_body_bytes:
+                raise HTTPException(status_code=413, detail="Request body too large")
 
-        secret = os.getenv(self.secret_env)
-        if not secret:
-            raise HTTPException(status_code=500, detail=f"Missing server secret: {self.secret_env}")
+        body_hash = await self._hash_body(request)
+        request.state.body_sha256 = body_hash
+        signing_string = f"{request.method}\n{request.url.path}\n{timestamp_raw}\n{body_hash}"
 
-        expected_sig = hmac.new(secret.encode(), signing_string.encode(), hashlib.sha256).hexdigest()
         provided_sig = request.headers["x-signature"]
-        if not hmac.compare_digest(provided_sig, expected_sig):
+        try:
+            key_id = self.keyring.verify(signing_string.encode(), provided_sig)
+        except KeyringEmpty as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+        if key_id is None:
             raise HTTPException(status_code=403, detail="Invalid signature")
 
-        replay_key = f"{request.headers['x-service-id']}:{timestamp_raw}:{provided_sig}"
-        if not replay_cache.check_and_store(replay_key, self.replay_ttl_seconds):
+        service_id = request.headers["x-service-id"]
+        replay_key = f"{service_id}:{timestamp_raw}:{provided_sig}"
+        store = self.replay_store if self.replay_store is not None else replay_cache
+        try:
+            fresh = store.check_and_store(replay_key, self.replay_ttl_seconds, shard_key=service_id)
+            if inspect.isawaitable(fresh):
+                fresh = await fresh
+        except ReplayCacheOverflow as exc:
+            raise HTTPException(status_code=503, detail="Replay cache full") from exc
+        except ReplayStoreUnavailable as exc:
+            raise HTTPException(status_code=503, detail="Replay store unavailable") from exc
+        if not fresh:
             raise HTTPException(status_code=403, detail="Replay detected")
 
-        return request.headers["x-service-id"]
+        return service_id
 
 
 require_service_signature = ServiceSignatureVerifier()
@@ -2,14 +2,18 @@ import asyncio
 import inspect
 import json
 import re
+import threading
 from dataclasses import dataclass
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable
+
+from fastapi.responses import PlainTextResponse
 
 
 class HTTPException(Exception):
-    def __init__(self, status_code: int, detail: str):
+    def __init__(self, status_code: int, detail: str, headers: dict[str, str] | None = None):
         self.status_code = status_code
         self.detail = detail
+        self.headers = headers
         super().__init__(detail)
 
 
@@ -23,45 +27,207 @@ class URL:
         self.path = path
 
 
+class State:
+    """Per-request attribute bag, mirroring ``starlette.datastructures.State``."""
+
+
 class Request:
-    def __init__(self, method: str, path: str, headers: dict[str, str] | None = None, body: bytes = b""):
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str] | None = None,
+        body: bytes | None = b"",
+        receive: Callable[[], Awaitable[dict[str, Any]]] | None = None,
+    ):
         self.method = method.upper()
         self.url = URL(path)
         self.headers = {k.lower(): v for k, v in (headers or {}).items()}
-        self._body = body
+        self.state = State()
+        # ``None`` means "not read yet": the body is pulled from the ASGI ``receive`` channel.
+        self._body = body if receive is None else None
+        self._receive = receive
+
+    async def stream(self):
+        if self._body is not None:
+            view = memoryview(self._body)
+            for start in range(0, len(view), self.chunk_size):
+                yield bytes(view[start : start + self.chunk_size])
+        elif self._receive is not None:
+            receive, self._receive = self._receive, None
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    raise HTTPException(status_code=400, detail="Client disconnected")
+                yield message.get("body", b"")
+                if not message.get("more_body", False):
+                    break
+        yield b""
 
     async def body(self) -> bytes:
+        if self._body is None:
+            self._body = b"".join([chunk async for chunk in self.stream()])
         return self._body
 
 
 class Response:
-    def __init__(self, status_code: int, data: Any):
+    def __init__(
+        self,
+        status_code: int,
+        data: Any,
+        media_type: str = "application/json",
+        headers: dict[str, str] | None = None,
+    ):
         self.status_code = status_code
+        self.media_type = media_type
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
         self._data = data
 
     def json(self) -> Any:
         return self._data
 
+    @property
+    def text(self) -> str:
+        return self._data if isinstance(self._data, str) else json.dumps(self._data)
+
+
+_MISSING = object()
+_PARAM = re.compile(r"\{([^}]+)\}")
+
+# Injection kinds resolved once per callable at registration time.
+_INJECT_PATH = 0
+_INJECT_REQUEST = 1
+_INJECT_BODY = 2
+
+
+def _injection_plan(func: Callable[..., Any], path_params: frozenset[str]) -> tuple[tuple[str, int], ...]:
+    plan = []
+    for name, param in inspect.signature(func).parameters.items():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        annotation = param.annotation
+        if name in path_params:
+            plan.append((name, _INJECT_PATH))
+        elif annotation is Request or annotation == "Request" or name == "request":
+            plan.append((name, _INJECT_REQUEST))
+        elif param.default is param.empty:
+            plan.append((name, _INJECT_BODY))
+    return tuple(plan)
+
+
+def _is_async(func: Callable[..., Any]) -> bool:
+    """True for coroutine functions and objects with an ``async def __call__``."""
+    return inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
+
+@dataclass
+class _Route:
+    index: int
+    method: str
+    path: str
+    regex: re.Pattern[str] | None
+    func: Callable[..., Any]
+    dependencies: list[Depends]
+    plan: tuple[tuple[str, int], ...]
+    is_async: bool
+    dependency_plans: tuple[tuple[Callable[..., Any], tuple[tuple[str, int], ...], bool], ...]
+
+    def __getitem__(self, key: str) -> Any:  # keeps ``app.routes[i]["path"]`` style access working
+        return getattr(self, key)
+
+
+class _RouteNode:
+    __slots__ = ("children", "static", "dynamic")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _RouteNode] = {}
+        self.static: _Route | None = None
+        self.dynamic: list[_Route] = []
+
+
+class APIRouter:
+    def __init__(self, prefix: str = "", tags: list[str] | None = None, dependencies: list[Depends] | None = None):
+        self.prefix = prefix
+        self.tags = tags or []
+        self.dependencies = dependencies or []
+        self.routes: list[tuple[str, str, Callable[..., Any], list[Depends]]] = []
+
+    def _route(self, method: str, path: str, dependencies: list[Depends] | None):
+        def decorator(func: Callable[..., Any]):
+            self.routes.append((method, self.prefix + path, func, [*self.dependencies, *(dependencies or [])]))
+            return func
+
+        return decorator
+
+    def get(self, path: str, dependencies: list[Depends] | None = None, **_kwargs: Any):
+        return self._route("GET", path, dependencies)
+
+    def post(self, path: str, dependencies: list[Depends] | None = None, **_kwargs: Any):
+        return self._route("POST", path, dependencies)
+
 
 class FastAPI:
+    """Minimal FastAPI stand-in with a precompiled route table.
+
+    Routes are indexed at registration in a per-method trie of static path
+    segments. Fully static routes resolve by walking the trie; routes with
+    ``{param}`` segments hang off the node for their static prefix and only
+    those candidates are regex-matched. Each handler and dependency gets a
+    precomputed injection plan so dispatch does no signature reflection. When
+    several routes match, the first registered wins, as in FastAPI.
+
+    Dispatch is async (:meth:`handle_async` / :meth:`dispatch`, or the app
+    itself as an ASGI callable); :meth:`handle` is a sync wrapper that submits
+    to one long-lived event loop thread per app.
+    """
+
     def __init__(self, title: str = ""):
         self.title = title
-        self.routes: list[dict[str, Any]] = []
+        self.routes: list[_Route] = []
+        self._tries: dict[str, _RouteNode] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_lock = threading.Lock()
 
     def add_middleware(self, *_args: Any, **_kwargs: Any) -> None:
         return None
 
     def _add_route(self, method: str, path: str, func: Callable[..., Any], dependencies: list[Depends] | None = None):
-        pattern = re.sub(r"\{([^}]+)\}", r"(?P<\1>[^/]+)", path)
-        self.routes.append(
-            {
-                "method": method.upper(),
-                "path": path,
-                "regex": re.compile(f"^{pattern}$"),
-                "func": func,
-                "dependencies": dependencies or [],
-            }
+        dependencies = dependencies or []
+        params = frozenset(_PARAM.findall(path))
+        regex = None
+        if params:
+            pattern = _PARAM.sub(r"(?P<\1>[^/]+)", path)
+            regex = re.compile(f"^{pattern}$")
+        route = _Route(
+            index=len(self.routes),
+            method=method.upper(),
+            path=path,
+            regex=regex,
+            func=func,
+            dependencies=dependencies,
+            plan=_injection_plan(func, params),
+            is_async=_is_async(func),
+            dependency_plans=tuple(
+                (dep.dependency, _injection_plan(dep.dependency, frozenset()), _is_async(dep.dependency))
+                for dep in dependencies
+            ),
         )
+        self.routes.append(route)
+
+        node = self._tries.setdefault(route.method, _RouteNode())
+        for segment in path.split("/"):
+            if "{" in segment:
+                node.dynamic.append(route)
+                return
+            node = node.children.setdefault(segment, _RouteNode())
+        if node.static is None:
+            node.static = route
+
+    def include_router(self, router: APIRouter, prefix: str = "") -> None:
+        for method, path, func, dependencies in router.routes:
+            self._add_route(method, prefix + path, func, dependencies)
 
     def get(self, path: str, dependencies: list[Depends] | None = None):
         def decorator(func: Callable[..., Any]):
@@ -77,34 +243,162 @@ class FastAPI:
 
         return decorator
 
-    def handle(self, method: str, path: str, headers: dict[str, str] | None = None, json_body: Any = None) -> Response:
-        body = b"" if json_body is None else json.dumps(json_body).encode()
-        request = Request(method, path, headers, body)
-        for route in self.routes:
-            if route["method"] != method.upper():
-                continue
-            match = route["regex"].match(path)
-            if not match:
-                continue
-            try:
-                for dep in route["dependencies"]:
-                    self._call(dep.dependency, request)
-                result = self._call(route["func"], request, **match.groupdict())
-                return Response(200, result)
-            except HTTPException as exc:
-                return Response(exc.status_code, {"detail": exc.detail})
-        return Response(404, {"detail": "Not found"})
+    def _resolve(self, method: str, path: str) -> tuple[_Route, dict[str, str]] | None:
+        node = self._tries.get(method)
+        if node is None:
+            return None
+        best: _Route | None = None
+        best_params: dict[str, str] = {}
+        for segment in path.split("/"):
+            for route in node.dynamic:
+                if best is not None and route.index > best.index:
+                    break
+                match = route.regex.match(path)
+                if match:
+                    best, best_params = route, match.groupdict()
+                    break
+            node = node.children.get(segment)
+            if node is None:
+                break
+        else:
+            if node.static is not None and (best is None or node.static.index < best.index):
+                best, best_params = node.static, {}
+            for route in node.dynamic:
+                if best is not None and route.index > best.index:
+                    break
+                match = route.regex.match(path)
+                if match:
+                    best, best_params = route, match.groupdict()
+                    break
+        return (best, best_params) if best is not None else None
+
+    async def handle_async(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str] | None = None,
+        json_body: Any = None,
+        content: bytes | None = None,
+    ) -> Response:
+        body = content if content is not None else b"" if json_body is None else json.dumps(json_body).encode()
+        return await self.dispatch(Request(method, path, headers, body))
+
+    async def dispatch(self, request: Request) -> Response:
+        """Resolve and run ``request`` on the caller's event loop."""
+        resolved = self._resolve(request.method, request.url.path)
+        if resolved is None:
+            return Response(404, {"detail": "Not found"})
+        route, path_params = resolved
+        try:
+            for dependency, plan, is_async in route.dependency_plans:
+                await self._call(dependency, plan, is_async, request, path_params)
+            result = await self._call(route.func, route.plan, route.is_async, request, path_params)
+            if isinstance(result, PlainTextResponse):
+                return Response(result.status_code, result.body, media_type=result.media_type)
+            return Response(200, result)
+        except HTTPException as exc:
+            return Response(exc.status_code, {"detail": exc.detail}, headers=exc.headers)
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str] | None = None,
+        json_body: Any = None,
+        content: bytes | None = None,
+    ) -> Response:
+        """Synchronous entry point that runs :meth:`handle_async` on the app's long-lived loop.
+
+        Raises :class:`RuntimeError` when called from that loop's own thread (e.g.
+        from inside an async handler), where blocking on it would deadlock.
+        """
+        loop = self._background_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("FastAPI.handle() cannot be called from the app's loop thread; await handle_async()")
+        return asyncio.run_coroutine_threadsafe(
+            self.handle_async(method, path, headers, json_body, content), loop
+        ).result()
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is not None:
+            return loop
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name=f"{self.title or 'app'}-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    async def __call__(self, scope: dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        """ASGI entry point so the shim app can be served by uvicorn."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        request = Request(scope["method"], scope["path"], headers, receive=receive)
+        response = await self.dispatch(request)
+        payload = response.text.encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (b"content-type", response.media_type.encode()),
+                    (b"content-length", str(len(payload)).encode()),
+                    *((k.encode("latin-1"), v.encode("latin-1")) for k, v in response.headers.items()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
 
     @staticmethod
-    def _call(func: Callable[..., Any], request: Request, **path_params: Any) -> Any:
-        sig = inspect.signature(func)
+    async def _call(
+        func: Callable[..., Any],
+        plan: tuple[tuple[str, int], ...],
+        is_async: bool,
+        request: Request,
+        path_params: dict[str, str],
+    ) -> Any:
         kwargs = {}
-        for name, param in sig.parameters.items():
-            if name in path_params:
+        for name, kind in plan:
+            if kind == _INJECT_PATH:
                 kwargs[name] = path_params[name]
-            elif param.annotation is Request or name == "request":
+            elif kind == _INJECT_REQUEST:
                 kwargs[name] = request
-        result = func(**kwargs)
+            else:
+                kwargs[name] = await _json_body(request, name)
+        if is_async:
+            return await func(**kwargs)
+        # Like FastAPI, plain ``def`` handlers and dependencies run in the loop's default
+        # (bounded) thread pool so blocking work does not stall other requests.
+        result = await asyncio.to_thread(func, **kwargs)
         if inspect.isawaitable(result):
-            return asyncio.run(result)
+            return await result
         return result
+
+
+async def _json_body(request: Request, name: str) -> Any:
+    decoded = getattr(request.state, "json_body", _MISSING)
+    if decoded is _MISSING:
+        raw = await request.body()
+        if not raw:
+            raise HTTPException(status_code=422, detail=f"Missing request body: {name}")
+        try:
+            decoded = json.loads(raw)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail="Invalid JSON body") from exc
+        request.state.json_body = decoded
+    return decoded
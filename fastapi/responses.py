@@ -0,0 +1,8 @@
+class PlainTextResponse:
+    media_type = "text/plain; charset=utf-8"
+
+    def __init__(self, content: str, status_code: int = 200, media_type: str | None = None):
+        self.body = content
+        self.status_code = status_code
+        if media_type is not None:
+            self.media_type = media_type
@@ -6,11 +6,18 @@ class TestClient:
     def __init__(self, app):
         self.app = app
 
-    def request(self, method: str, path: str, headers: dict[str, str] | None = None, json: Any = None):
-        return self.app.handle(method, path, headers=headers, json_body=json)
+    def request(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str] | None = None,
+        json: Any = None,
+        content: bytes | None = None,
+    ):
+        return self.app.handle(method, path, headers=headers, json_body=json, content=content)
 
     def get(self, path: str, headers: dict[str, str] | None = None):
         return self.request("GET", path, headers=headers)
 
-    def post(self, path: str, headers: dict[str, str] | None = None, json: Any = None):
-        return self.request("POST", path, headers=headers, json=json)
+    def post(self, path: str, headers: dict[str, str] | None = None, json: Any = None, content: bytes | None = None):
+        return self.request("POST", path, headers=headers, json=json, content=content)
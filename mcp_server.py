@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Any
 
-from app.mcp_tooling import register_tools
+from app.mcp_tooling import list_tools, register_tools
 
 
 class MCPServer:
@@ -12,6 +12,9 @@ class MCPServer:
         self.mcp = mcp
         self.registry = register_tools(self.mcp)
 
+    def list_tools(self) -> list[dict[str, Any]]:
+        return list_tools()
+
 
 def create_server(mcp: Any) -> MCPServer:
     return MCPServer(mcp)
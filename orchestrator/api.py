@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from typing import Any
 
+from orchestrator.exposition import router as metrics_router
 from orchestrator.webhook import router as webhook_router
 
 try:  # pragma: no cover - exercised where fastapi is installed
@@ -19,3 +20,4 @@ except Exception:  # pragma: no cover - fallback for minimal environments
 
 app = FastAPI(title="orchestrator")
 app.include_router(webhook_router)
+app.include_router(metrics_router)
@@ -0,0 +1,140 @@
+"""Event-type routing for dequeued webhook events.
+
+Handlers are registered per event type with :meth:`EventRouter.on` (or
+:meth:`EventRouter.register`) when their module is imported; dispatch is then
+one dict lookup on the payload's ``type``. Coroutine handlers run on the event
+loop; plain functions run in a bounded thread pool so blocking work cannot
+stall the loop. A route may set ``max_concurrency`` so one noisy event type
+cannot occupy every worker slot. Each dispatch feeds
+:func:`orchestrator.metrics.record_webhook_processed` with the handler's
+run time, excluding time spent waiting for a slot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import inspect
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+from orchestrator.metrics import counter, record_webhook_processed
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[dict[str, Any]], Any]
+
+_UNROUTED = counter("webhook.unrouted")
+
+
+@dataclass(frozen=True, slots=True)
+class _EventRoute:
+    event_type: str
+    handler: EventHandler
+    is_async: bool
+    max_concurrency: int | None
+
+
+class EventRouter:
+    """Map webhook event types to sync or async handlers."""
+
+    def __init__(self, *, max_workers: int = 8) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self.max_workers = max_workers
+        self._routes: dict[str, _EventRoute] = {}
+        self._default: _EventRoute | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        # Semaphores belong to one event loop; rebuilt if dispatch moves to another.
+        self._gates: dict[str, asyncio.Semaphore] = {}
+        self._gates_loop: asyncio.AbstractEventLoop | None = None
+
+    def register(
+        self,
+        event_type: str | None,
+        handler: EventHandler,
+        *,
+        max_concurrency: int | None = None,
+    ) -> EventHandler:
+        """Route ``event_type`` to ``handler``; ``None`` sets the fallback for unknown types."""
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        route = _EventRoute(event_type or "", handler, inspect.iscoroutinefunction(handler), max_concurrency)
+        if event_type is None:
+            self._default = route
+        elif event_type in self._routes:
+            raise ValueError(f"Handler already registered for event type {event_type!r}")
+        else:
+            self._routes[event_type] = route
+        self._gates = {}
+        return handler
+
+    def on(self, event_type: str | None, *, max_concurrency: int | None = None) -> Callable[[EventHandler], EventHandler]:
+        def decorator(handler: EventHandler) -> EventHandler:
+            return self.register(event_type, handler, max_concurrency=max_concurrency)
+
+        return decorator
+
+    def event_types(self) -> list[str]:
+        return sorted(self._routes)
+
+    def _route(self, payload: Any) -> _EventRoute | None:
+        event_type = payload.get("type") if isinstance(payload, dict) else None
+        route = self._routes.get(event_type) if isinstance(event_type, str) else None
+        return route or self._default
+
+    def _gate(self, route: _EventRoute) -> Any:
+        if route.max_concurrency is None:
+            return contextlib.nullcontext()
+        loop = asyncio.get_running_loop()
+        if loop is not self._gates_loop:
+            self._gates, self._gates_loop = {}, loop
+        gate = self._gates.get(route.event_type)
+        if gate is None:
+            gate = self._gates.setdefault(route.event_type, asyncio.Semaphore(route.max_concurrency))
+        return gate
+
+    async def _run(self, route: _EventRoute, payload: dict[str, Any]) -> None:
+        if route.is_async:
+            await route.handler(payload)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="webhook-handler")
+        await asyncio.get_running_loop().run_in_executor(self._executor, route.handler, payload)
+
+    async def dispatch(self, payload: dict[str, Any], *, slots: asyncio.Semaphore | None = None) -> None:
+        """Run the handler for ``payload``; handler exceptions propagate.
+
+        ``slots`` is a caller-wide concurrency limit, taken only after the
+        event type's own limit so events waiting on a saturated type do not
+        hold one.
+        """
+        route = self._route(payload)
+        if route is None:
+            _UNROUTED.inc()
+            logger.debug("No handler for webhook event type %r", payload.get("type") if isinstance(payload, dict) else None)
+            return
+        event_type = payload.get("type") if isinstance(payload, dict) else None
+        async with self._gate(route), (slots if slots is not None else contextlib.nullcontext()):
+            start = perf_counter()
+            try:
+                await self._run(route, payload)
+            except BaseException:
+                record_webhook_processed(event_type, success=False, duration_seconds=perf_counter() - start)
+                raise
+            record_webhook_processed(event_type, success=True, duration_seconds=perf_counter() - start)
+
+    def __call__(self, payload: dict[str, Any]) -> Awaitable[None]:
+        return self.dispatch(payload)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+event_router = EventRouter(max_workers=int(os.getenv("ORCHESTRATOR_EVENT_HANDLER_THREADS", "8")))
@@ -0,0 +1,295 @@
+"""OpenMetrics exposition for :mod:`orchestrator.metrics`.
+
+:class:`MetricsExporter` renders :func:`orchestrator.metrics.snapshot` as
+OpenMetrics text and caches the result for ``cache_seconds`` so bursts of
+scrapes do not re-render. When several uvicorn workers share a
+``ORCHESTRATOR_METRICS_DIR``, each worker periodically writes its snapshot to
+``metrics-<pid>.json`` there and any worker's ``/metrics`` merges all files, so
+a scrape reports totals for the whole deployment (other workers' data is at
+most ``flush_interval_seconds`` old). When a worker exits, its counters and
+histograms are folded into ``metrics-archive.json`` and its file removed (on
+shutdown, or by the next scrape if it died), so deployment totals never go
+backwards across restarts. Liveness is checked by PID, so the directory must be
+local to the host running the workers.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import fcntl
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any
+
+from orchestrator import metrics
+from orchestrator.metrics import MetricsSnapshot
+
+try:  # pragma: no cover - exercised where fastapi is installed
+    from fastapi import APIRouter
+    from fastapi.responses import PlainTextResponse
+except Exception:  # pragma: no cover - fallback for minimal environments
+    class APIRouter:  # type: ignore[override]
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            self.routes: list[Any] = []
+
+        def get(self, *args: Any, **kwargs: Any):
+            def decorator(func: Any) -> Any:
+                self.routes.append(func)
+                return func
+
+            return decorator
+
+    class PlainTextResponse:  # type: ignore[override]
+        def __init__(self, content: str, status_code: int = 200, media_type: str | None = None) -> None:
+            self.body = content
+            self.status_code = status_code
+            self.media_type = media_type
+
+logger = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+ARCHIVE_FILE = "metrics-archive.json"
+
+
+def _metric_name(family: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "_:" else "_" for ch in family)
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: tuple[tuple[str, str], ...], extra: tuple[tuple[str, str], ...] = ()) -> str:
+    items = (*pairs, *extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{_metric_name(k)}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_openmetrics(snapshot: MetricsSnapshot, quantiles: tuple[float, ...] = DEFAULT_QUANTILES) -> str:
+    """Render counters, histogram buckets and estimated quantiles as OpenMetrics text."""
+    lines: list[str] = []
+
+    counter_families: dict[str, list[tuple[tuple[tuple[str, str], ...], int]]] = {}
+    for (family, labels), value in snapshot.counters.items():
+        counter_families.setdefault(family, []).append((labels, value))
+    for family in sorted(counter_families):
+        name = _metric_name(family)
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(counter_families[family]):
+            lines.append(f"{name}_total{_labels(labels)} {value}")
+
+    histogram_families: dict[str, list[tuple[tuple[tuple[str, str], ...], metrics.HistogramSnapshot]]] = {}
+    for (family, labels), hist in snapshot.histograms.items():
+        histogram_families.setdefault(family, []).append((labels, hist))
+    for family in sorted(histogram_families):
+        name = _metric_name(family)
+        series = sorted(histogram_families[family], key=lambda item: item[0])
+        lines.append(f"# TYPE {name} histogram")
+        for labels, hist in series:
+            cumulative = 0
+            for bound, count in zip((*hist.bounds, math.inf), hist.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(hist.total)}")
+        lines.append(f"# TYPE {name}_estimated_quantile gauge")
+        for labels, hist in series:
+            for q in quantiles:
+                value = hist.quantile(q)
+                if value is not None:
+                    lines.append(f"{name}_estimated_quantile{_labels(labels, (('quantile', str(q)),))} {_number(value)}")
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Cached OpenMetrics renderer with optional cross-process aggregation."""
+
+    def __init__(
+        self,
+        *,
+        directory: str | None = None,
+        cache_seconds: float = 1.0,
+        flush_interval_seconds: float = 1.0,
+    ) -> None:
+        self.directory = directory
+        self.cache_seconds = cache_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self._lock = threading.Lock()
+        self._cached: tuple[float, str] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def _own_file(self) -> str:
+        return os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+
+    def flush(self) -> None:
+        """Write this process's snapshot for sibling workers to read."""
+        if not self.directory:
+            return
+        path = self._own_file
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump(metrics.snapshot().to_dict(), handle)
+        os.replace(tmp, path)
+
+    @contextlib.contextmanager
+    def _directory_lock(self, operation: int):
+        """``flock`` on a lock file, so archiving never races a merge in another worker."""
+        with open(os.path.join(self.directory, ".metrics.lock"), "a") as handle:
+            fcntl.flock(handle, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(path: str) -> MetricsSnapshot:
+        with open(path, encoding="utf-8") as handle:
+            return MetricsSnapshot.from_dict(json.load(handle))
+
+    def _archive(self, paths: list[str]) -> None:
+        """Fold finished workers' files into the archive total, then remove them."""
+        archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+        with self._directory_lock(fcntl.LOCK_EX):
+            try:
+                archived = self._read(archive_path)
+            except FileNotFoundError:
+                archived = MetricsSnapshot({}, {})
+            folded = []
+            for path in paths:
+                try:
+                    archived = archived.merge(self._read(path))
+                except FileNotFoundError:
+                    continue  # another worker archived it first
+                except ValueError as exc:
+                    logger.warning("Discarding unreadable metrics file %s: %s", path, exc)
+                folded.append(path)
+            if not folded:
+                return
+            tmp = f"{archive_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as handle:
+                json.dump(archived.to_dict(), handle)
+            os.replace(tmp, archive_path)
+            for path in folded:
+                os.remove(path)
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass  # alive, owned by another user
+        return True
+
+    def collect(self) -> MetricsSnapshot:
+        """Return this process's live snapshot merged with sibling worker files and the archive."""
+        combined = metrics.snapshot()
+        if not self.directory:
+            return combined
+        own = os.path.basename(self._own_file)
+        try:
+            names = os.listdir(self.directory)
+        except OSError as exc:
+            logger.warning("Cannot read metrics directory %s: %s", self.directory, exc)
+            return combined
+        # The archive is always read: another worker may create it after listdir.
+        live, dead = [ARCHIVE_FILE], []
+        for name in names:
+            if name == own or not name.startswith("metrics-") or not name.endswith(".json"):
+                continue
+            if name == ARCHIVE_FILE:
+                continue
+            try:
+                pid = int(name[len("metrics-"):-len(".json")])
+            except ValueError:
+                logger.warning("Skipping metrics file without a worker PID: %s", name)
+                continue
+            (live if self._is_alive(pid) else dead).append(name)
+        try:
+            if dead:
+                self._archive([os.path.join(self.directory, name) for name in dead])
+            with self._directory_lock(fcntl.LOCK_SH):
+                for name in live:
+                    try:
+                        combined = combined.merge(self._read(os.path.join(self.directory, name)))
+                    except FileNotFoundError:
+                        pass  # no archive yet, or the worker was archived since listdir
+                    except (OSError, ValueError) as exc:
+                        logger.warning("Skipping unreadable metrics file %s: %s", name, exc)
+        except OSError as exc:
+            logger.warning("Cannot merge metrics in %s: %s", self.directory, exc)
+        return combined
+
+    def render(self) -> str:
+        now = time.monotonic()
+        with self._lock:
+            if self._cached is not None and self._cached[0] > now:
+                return self._cached[1]
+            text = render_openmetrics(self.collect())
+            self._cached = (now + self.cache_seconds, text)
+            return text
+
+    def start(self) -> None:
+        """Begin periodic flushing to ``directory`` (no-op without one)."""
+        if not self.directory or self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self._own_file):
+            # Left by an earlier process that had our PID; keep its totals.
+            self._archive([self._own_file])
+
+        def run() -> None:
+            while not self._stop.wait(self.flush_interval_seconds):
+                try:
+                    self.flush()
+                except OSError as exc:
+                    logger.warning("Metrics flush to %s failed: %s", self.directory, exc)
+
+        self._thread = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stop flushing and fold this process's totals into the archive; call at shutdown."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+            try:
+                self.flush()
+                self._archive([self._own_file])
+            except OSError as exc:
+                logger.warning("Archiving metrics to %s failed: %s", self.directory, exc)
+
+
+metrics_exporter = MetricsExporter(
+    directory=os.getenv("ORCHESTRATOR_METRICS_DIR") or None,
+    cache_seconds=float(os.getenv("ORCHESTRATOR_METRICS_CACHE_SECONDS", "1.0")),
+)
+metrics_exporter.start()
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+def openmetrics() -> PlainTextResponse:
+    """Expose orchestrator metrics in OpenMetrics text format."""
+    return PlainTextResponse(metrics_exporter.render(), media_type=OPENMETRICS_CONTENT_TYPE)
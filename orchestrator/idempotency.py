@@ -0,0 +1,101 @@
+"""Idempotency cache for webhook deliveries.
+
+Webhook providers retry deliveries; each retry carries the same delivery id.
+:class:`IdempotencyCache` remembers the acknowledgement returned for a
+delivery id for ``ttl_seconds`` (bounded to ``max_entries``), so a retry gets
+the original acknowledgement back instead of being enqueued again.
+
+A key is *reserved* while its first delivery is being enqueued; concurrent
+duplicates see :data:`PENDING` and should be told to retry. The cache is per
+process: with several API workers, a retry routed to a different worker is
+only caught if it arrives after that worker saw the key.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Mapping
+
+from orchestrator.metrics import counter
+
+IDEMPOTENCY_HEADERS = ("idempotency-key", "x-delivery-id", "x-github-delivery")
+IDEMPOTENCY_FIELDS = ("idempotency_key", "delivery_id")
+
+PENDING: Any = object()
+
+_HITS = counter("webhook.idempotency.hit")
+_MISSES = counter("webhook.idempotency.miss")
+
+
+def idempotency_key(headers: Mapping[str, str] | None, payload: Any) -> str | None:
+    """Return the delivery id from the first known header, else from the payload."""
+    if headers:
+        for name in IDEMPOTENCY_HEADERS:
+            value = headers.get(name)
+            if value:
+                return value
+    if isinstance(payload, dict):
+        for name in IDEMPOTENCY_FIELDS:
+            value = payload.get(name)
+            if isinstance(value, str) and value:
+                return value
+    return None
+
+
+class IdempotencyCache:
+    """TTL-expiring, size-bounded map of delivery id to acknowledgement."""
+
+    def __init__(self, *, max_entries: int = 100_000, ttl_seconds: float = 24 * 3600) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        # Insertion order is expiry order because every entry shares one TTL.
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float) -> None:
+        entries = self._entries
+        while entries:
+            key, (expires_at, _) = next(iter(entries.items()))
+            if expires_at > now:
+                break
+            del entries[key]
+
+    def reserve(self, key: str) -> Any | None:
+        """Claim ``key`` for a first delivery.
+
+        Returns ``None`` when the caller should process the delivery (and later
+        :meth:`complete` or :meth:`release` it), the cached acknowledgement for a
+        completed duplicate, or :data:`PENDING` while the first delivery is in flight.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                _HITS.inc()
+                return entry[1]
+            _MISSES.inc()
+            self._entries[key] = (now + self.ttl_seconds, PENDING)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return None
+
+    def complete(self, key: str, acknowledgement: Any) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], acknowledgement)
+
+    def release(self, key: str) -> None:
+        """Forget a reservation whose delivery was not accepted, so a retry is processed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is PENDING:
+                del self._entries[key]
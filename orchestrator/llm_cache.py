@@ -0,0 +1,342 @@
+"""Opt-in response cache for LLM prompts.
+
+Keys are a hash of the normalized prompt (Unicode NFKC, whitespace runs
+collapsed, ends trimmed) plus the model and request parameters, so prompts
+that differ only in spacing share an entry while a change of model or
+temperature does not. Entries live in an in-memory LRU and, when a path is
+given, in a SQLite table that survives restarts and is shared by processes
+on the same host (e.g. repeated CI runs of the tester flow). Both tiers honour
+``ttl_seconds`` and evict least-recently-used entries beyond their size cap.
+Concurrent identical prompts are coalesced so only one reaches the model.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable
+
+from orchestrator.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+_HITS = counter("llm.cache.hits")
+_MISSES = counter("llm.cache.misses")
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", prompt).split())
+
+
+def prompt_cache_key(prompt: str, *, model: str | None = None, params: dict[str, Any] | None = None) -> str:
+    """Stable key for ``prompt`` under ``model`` and ``params``; ``None``-valued params are ignored."""
+    material = {
+        "prompt": normalize_prompt(prompt),
+        "model": model,
+        "params": {name: value for name, value in (params or {}).items() if value is not None},
+    }
+    canonical = json.dumps(material, sort_keys=True, separators=(",", ":"), default=repr)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _SQLiteTier:
+    """Durable tier; ``accessed_at`` drives LRU eviction once the row count passes ``max_entries``."""
+
+    def __init__(self, path: str, *, max_entries: int, busy_timeout_seconds: float = 5.0) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=busy_timeout_seconds, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY,"
+            " content TEXT NOT NULL,"
+            " expires_at REAL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_accessed ON llm_responses (accessed_at)")
+        (self._rows,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: str, now: float) -> tuple[str, float | None] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT content, expires_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            content, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return content, expires_at
+
+    def put(self, key: str, content: str, expires_at: float | None, now: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, content, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, content, expires_at, now),
+            )
+            # Over-counts replacements; the trim recounts exactly, so that only makes trims a little early.
+            self._rows += 1
+            if self._rows > self.max_entries:
+                self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("DELETE FROM llm_responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            (rows,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+            # Trim to 90% of the cap so a full table is not trimmed again on every insert.
+            excess = rows - self.max_entries * 9 // 10 if rows > self.max_entries else 0
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM llm_responses WHERE key IN"
+                    " (SELECT key FROM llm_responses ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+                rows -= excess
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._rows = rows
+
+    def delete(self, key: str | None) -> int:
+        with self._lock:
+            if key is None:
+                cursor = self._conn.execute("DELETE FROM llm_responses")
+            else:
+                cursor = self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            self._rows = max(self._rows - cursor.rowcount, 0)
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            (rows,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        return int(rows)
+
+
+class PromptCache:
+    """Two-tier prompt → completion cache with single-flight computation.
+
+    ``get_or_compute`` and ``aget_or_compute`` return ``(content, cached)``;
+    ``cached`` is true when the content did not come from this caller's own
+    model call (a hit in either tier, or a coalesced concurrent request).
+    Failed computations are never cached. The SQLite tier is best-effort: a
+    failed read counts as a miss and a failed write is logged, so a locked or
+    full database never blocks callers. A sync caller that finds the key led
+    from its own thread (a re-entrant ``compute``, or an async leader on the
+    loop it is running in) calls its ``compute`` directly instead of waiting.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        ttl_seconds: float | None = None,
+        path: str | None = None,
+        max_disk_entries: int = 100_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries < 1 or max_disk_entries < 1:
+            raise ValueError("max_entries and max_disk_entries must be >= 1")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float | None, str]] = OrderedDict()
+        # key -> (future, ident of the thread leading the computation)
+        self._inflight: dict[str, tuple[Future, int]] = {}
+        self._disk = _SQLiteTier(path, max_entries=max_disk_entries) if path else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def disk_entries(self) -> int:
+        return len(self._disk) if self._disk is not None else 0
+
+    def key(self, prompt: str, *, model: str | None = None, params: dict[str, Any] | None = None) -> str:
+        return prompt_cache_key(prompt, model=model, params=params)
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+    def _remember(self, key: str, expires_at: float | None, content: str) -> None:
+        # Caller holds self._lock.
+        self._entries[key] = (expires_at, content)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _claim(self, key: str, *, blocking: bool = False) -> tuple[str, Any]:
+        """Return ``("hit", content)``, ``("wait", future)``, ``("lead", future)`` or ``("bypass", None)``.
+
+        ``blocking`` callers get ``"bypass"`` rather than waiting on a leader in
+        their own thread, which could only finish once they return.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, content = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    _HITS.inc()
+                    return "hit", content
+                del self._entries[key]
+            pending = self._inflight.get(key)
+            if pending is not None:
+                if blocking and pending[1] == threading.get_ident():
+                    _MISSES.inc()
+                    return "bypass", None
+                _HITS.inc()
+                return "wait", pending[0]
+            future: Future = Future()
+            self._inflight[key] = (future, threading.get_ident())
+            return "lead", future
+
+    def _from_disk(self, key: str) -> tuple[str, float | None] | None:
+        """Leader's second-tier lookup; a failed read is treated as a miss."""
+        if self._disk is None:
+            return None
+        try:
+            return self._disk.get(key, self._clock())
+        except Exception as exc:  # e.g. "database is locked" after the busy timeout
+            logger.warning("Prompt cache disk read failed: %s", exc)
+            return None
+
+    def _settle(
+        self,
+        key: str,
+        future: Future,
+        content: str | None,
+        error: BaseException | None,
+        *,
+        disk_row: tuple[str, float | None] | None = None,
+    ) -> None:
+        """Release the in-flight slot and resolve ``future``, then write through to disk.
+
+        ``disk_row`` marks content that was read from the SQLite tier, which
+        keeps its stored expiry and is not written back.
+        """
+        if error is None and not isinstance(content, str):
+            error = ValueError("LLM client must return a string response.")
+        now = self._clock()
+        if disk_row is not None:
+            expires_at = disk_row[1]
+        else:
+            expires_at = now + self.ttl_seconds if self.ttl_seconds is not None else None
+        try:
+            with self._lock:
+                pending = self._inflight.get(key)
+                if pending is not None and pending[0] is future:
+                    del self._inflight[key]
+                    if error is None:
+                        self._remember(key, expires_at, content)
+        finally:
+            if error is None:
+                future.set_result(content)
+            else:
+                future.set_exception(error)
+        if error is None and disk_row is None and self._disk is not None:
+            try:
+                self._disk.put(key, content, expires_at, now)
+            except Exception as exc:
+                logger.warning("Prompt cache disk write failed: %s", exc)
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> tuple[str, bool]:
+        state, value = self._claim(key, blocking=True)
+        if state == "hit":
+            return value, True
+        if state == "wait":
+            return value.result(), True
+        if state == "bypass":
+            return compute(), False
+        try:
+            row = self._from_disk(key)
+            if row is None:
+                _MISSES.inc()
+                content = compute()
+        except BaseException as exc:
+            self._settle(key, value, None, exc)
+            raise
+        if row is not None:
+            _HITS.inc()
+            self._settle(key, value, row[0], None, disk_row=row)
+            return row[0], True
+        self._settle(key, value, content, None)
+        return value.result(), False
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> tuple[str, bool]:
+        state, value = self._claim(key)
+        if state == "hit":
+            return value, True
+        if state == "wait":
+            return await asyncio.wrap_future(value), True
+        try:
+            row = await asyncio.to_thread(self._from_disk, key) if self._disk is not None else None
+            if row is None:
+                _MISSES.inc()
+                content = await compute()
+        except Exception as exc:
+            self._settle(key, value, None, exc)
+            raise
+        except BaseException:
+            # Cancelled leader: release the slot so waiters and retries call the model themselves.
+            self._settle(key, value, None, RuntimeError("Coalesced LLM call was cancelled"))
+            raise
+        if row is not None:
+            _HITS.inc()
+            self._settle(key, value, row[0], None, disk_row=row)
+            return row[0], True
+        self._settle(key, value, content, None)
+        return value.result(), False
+
+    def invalidate(self, key: str | None = None) -> int:
+        """Drop one key (or everything) from both tiers; returns the number of memory entries removed."""
+        with self._lock:
+            if key is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                removed = 1 if self._entries.pop(key, None) is not None else 0
+        if self._disk is not None:
+            self._disk.delete(key)
+        return removed
+
+
+def prompt_cache_from_env() -> PromptCache | None:
+    """Build the cache named by ``LLM_CACHE_URL`` (``memory://`` or ``sqlite:///path``); unset disables it.
+
+    As with SQLAlchemy URLs, ``sqlite:///rel.db`` is relative and ``sqlite:////abs.db`` is absolute.
+    """
+    url = os.getenv("LLM_CACHE_URL", "")
+    if not url:
+        return None
+    ttl = os.getenv("LLM_CACHE_TTL_SECONDS")
+    options: dict[str, Any] = {
+        "max_entries": int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+        "max_disk_entries": int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "100000")),
+        "ttl_seconds": float(ttl) if ttl else None,
+    }
+    if url == "memory://":
+        return PromptCache(**options)
+    if url.startswith("sqlite:///"):
+        return PromptCache(path=url[len("sqlite:///") :], **options)
+    raise ValueError(f"Unsupported LLM_CACHE_URL: {url}")
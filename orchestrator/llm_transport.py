@@ -0,0 +1,331 @@
+"""Pooled asyncio HTTP/1.1 client for LLM endpoints.
+
+:class:`AsyncHTTPTransport` keeps idle keep-alive connections per
+``(scheme, host, port)`` and caps concurrent requests (and therefore open
+connections) per endpoint with a semaphore. It implements only what JSON
+model APIs need: ``POST`` with a JSON body, ``Content-Length`` or chunked
+responses, connection reuse, and (via :meth:`AsyncHTTPTransport.stream_json`)
+reading a body such as a server-sent event stream as it arrives. Pools belong to the event loop that created
+them, so one transport can serve several loops (e.g. a sync wrapper's
+background loop and the caller's own loop).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import ssl
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+from urllib.parse import urlsplit
+
+
+_READ_SIZE = 64 * 1024
+
+
+class TransportError(ConnectionError):
+    """The request could not be sent or its response could not be read."""
+
+
+@dataclass
+class HTTPResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    last_used: float = field(default_factory=time.monotonic)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _EndpointPool:
+    def __init__(self, max_connections: int) -> None:
+        self.slots = asyncio.Semaphore(max_connections)
+        self.idle: deque[_Connection] = deque()
+
+
+async def _iter_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> AsyncIterator[bytes]:
+    """Yield the response body as it arrives."""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0], 16)
+            if size == 0:
+                while (await reader.readuntil(b"\r\n")) != b"\r\n":  # trailers
+                    pass
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining:
+            data = await reader.read(min(remaining, _READ_SIZE))
+            if not data:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            remaining -= len(data)
+            yield data
+    else:
+        while data := await reader.read(_READ_SIZE):
+            yield data
+
+
+def _framed(headers: dict[str, str]) -> bool:
+    """Whether the body has a known end, so the connection can be reused after it."""
+    return headers.get("transfer-encoding", "").lower() == "chunked" or "content-length" in headers
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> tuple[bytes, bool]:
+    """Read the response body; the flag says whether the connection can be reused."""
+    return b"".join([part async for part in _iter_body(reader, headers)]), _framed(headers)
+
+
+class HTTPStream:
+    """A response whose body is read as it arrives; see :meth:`AsyncHTTPTransport.stream_json`.
+
+    Each read waits at most ``timeout_seconds``. Read errors raise
+    :class:`TransportError`; :attr:`complete` turns true once the body has
+    been read to its end.
+    """
+
+    def __init__(
+        self,
+        status: int,
+        headers: dict[str, str],
+        reader: asyncio.StreamReader,
+        timeout_seconds: float | None,
+        origin: str,
+    ) -> None:
+        self.status = status
+        self.headers = headers
+        self.complete = False
+        self._body = _iter_body(reader, headers)
+        self._timeout_seconds = timeout_seconds
+        self._origin = origin
+
+    async def aiter_bytes(self) -> AsyncIterator[bytes]:
+        while True:
+            try:
+                async with asyncio.timeout(self._timeout_seconds):
+                    chunk = await anext(self._body)
+            except StopAsyncIteration:
+                self.complete = True
+                return
+            except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as exc:
+                raise TransportError(f"Malformed response from {self._origin}: {exc}") from exc
+            yield chunk
+
+    async def aiter_lines(self) -> AsyncIterator[str]:
+        """Body lines without their terminators, e.g. the fields of server-sent events."""
+        buffer = b""
+        async with contextlib.aclosing(self.aiter_bytes()) as chunks:
+            async for chunk in chunks:
+                *lines, buffer = (buffer + chunk).split(b"\n")
+                for line in lines:
+                    yield line.rstrip(b"\r").decode("utf-8")
+        if buffer:
+            yield buffer.rstrip(b"\r").decode("utf-8")
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.aiter_bytes()])
+
+    async def aclose(self) -> None:
+        await self._body.aclose()
+
+
+class AsyncHTTPTransport:
+    def __init__(
+        self,
+        *,
+        max_connections_per_endpoint: int = 8,
+        connect_timeout_seconds: float = 10.0,
+        idle_timeout_seconds: float = 30.0,
+        ssl_context: ssl.SSLContext | None = None,
+    ) -> None:
+        if max_connections_per_endpoint < 1:
+            raise ValueError("max_connections_per_endpoint must be >= 1")
+        self.max_connections_per_endpoint = max_connections_per_endpoint
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.ssl_context = ssl_context
+        self._pools: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str, int], _EndpointPool]]
+        self._pools = weakref.WeakKeyDictionary()
+        self._opened: dict[tuple[str, str, int], int] = {}
+
+    def _pool(self, key: tuple[str, str, int]) -> _EndpointPool:
+        pools = self._pools.setdefault(asyncio.get_running_loop(), {})
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools[key] = _EndpointPool(self.max_connections_per_endpoint)
+        return pool
+
+    def connections_opened(self, url: str) -> int:
+        """Connections ever opened to ``url``'s endpoint (for tests and metrics)."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80))
+        return self._opened.get(key, 0)
+
+    async def _connect(self, scheme: str, host: str, port: int) -> _Connection:
+        ssl_context = None
+        if scheme == "https":
+            ssl_context = self.ssl_context or ssl.create_default_context()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ssl_context), self.connect_timeout_seconds
+            )
+        except (OSError, asyncio.TimeoutError) as exc:
+            raise TransportError(f"Cannot connect to {host}:{port}: {exc}") from exc
+        key = (scheme, host, port)
+        self._opened[key] = self._opened.get(key, 0) + 1
+        return _Connection(reader, writer)
+
+    def _checkout(self, pool: _EndpointPool) -> _Connection | None:
+        now = time.monotonic()
+        while pool.idle:
+            connection = pool.idle.pop()
+            if now - connection.last_used < self.idle_timeout_seconds and not connection.writer.is_closing():
+                return connection
+            connection.close()
+        return None
+
+    def _prepare(
+        self, url: str, payload: Any, headers: dict[str, str] | None, accept: str
+    ) -> tuple[tuple[str, str, int], bytes]:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        lines = [
+            f"POST {path} HTTP/1.1",
+            f"Host: {parts.netloc}",
+            "Content-Type: application/json",
+            f"Accept: {accept}",
+            f"Content-Length: {len(body)}",
+            "Connection: keep-alive",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+        return (parts.scheme, parts.hostname, port), request
+
+    async def post_json(
+        self,
+        url: str,
+        payload: Any,
+        *,
+        headers: dict[str, str] | None = None,
+        timeout_seconds: float | None = None,
+    ) -> HTTPResponse:
+        """POST ``payload`` as JSON; raises :class:`TransportError` or ``asyncio.TimeoutError``."""
+        key, request = self._prepare(url, payload, headers, "application/json")
+        pool = self._pool(key)
+        async with pool.slots:
+            return await asyncio.wait_for(self._send(pool, *key, request), timeout_seconds)
+
+    @contextlib.asynccontextmanager
+    async def stream_json(
+        self,
+        url: str,
+        payload: Any,
+        *,
+        headers: dict[str, str] | None = None,
+        timeout_seconds: float | None = None,
+    ) -> AsyncIterator[HTTPStream]:
+        """POST like :meth:`post_json`, but yield an :class:`HTTPStream` once the headers arrive.
+
+        ``timeout_seconds`` bounds the wait for the headers and then each body
+        read. The endpoint slot is held until the block exits; the connection
+        is pooled again only if the body was read to its end.
+        """
+        key, request = self._prepare(url, payload, headers, "text/event-stream, application/json")
+        pool = self._pool(key)
+        async with pool.slots:
+            async with asyncio.timeout(timeout_seconds):
+                connection, status, response_headers = await self._exchange(pool, *key, request)
+            stream = HTTPStream(status, response_headers, connection.reader, timeout_seconds, f"{key[1]}:{key[2]}")
+            try:
+                yield stream
+            finally:
+                self._release(pool, connection, response_headers, stream.complete and _framed(response_headers))
+                await stream.aclose()
+
+    async def _exchange(
+        self, pool: _EndpointPool, scheme: str, host: str, port: int, request: bytes
+    ) -> tuple[_Connection, int, dict[str, str]]:
+        """Send ``request`` and read the status line and headers."""
+        connection = self._checkout(pool)
+        reused = connection is not None
+        while True:
+            if connection is None:
+                connection = await self._connect(scheme, host, port)
+            try:
+                connection.writer.write(request)
+                await connection.writer.drain()
+                status_line = await connection.reader.readuntil(b"\r\n")
+            except (OSError, asyncio.IncompleteReadError) as exc:
+                connection.close()
+                if reused:
+                    # The server closed an idle keep-alive connection; retry once on a new one.
+                    connection, reused = None, False
+                    continue
+                raise TransportError(f"Request to {host}:{port} failed: {exc}") from exc
+            except BaseException:
+                connection.close()
+                raise
+            break
+
+        try:
+            _, status, *_ = status_line.decode("latin-1").split(" ", 2)
+            response_headers: dict[str, str] = {}
+            while (line := await connection.reader.readuntil(b"\r\n")) != b"\r\n":
+                name, _, value = line.decode("latin-1").partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+            return connection, int(status), response_headers
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as exc:
+            connection.close()
+            raise TransportError(f"Malformed response from {host}:{port}: {exc}") from exc
+        except BaseException:
+            connection.close()
+            raise
+
+    async def _send(self, pool: _EndpointPool, scheme: str, host: str, port: int, request: bytes) -> HTTPResponse:
+        connection, status, response_headers = await self._exchange(pool, scheme, host, port, request)
+        try:
+            body, reusable = await _read_body(connection.reader, response_headers)
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as exc:
+            connection.close()
+            raise TransportError(f"Malformed response from {host}:{port}: {exc}") from exc
+        except BaseException:
+            connection.close()
+            raise
+        self._release(pool, connection, response_headers, reusable)
+        return HTTPResponse(status, response_headers, body)
+
+    def _release(
+        self, pool: _EndpointPool, connection: _Connection, headers: dict[str, str], reusable: bool
+    ) -> None:
+        if reusable and headers.get("connection", "").lower() != "close":
+            connection.last_used = time.monotonic()
+            pool.idle.append(connection)
+        else:
+            connection.close()
+
+    async def aclose(self) -> None:
+        """Close idle connections opened on the running loop."""
+        for pool in self._pools.pop(asyncio.get_running_loop(), {}).values():
+            while pool.idle:
+                pool.idle.pop().close()
@@ -1,33 +1,93 @@
-"""LLM utility helpers used by orchestration and agents."""
+"""LLM utility helpers used by orchestration and agents.
+
+:func:`call_llm` wraps any ``Callable[[str], str]``. :class:`LLMService` is
+the production client: it talks to one or more OpenAI-style chat completion
+endpoints over a pooled :class:`~orchestrator.llm_transport.AsyncHTTPTransport`,
+retries throttled and failed requests with jittered exponential backoff, and
+can hedge a slow request to another endpoint. It exposes ``acall_llm`` for
+async callers and ``call_llm`` for sync ones, and is itself a valid
+``llm_client`` for :func:`call_llm`. :class:`LLMBatcher` coalesces concurrent
+single-prompt calls into requests to a batch-capable backend, and
+:func:`stream_llm` / :func:`astream_llm` yield content deltas as the model
+produces them.
+
+Responses are cached when a :class:`~orchestrator.llm_cache.PromptCache` is
+passed in or ``LLM_CACHE_URL`` configures the default one; every payload
+carries a ``cached`` flag saying whether the model was actually called.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import inspect
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import types
 import warnings
-from typing import Any, Callable, Dict, Optional
+import weakref
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Union,
+)
 
+from orchestrator.llm_cache import PromptCache, prompt_cache_from_env
+from orchestrator.llm_transport import AsyncHTTPTransport, HTTPResponse, TransportError
+from orchestrator.metrics import counter, histogram
 
 LLMCallable = Callable[[str], str]
+AsyncLLMCallable = Callable[[str], Awaitable[str]]
 PROMPT_INTENT_DEPRECATION_VERSION = "2.0"
 PROMPT_INTENT_DEPRECATION_MESSAGE = (
     "`prompt_intent` is deprecated and will be removed in "
     f"{PROMPT_INTENT_DEPRECATION_VERSION}; use `prompt`."
 )
 
+# Statuses worth retrying: timeouts, throttling and transient server errors.
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
 
-def call_llm(
-    *,
-    prompt: Optional[str] = None,
-    prompt_intent: Optional[str] = None,
-    llm_client: Optional[LLMCallable] = None,
-) -> Dict[str, Any]:
-    """Call the configured LLM and return a normalized payload.
+_REQUESTS = counter("llm.requests")
+_RETRIES = counter("llm.retries")
+_HEDGES = counter("llm.hedges")
+_FAILURES = counter("llm.failures")
+_LATENCY = histogram("llm.request_seconds")
 
-    Deprecation path for ``prompt_intent``:
-    - Supported for backward compatibility in current releases.
-    - Emits ``DeprecationWarning`` on use.
-    - Planned removal in version 2.0.
-    """
+# Shared by call_llm, acall_llm and LLMService unless a cache is passed explicitly.
+default_prompt_cache: Optional[PromptCache] = prompt_cache_from_env()
+
+
+class LLMError(RuntimeError):
+    """An LLM request failed; ``retryable`` says whether trying again may help."""
 
+    def __init__(
+        self,
+        message: str,
+        *,
+        status: Optional[int] = None,
+        retryable: bool = False,
+        retry_after_seconds: Optional[float] = None,
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after_seconds = retry_after_seconds
+
+
+def _resolve_prompt(prompt: Optional[str], prompt_intent: Optional[str]) -> str:
+    """Validate the prompt arguments shared by every ``call_llm`` flavour."""
     if prompt is not None and prompt_intent is not None:
         raise ValueError("Provide only one of `prompt` or deprecated `prompt_intent`.")
 
@@ -37,16 +97,809 @@ def call_llm(
         warnings.warn(
             PROMPT_INTENT_DEPRECATION_MESSAGE,
             DeprecationWarning,
-            stacklevel=2,
+            stacklevel=3,
         )
         prompt = prompt_intent
 
     if not isinstance(prompt, str) or not prompt.strip():
         raise ValueError("`prompt` must be a non-empty string.")
+    return prompt
+
 
-    runner = llm_client or (lambda p: f"stub:{p}")
-    content = runner(prompt)
+def _payload(prompt: str, content: Any, cached: bool = False) -> Dict[str, Any]:
     if not isinstance(content, str):
         raise ValueError("LLM client must return a string response.")
+    return {"ok": True, "prompt": prompt, "content": content, "cached": cached}
+
+
+def _stub(prompt: str) -> str:
+    return f"stub:{prompt}"
+
+
+def _is_async_callable(llm_client: Any) -> bool:
+    return any(
+        inspect.iscoroutinefunction(fn) or inspect.isasyncgenfunction(fn)
+        for fn in (llm_client, getattr(llm_client, "__call__", None))
+    )
+
+
+_client_tokens: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+_client_token_counter = itertools.count(1)
+_client_tokens_lock = threading.Lock()
+
+
+def _identity_token(obj: Any) -> str:
+    """Per-object suffix that stays unique for the object's lifetime."""
+    with _client_tokens_lock:
+        try:
+            token = _client_tokens.get(obj)
+            if token is None:
+                token = _client_tokens[obj] = f"#{next(_client_token_counter)}"
+            return token
+        except TypeError:  # not weak-referenceable or not hashable
+            return f"#id{id(obj)}"
+
+
+def _client_model(llm_client: Any) -> str:
+    """Cache namespace for a plain callable, so different clients never share entries.
+
+    Module-level functions and builtins are named by their qualified name.
+    Lambdas, closures, bound methods and callable instances can share that name
+    while behaving differently, so they also get a per-object token.
+    """
+    if llm_client is None:
+        return "stub"
+    model = getattr(llm_client, "model", None)
+    if isinstance(model, str) and model:
+        return model
+    qualname = getattr(llm_client, "__qualname__", None)
+    if qualname is None:
+        kind = type(llm_client)
+        return f"{kind.__module__}.{kind.__qualname__}{_identity_token(llm_client)}"
+    name = f"{getattr(llm_client, '__module__', '')}.{qualname}"
+    owner = getattr(llm_client, "__self__", None)
+    if owner is not None and not isinstance(owner, (types.ModuleType, type)):
+        return f"{name}{_identity_token(owner)}"
+    if "<lambda>" in qualname or "<locals>" in qualname:
+        return f"{name}{_identity_token(llm_client)}"
+    return name
+
+
+def call_llm(
+    *,
+    prompt: Optional[str] = None,
+    prompt_intent: Optional[str] = None,
+    llm_client: Optional[LLMCallable] = None,
+    cache: Optional[PromptCache] = None,
+) -> Dict[str, Any]:
+    """Call the configured LLM and return a normalized payload.
+
+    Deprecation path for ``prompt_intent``:
+    - Supported for backward compatibility in current releases.
+    - Emits ``DeprecationWarning`` on use.
+    - Planned removal in version 2.0.
+    """
+
+    prompt = _resolve_prompt(prompt, prompt_intent)
+    if isinstance(llm_client, LLMService):
+        content, cached = llm_client._run(llm_client._agenerate(prompt, {}, cache))
+        return _payload(prompt, content, cached)
+    runner = llm_client or _stub
+    cache = cache if cache is not None else default_prompt_cache
+    if cache is None:
+        return _payload(prompt, runner(prompt))
+    key = cache.key(prompt, model=_client_model(llm_client))
+    content, cached = cache.get_or_compute(key, lambda: runner(prompt))
+    return _payload(prompt, content, cached)
+
+
+async def acall_llm(
+    *,
+    prompt: Optional[str] = None,
+    prompt_intent: Optional[str] = None,
+    llm_client: Optional[Union[LLMCallable, AsyncLLMCallable, "LLMService", "LLMBatcher"]] = None,
+    cache: Optional[PromptCache] = None,
+) -> Dict[str, Any]:
+    """Async :func:`call_llm`: awaits async clients and runs sync ones in a worker thread."""
+
+    prompt = _resolve_prompt(prompt, prompt_intent)
+    if isinstance(llm_client, LLMService):
+        content, cached = await llm_client._agenerate(prompt, {}, cache)
+        return _payload(prompt, content, cached)
+
+    async def generate() -> str:
+        if llm_client is None:
+            return _stub(prompt)
+        if isinstance(llm_client, LLMBatcher):
+            return await llm_client.acomplete(prompt)
+        if _is_async_callable(llm_client):
+            return await llm_client(prompt)
+        return await asyncio.to_thread(llm_client, prompt)
+
+    cache = cache if cache is not None else default_prompt_cache
+    if cache is None:
+        return _payload(prompt, await generate())
+    key = cache.key(prompt, model=_client_model(llm_client))
+    content, cached = await cache.aget_or_compute(key, generate)
+    return _payload(prompt, content, cached)
+
+
+class _BackgroundLoop:
+    """Lazily started event-loop thread through which sync callers share async state."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()  # type: ignore[attr-defined]
+            raise RuntimeError(f"{self.name} sync API called from a running event loop; use acall_llm")
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def stop(self, cleanup: Optional[Callable[[], Awaitable[Any]]] = None) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            if cleanup is not None:
+                asyncio.run_coroutine_threadsafe(cleanup(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+
+def chat_completion_request(prompt: str, model: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Default request body: an OpenAI-style chat completion with one user message."""
+    body: Dict[str, Any] = {"messages": [{"role": "user", "content": prompt}], **params}
+    if model:
+        body.setdefault("model", model)
+    return body
+
+
+def chat_completion_content(response: Any) -> str:
+    """Default response parser for OpenAI-style chat completions."""
+    return response["choices"][0]["message"]["content"]
+
+
+def chat_completion_delta(event: Any) -> Optional[str]:
+    """Default stream parser: the content delta of an OpenAI-style chunk, if it has one."""
+    choices = event.get("choices")
+    return choices[0].get("delta", {}).get("content") if choices else None
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None  # HTTP-date form; fall back to our own backoff
+
+
+class LLMService:
+    """Async-first LLM client with pooled connections, retries and hedging.
+
+    ``endpoints`` defaults to the comma-separated ``LLM_ENDPOINTS`` env var,
+    ``model`` to ``LLM_MODEL`` and ``api_key`` to ``LLM_API_KEY``. With no
+    endpoint configured the service answers offline via ``llm_client`` (or
+    the same stub :func:`call_llm` uses), so it is safe to construct anywhere.
+    ``cache`` defaults to :data:`default_prompt_cache`; its keys include the
+    model and per-call params.
+
+    Each attempt goes to the next endpoint in turn. Retryable failures (see
+    :data:`RETRYABLE_STATUSES`, timeouts and connection errors) are retried up
+    to ``max_retries`` times after a full-jitter exponential delay, or after the
+    server's ``Retry-After`` when it sends one. With ``hedge_after_seconds``
+    set, an attempt still pending after that long is duplicated to another
+    endpoint; the first success wins and the loser is cancelled.
+
+    :meth:`astream` (and its blocking twin :meth:`stream`) asks the endpoint
+    for server-sent events and yields each content delta as it arrives;
+    ``delta_parser`` extracts it from an event. Streams are retried only
+    until their first delta, and are neither hedged nor cached.
+    """
+
+    def __init__(
+        self,
+        endpoints: Optional[Sequence[str]] = None,
+        *,
+        model: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout_seconds: float = 60.0,
+        max_retries: int = 2,
+        backoff_base_seconds: float = 0.25,
+        backoff_max_seconds: float = 8.0,
+        hedge_after_seconds: Optional[float] = None,
+        max_concurrency_per_endpoint: int = 8,
+        transport: Optional[AsyncHTTPTransport] = None,
+        llm_client: Optional[LLMCallable] = None,
+        cache: Optional[PromptCache] = None,
+        request_builder: Callable[[str, Optional[str], Dict[str, Any]], Any] = chat_completion_request,
+        response_parser: Callable[[Any], str] = chat_completion_content,
+        delta_parser: Callable[[Any], Optional[str]] = chat_completion_delta,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        if endpoints is None:
+            endpoints = [url.strip() for url in os.getenv("LLM_ENDPOINTS", "").split(",") if url.strip()]
+        if max_retries < 0:
+            raise ValueError("max_retries must be >= 0")
+        self.endpoints = list(endpoints)
+        self.model = model if model is not None else os.getenv("LLM_MODEL")
+        api_key = api_key if api_key is not None else os.getenv("LLM_API_KEY")
+        self._headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self.transport = transport or AsyncHTTPTransport(max_connections_per_endpoint=max_concurrency_per_endpoint)
+        self.llm_client = llm_client
+        self.cache = cache if cache is not None else default_prompt_cache
+        self.request_builder = request_builder
+        self.response_parser = response_parser
+        self.delta_parser = delta_parser
+        self._rng = rng or random.Random()
+        self._background = _BackgroundLoop("llm-service")
+
+    # -- async API -----------------------------------------------------------
+
+    async def acomplete(self, prompt: str, **params: Any) -> str:
+        """Return the completion text for ``prompt``; raises :class:`LLMError`."""
+        content, _ = await self._agenerate(prompt, params)
+        return content
+
+    async def _agenerate(
+        self, prompt: str, params: Dict[str, Any], cache: Optional[PromptCache] = None
+    ) -> tuple[str, bool]:
+        cache = cache if cache is not None else self.cache
+        if cache is None:
+            return await self._generate(prompt, params), False
+        model = self.model or (_client_model(self.llm_client) if not self.endpoints else None)
+        key = cache.key(prompt, model=model, params=params)
+        return await cache.aget_or_compute(key, lambda: self._generate(prompt, params))
+
+    async def _generate(self, prompt: str, params: Dict[str, Any]) -> str:
+        if not self.endpoints:
+            client = self.llm_client or _stub
+            content = client(prompt)
+            return await content if inspect.isawaitable(content) else content
+
+        body = self.request_builder(prompt, self.model, params)
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(body, attempt)
+            except LLMError as exc:
+                await self._wait_to_retry(exc, attempt)
+                attempt += 1
+
+    async def astream(self, prompt: str, **params: Any) -> AsyncIterator[str]:
+        """Yield the completion's content deltas as the endpoint sends them; raises :class:`LLMError`.
+
+        A plain JSON reply is accepted too and arrives as one delta. Without
+        endpoints the offline client's output is streamed instead.
+        """
+        if not self.endpoints:
+            async with contextlib.aclosing(_aiter_chunks(self.llm_client, prompt)) as deltas:
+                async for delta in deltas:
+                    yield delta
+            return
+
+        body = self.request_builder(prompt, self.model, {**params, "stream": True})
+        attempt = 0
+        while True:
+            started = False
+            url = self.endpoints[attempt % len(self.endpoints)]
+            try:
+                async with contextlib.aclosing(self._stream_request(url, body)) as deltas:
+                    async for delta in deltas:
+                        started = True
+                        yield delta
+                return
+            except LLMError as exc:
+                if started:
+                    # Deltas already handed out cannot be taken back, so never retry mid-stream.
+                    _FAILURES.inc()
+                    raise
+                await self._wait_to_retry(exc, attempt)
+                attempt += 1
+
+    async def acall_llm(
+        self,
+        *,
+        prompt: Optional[str] = None,
+        prompt_intent: Optional[str] = None,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        """Async counterpart of :func:`call_llm` returning the same normalized payload."""
+        prompt = _resolve_prompt(prompt, prompt_intent)
+        content, cached = await self._agenerate(prompt, params)
+        return _payload(prompt, content, cached)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    # -- sync API ------------------------------------------------------------
+
+    def stream(self, prompt: str, **params: Any) -> Iterator[str]:
+        """Blocking :meth:`astream`, stepped on the service's background loop."""
+        deltas = self.astream(prompt, **params)
+        try:
+            while (delta := self._run(_anext(deltas))) is not _END:
+                yield delta
+        finally:
+            self._run(_aclose(deltas))
+
+    def complete(self, prompt: str, **params: Any) -> str:
+        return self._run(self.acomplete(prompt, **params))
+
+    def call_llm(
+        self,
+        *,
+        prompt: Optional[str] = None,
+        prompt_intent: Optional[str] = None,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        """Blocking :meth:`acall_llm`; must not be called from a running event loop."""
+        prompt = _resolve_prompt(prompt, prompt_intent)
+        content, cached = self._run(self._agenerate(prompt, params))
+        return _payload(prompt, content, cached)
+
+    def __call__(self, prompt: str) -> str:
+        return self.complete(prompt)
+
+    def close(self) -> None:
+        """Close pooled connections and stop the background loop used by the sync API."""
+        self._background.stop(self.transport.aclose)
+
+    def _run(self, coro: Awaitable[Any]) -> Any:
+        # One long-lived loop per service keeps its connection pools warm between sync calls.
+        return self._background.run(coro)
+
+    # -- internals -----------------------------------------------------------
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spread retries uniformly so throttled clients don't retry in lockstep.
+        return self._rng.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2**attempt))
+
+    async def _wait_to_retry(self, exc: LLMError, attempt: int) -> None:
+        """Sleep before retrying ``exc``, or re-raise it when it may not be retried."""
+        if not exc.retryable or attempt >= self.max_retries:
+            _FAILURES.inc()
+            raise exc
+        delay = exc.retry_after_seconds
+        if delay is None:
+            delay = self._backoff(attempt)
+        _RETRIES.inc()
+        await asyncio.sleep(min(delay, self.backoff_max_seconds))
+
+    async def _attempt(self, body: Any, attempt: int) -> str:
+        primary = asyncio.ensure_future(self._request(self.endpoints[attempt % len(self.endpoints)], body))
+        if self.hedge_after_seconds is None:
+            return await primary
+
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after_seconds)
+            if not done:
+                _HEDGES.inc()
+                hedge_url = self.endpoints[(attempt + 1) % len(self.endpoints)]
+                pending.add(asyncio.ensure_future(self._request(hedge_url, body)))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _request(self, url: str, body: Any) -> str:
+        _REQUESTS.inc()
+        started = time.perf_counter()
+        try:
+            response = await self.transport.post_json(
+                url, body, headers=self._headers, timeout_seconds=self.timeout_seconds
+            )
+        except asyncio.TimeoutError as exc:
+            raise LLMError(f"LLM request to {url} timed out", retryable=True) from exc
+        except TransportError as exc:
+            raise LLMError(str(exc), retryable=True) from exc
+        finally:
+            _LATENCY.observe(time.perf_counter() - started)
+        _check_status(url, response.status, response.headers)
+        return self._content(url, response)
+
+    async def _stream_request(self, url: str, body: Any) -> AsyncIterator[str]:
+        _REQUESTS.inc()
+        started = time.perf_counter()
+        try:
+            async with self.transport.stream_json(
+                url, body, headers=self._headers, timeout_seconds=self.timeout_seconds
+            ) as response:
+                _check_status(url, response.status, response.headers)
+                if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                    yield self._content(url, HTTPResponse(response.status, response.headers, await response.read()))
+                    return
+                finished = False
+                async with contextlib.aclosing(response.aiter_lines()) as lines:
+                    async for line in lines:
+                        if finished or not line.startswith("data:"):
+                            continue  # comments, blank separators and other SSE fields
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            finished = True  # read on to the end of the body so the connection is pooled
+                            continue
+                        try:
+                            delta = self.delta_parser(json.loads(data))
+                        except (ValueError, LookupError, TypeError, AttributeError) as exc:
+                            raise LLMError(f"Malformed LLM stream from {url}: {exc}", status=response.status) from exc
+                        if delta is not None and not isinstance(delta, str):
+                            raise LLMError(f"LLM stream from {url} has non-string content", status=response.status)
+                        if delta:
+                            yield delta
+        except asyncio.TimeoutError as exc:
+            raise LLMError(f"LLM request to {url} timed out", retryable=True) from exc
+        except TransportError as exc:
+            raise LLMError(str(exc), retryable=True) from exc
+        except UnicodeDecodeError as exc:
+            raise LLMError(f"Malformed LLM stream from {url}: {exc}") from exc
+        finally:
+            _LATENCY.observe(time.perf_counter() - started)
+
+    def _content(self, url: str, response: HTTPResponse) -> str:
+        try:
+            content = self.response_parser(response.json())
+        except (ValueError, LookupError, TypeError) as exc:
+            raise LLMError(f"Malformed LLM response from {url}: {exc}", status=response.status) from exc
+        if not isinstance(content, str):
+            raise LLMError(f"LLM response from {url} has non-string content", status=response.status)
+        return content
+
+
+def _check_status(url: str, status: int, headers: Dict[str, str]) -> None:
+    if status >= 400:
+        raise LLMError(
+            f"LLM endpoint {url} returned HTTP {status}",
+            status=status,
+            retryable=status in RETRYABLE_STATUSES,
+            retry_after_seconds=_retry_after(headers.get("retry-after")),
+        )
+
+
+# The background loop only accepts coroutines, not bare async-generator awaitables.
+async def _anext(deltas: AsyncIterator[str]) -> Any:
+    return await anext(deltas, _END)
+
+
+async def _aclose(deltas: Any) -> None:
+    await deltas.aclose()
+
+
+BatchLLMCallable = Callable[[list], Any]
+
+_BATCHES = counter("llm.batches")
+_BATCH_SIZE = histogram("llm.batch_size", tuple(float(2**i) for i in range(11)))
+_BATCH_WAIT = histogram("llm.batch_wait_seconds")
+
+
+class _PendingBatch:
+    __slots__ = ("items", "timer")
+
+    def __init__(self) -> None:
+        self.items: list[tuple[str, asyncio.Future, float]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class LLMBatcher:
+    """Coalesce concurrent single-prompt calls into batched backend requests.
+
+    ``batch_client`` takes a list of prompts and returns (or, if async,
+    resolves to) a same-length sequence whose items are either the completion
+    string or an exception instance for that prompt alone; an exception raised
+    by the whole call fails every prompt in the batch. A batch is dispatched as
+    soon as it holds ``max_batch_size`` prompts or its oldest prompt has waited
+    ``max_wait_ms``, which bounds the latency batching adds. At most
+    ``max_concurrent_batches`` batches are in flight at once.
+
+    Async callers use :meth:`acomplete` (or pass the batcher to
+    :func:`acall_llm`); the sync ``__call__`` makes it a drop-in ``llm_client``
+    for :func:`call_llm`, and concurrent threads share batches through a
+    background loop.
+    """
+
+    def __init__(
+        self,
+        batch_client: BatchLLMCallable,
+        *,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 4,
+        model: Optional[str] = None,
+    ) -> None:
+        if max_batch_size < 1 or max_concurrent_batches < 1:
+            raise ValueError("max_batch_size and max_concurrent_batches must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        self.batch_client = batch_client
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+        # Namespaces prompt-cache entries when used as an llm_client.
+        self.model = model or _client_model(batch_client)
+        self._is_async = _is_async_callable(batch_client)
+        # Batches and the dispatch semaphore are loop-bound, so keep one set per loop.
+        self._state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[_PendingBatch, asyncio.Semaphore]]"
+        self._state = weakref.WeakKeyDictionary()
+        self._background = _BackgroundLoop("llm-batcher")
+
+    def _loop_state(self) -> tuple[asyncio.AbstractEventLoop, _PendingBatch, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        state = self._state.get(loop)
+        if state is None:
+            state = self._state[loop] = (_PendingBatch(), asyncio.Semaphore(self.max_concurrent_batches))
+        return loop, state[0], state[1]
+
+    async def acomplete(self, prompt: str) -> str:
+        loop, pending, _ = self._loop_state()
+        future: asyncio.Future = loop.create_future()
+        pending.items.append((prompt, future, time.perf_counter()))
+        if len(pending.items) >= self.max_batch_size:
+            self._flush(loop)
+        elif pending.timer is None:
+            pending.timer = loop.call_later(self.max_wait_seconds, self._flush, loop)
+        return await future
+
+    def __call__(self, prompt: str) -> str:
+        return self._background.run(self.acomplete(prompt))
+
+    def close(self) -> None:
+        """Stop the background loop used by the sync API."""
+        self._background.stop()
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        pending, slots = self._state[loop]
+        if pending.timer is not None:
+            pending.timer.cancel()
+            pending.timer = None
+        items, pending.items = pending.items, []
+        # Callers cancelled while queued are dropped rather than sent to the backend.
+        items = [item for item in items if not item[1].done()]
+        if items:
+            loop.create_task(self._dispatch(items, slots))
+
+    async def _dispatch(self, items: list[tuple[str, asyncio.Future, float]], slots: asyncio.Semaphore) -> None:
+        async with slots:
+            dispatched = time.perf_counter()
+            for _, _, queued_at in items:
+                _BATCH_WAIT.observe(dispatched - queued_at)
+            _BATCHES.inc()
+            _BATCH_SIZE.observe(len(items))
+            prompts = [prompt for prompt, _, _ in items]
+            try:
+                if self._is_async:
+                    results = list(await self.batch_client(prompts))
+                else:
+                    results = list(await asyncio.to_thread(self.batch_client, prompts))
+                if len(results) != len(items):
+                    raise LLMError(f"Batch client returned {len(results)} results for {len(items)} prompts")
+            except Exception as exc:
+                results = [exc] * len(items)
+        for (_, future, _), result in zip(items, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            elif not isinstance(result, str):
+                future.set_exception(ValueError("LLM client must return a string response."))
+            else:
+                future.set_result(result)
+
+
+StreamingLLMCallable = Callable[[str], Union[str, Iterable[str]]]
+
+_FIRST_DELTA = histogram("llm.stream.first_delta_seconds")
+
+
+_END = object()
+
+
+def _check_delta(delta: Any) -> str:
+    if not isinstance(delta, str):
+        raise ValueError("LLM client must return a string response.")
+    return delta
+
+
+class LLMStream:
+    """Content deltas of one streamed completion, validated as they arrive.
+
+    Iterate to receive each delta; :attr:`content` holds the text so far and
+    :meth:`result` returns the same payload :func:`call_llm` would, draining
+    any deltas not yet read. :meth:`close` (or leaving a ``with`` block) stops
+    the underlying client early.
+    """
+
+    def __init__(self, prompt: str, chunks: Iterator[Any]) -> None:
+        self.prompt = prompt
+        self.done = False
+        self._chunks = chunks
+        self._parts: list[str] = []
+        self._started = time.perf_counter()
+
+    @property
+    def content(self) -> str:
+        return "".join(self._parts)
+
+    def __iter__(self) -> "LLMStream":
+        return self
+
+    def __next__(self) -> str:
+        if self.done:
+            raise StopIteration
+        try:
+            delta = _check_delta(next(self._chunks))
+        except StopIteration:
+            self.done = True
+            raise
+        except BaseException:
+            self.close()
+            raise
+        if not self._parts:
+            _FIRST_DELTA.observe(time.perf_counter() - self._started)
+        self._parts.append(delta)
+        return delta
+
+    def result(self) -> Dict[str, Any]:
+        for _ in self:
+            pass
+        return _payload(self.prompt, self.content)
+
+    def close(self) -> None:
+        self.done = True
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> "LLMStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class AsyncLLMStream:
+    """Async counterpart of :class:`LLMStream`."""
+
+    def __init__(self, prompt: str, chunks: AsyncIterator[Any]) -> None:
+        self.prompt = prompt
+        self.done = False
+        self._chunks = chunks
+        self._parts: list[str] = []
+        self._started = time.perf_counter()
+
+    @property
+    def content(self) -> str:
+        return "".join(self._parts)
+
+    def __aiter__(self) -> "AsyncLLMStream":
+        return self
+
+    async def __anext__(self) -> str:
+        if self.done:
+            raise StopAsyncIteration
+        try:
+            delta = _check_delta(await self._chunks.__anext__())
+        except StopAsyncIteration:
+            self.done = True
+            raise
+        except BaseException:
+            await self.aclose()
+            raise
+        if not self._parts:
+            _FIRST_DELTA.observe(time.perf_counter() - self._started)
+        self._parts.append(delta)
+        return delta
+
+    async def result(self) -> Dict[str, Any]:
+        async for _ in self:
+            pass
+        return _payload(self.prompt, self.content)
+
+    async def aclose(self) -> None:
+        self.done = True
+        aclose = getattr(self._chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    async def __aenter__(self) -> "AsyncLLMStream":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+def _iter_chunks(llm_client: StreamingLLMCallable, prompt: str) -> Iterator[Any]:
+    # Starts the client lazily, so nothing runs until the first delta is requested.
+    if isinstance(llm_client, LLMService):
+        yield from llm_client.stream(prompt)
+        return
+    output = llm_client(prompt)
+    if isinstance(output, str):
+        yield output
+    elif isinstance(output, Iterable) and not isinstance(output, (bytes, bytearray, dict)):
+        yield from output
+    else:
+        yield output  # rejected by _check_delta
+
+
+async def _aiter_chunks(llm_client: Any, prompt: str) -> AsyncIterator[Any]:
+    if llm_client is None:
+        yield _stub(prompt)
+    elif isinstance(llm_client, LLMService):
+        async with contextlib.aclosing(llm_client.astream(prompt)) as deltas:
+            async for delta in deltas:
+                yield delta
+    elif isinstance(llm_client, LLMBatcher):
+        yield await llm_client.acomplete(prompt)
+    else:
+        if _is_async_callable(llm_client):
+            output = llm_client(prompt)
+        else:
+            # Sync clients block, so call them (and step their generators) in a worker thread.
+            output = await asyncio.to_thread(llm_client, prompt)
+        if inspect.isawaitable(output):
+            output = await output
+        if isinstance(output, AsyncIterable):
+            async for delta in output:
+                yield delta
+        elif isinstance(output, Iterable) and not isinstance(output, (str, bytes, bytearray, dict)):
+            iterator = iter(output)
+            try:
+                while (delta := await asyncio.to_thread(next, iterator, _END)) is not _END:
+                    yield delta
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+        else:
+            yield output
+
+
+def stream_llm(
+    *,
+    prompt: Optional[str] = None,
+    prompt_intent: Optional[str] = None,
+    llm_client: Optional[StreamingLLMCallable] = None,
+) -> LLMStream:
+    """Streaming :func:`call_llm`: returns an :class:`LLMStream` of content deltas.
+
+    ``llm_client`` may return an iterable of string deltas (e.g. be a
+    generator function) or a plain string, which arrives as a single delta.
+    An :class:`LLMService` streams the endpoint's server-sent events, so
+    closing the stream early also stops the request. Streams bypass the prompt cache; their final payload has ``cached=False``.
+    """
+
+    prompt = _resolve_prompt(prompt, prompt_intent)
+    return LLMStream(prompt, _iter_chunks(llm_client or _stub, prompt))
+
+
+def astream_llm(
+    *,
+    prompt: Optional[str] = None,
+    prompt_intent: Optional[str] = None,
+    llm_client: Any = None,
+) -> AsyncLLMStream:
+    """Async :func:`stream_llm`; ``llm_client`` may also be an async generator function or coroutine."""
 
-    return {"ok": True, "prompt": prompt, "content": content}
+    prompt = _resolve_prompt(prompt, prompt_intent)
+    return AsyncLLMStream(prompt, _aiter_chunks(llm_client, prompt))
@@ -1,35 +1,338 @@
-"""Lightweight metrics helpers used by webhook handlers.
+"""Lightweight in-process metrics used by webhook handlers.
 
-This module intentionally keeps metric collection as no-ops so importing
-application modules never fails in environments where a metrics backend is not
-configured.
+Counters and histograms are sharded per thread: each writer thread updates
+its own cell without taking a lock, and readers merge all cells. When a thread
+exits its cell is folded into a base total, so short-lived threads do not grow
+the cell list. Histograms use
+fixed, exponentially spaced buckets, so memory stays constant no matter how
+many observations are recorded. Metric objects are created once and reused;
+the per-event-type handles behind :func:`record_webhook_received` and
+:func:`record_webhook_processed` are resolved by a single dict lookup, so
+recording a known event type allocates no metric-name strings.
 """
 
 from __future__ import annotations
 
-from collections import defaultdict
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from dataclasses import dataclass
 from threading import Lock
+from typing import Any, Iterable
 
 _LOCK = Lock()
-_COUNTERS: dict[str, int] = defaultdict(int)
-_DURATIONS: dict[str, list[float]] = defaultdict(list)
 
+# 100us .. ~74s in half-power-of-two steps; values above the last bound land in +Inf.
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = tuple(0.0001 * 2 ** (i / 2) for i in range(40))
 
-def _inc(name: str, value: int = 1) -> None:
+# Event types come from webhook payloads, so cap how many get their own series.
+MAX_EVENT_TYPES = 256
+OVERFLOW_EVENT_TYPE = "_other"
+# Event types that are not strings (payloads are untrusted JSON) share one series.
+INVALID_EVENT_TYPE = "_invalid"
+
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class _CellHolder:
+    """Lives in the thread-local next to a cell; its finalizer fires when the thread exits."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Sharded(ABC):
+    """Per-thread cells registered under a lock on first use by each thread.
+
+    ``family`` and ``labels`` describe how the metric is exposed; they default
+    to the metric name and no labels.
+    """
+
+    __slots__ = ("name", "family", "labels", "_local", "_cells", "_base", "_lock")
+
+    def __init__(self, name: str, *, family: str | None = None, labels: Labels = ()) -> None:
+        self.name = name
+        self.family = family or name
+        self.labels = labels
+        self._local = threading.local()
+        self._cells: dict[int, list[float]] = {}
+        self._base = self._new_cell()
+        self._lock = Lock()
+
+    @abstractmethod
+    def _new_cell(self) -> list[float]:
+        """Return a zeroed cell."""
+
+    def _cell(self) -> list[float]:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+            holder = _CellHolder()
+            with self._lock:
+                self._cells[id(cell)] = cell
+            weakref.finalize(holder, self._retire, cell).atexit = False
+            self._local.cell = cell
+            self._local.holder = holder
+            return cell
+
+    def _retire(self, cell: list[float]) -> None:
+        with self._lock:
+            for index, value in enumerate(cell):
+                self._base[index] += value
+            del self._cells[id(cell)]
+
+    def _all_cells(self) -> Iterable[list[float]]:
+        """The base total and every live cell; call with ``_lock`` held."""
+        yield self._base
+        yield from self._cells.values()
+
+
+class Counter(_Sharded):
+    """Monotonic counter; ``inc`` is lock-free after a thread's first call."""
+
+    __slots__ = ()
+
+    def _new_cell(self) -> list[float]:
+        return [0]
+
+    def inc(self, value: int = 1) -> None:
+        self._cell()[0] += value
+
+    def value(self) -> int:
+        with self._lock:
+            return sum(cell[0] for cell in self._all_cells())
+
+
+@dataclass(frozen=True, slots=True)
+class HistogramSnapshot:
+    bounds: tuple[float, ...]
+    counts: tuple[int, ...]  # len(bounds) + 1; the last entry is the +Inf bucket
+    count: int
+    total: float
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate the ``q`` quantile by linear interpolation within its bucket."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * ((rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.bounds[-1]
+
+    def merge(self, other: "HistogramSnapshot") -> "HistogramSnapshot":
+        if other.bounds != self.bounds:
+            raise ValueError("Cannot merge histograms with different buckets")
+        return HistogramSnapshot(
+            self.bounds,
+            tuple(a + b for a, b in zip(self.counts, other.counts)),
+            self.count + other.count,
+            self.total + other.total,
+        )
+
+
+class Histogram(_Sharded):
+    """Fixed-bucket histogram with per-thread count arrays."""
+
+    __slots__ = ("bounds",)
+
+    def __init__(
+        self,
+        name: str,
+        bounds: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+        *,
+        family: str | None = None,
+        labels: Labels = (),
+    ) -> None:
+        self.bounds = bounds  # _new_cell needs it during __init__
+        super().__init__(name, family=family, labels=labels)
+
+    def _new_cell(self) -> list[float]:
+        # bucket counts, then +Inf count, then running sum
+        return [0] * (len(self.bounds) + 1) + [0.0]
+
+    def observe(self, value: float) -> None:
+        cell = self._cell()
+        cell[bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    def snapshot(self) -> HistogramSnapshot:
+        width = len(self.bounds) + 1
+        counts = [0] * width
+        total = 0.0
+        with self._lock:
+            for cell in self._all_cells():
+                for index in range(width):
+                    counts[index] += cell[index]
+                total += cell[-1]
+        return HistogramSnapshot(self.bounds, tuple(counts), sum(counts), total)
+
+
+_COUNTERS: dict[str, Counter] = {}
+_HISTOGRAMS: dict[str, Histogram] = {}
+
+
+def counter(name: str, *, family: str | None = None, labels: Labels = ()) -> Counter:
+    """Return the process-wide counter ``name``, creating it on first use."""
+    metric = _COUNTERS.get(name)
+    if metric is None:
+        with _LOCK:
+            metric = _COUNTERS.setdefault(name, Counter(name, family=family, labels=labels))
+    return metric
+
+
+def histogram(
+    name: str,
+    bounds: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    *,
+    family: str | None = None,
+    labels: Labels = (),
+) -> Histogram:
+    """Return the process-wide histogram ``name``, creating it on first use."""
+    metric = _HISTOGRAMS.get(name)
+    if metric is None:
+        with _LOCK:
+            metric = _HISTOGRAMS.setdefault(name, Histogram(name, bounds, family=family, labels=labels))
+    return metric
+
+
+SeriesKey = tuple[str, Labels]
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsSnapshot:
+    """Point-in-time copy of every metric, keyed by ``(family, labels)``."""
+
+    counters: dict[SeriesKey, int]
+    histograms: dict[SeriesKey, HistogramSnapshot]
+
+    def merge(self, other: "MetricsSnapshot") -> "MetricsSnapshot":
+        counters = dict(self.counters)
+        for key, value in other.counters.items():
+            counters[key] = counters.get(key, 0) + value
+        histograms = dict(self.histograms)
+        for key, hist in other.histograms.items():
+            histograms[key] = histograms[key].merge(hist) if key in histograms else hist
+        return MetricsSnapshot(counters, histograms)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "counters": [
+                [family, [list(pair) for pair in labels], value] for (family, labels), value in self.counters.items()
+            ],
+            "histograms": [
+                [family, [list(pair) for pair in labels], list(h.bounds), list(h.counts), h.total]
+                for (family, labels), h in self.histograms.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "MetricsSnapshot":
+        counters = {(family, tuple(map(tuple, labels))): int(value) for family, labels, value in data.get("counters", [])}
+        histograms = {}
+        for family, labels, bounds, counts, total in data.get("histograms", []):
+            histograms[(family, tuple(map(tuple, labels)))] = HistogramSnapshot(
+                tuple(bounds), tuple(counts), sum(counts), float(total)
+            )
+        return cls(counters, histograms)
+
+
+def snapshot() -> MetricsSnapshot:
+    """Copy every counter and histogram.
+
+    Writers never wait on this: each metric's lock only guards its list of
+    per-thread cells, which writers touch once per thread.
+    """
     with _LOCK:
-        _COUNTERS[name] += value
+        counters = list(_COUNTERS.values())
+        histograms = list(_HISTOGRAMS.values())
+    counter_values: dict[SeriesKey, int] = {}
+    for metric in counters:
+        key = (metric.family, metric.labels)
+        counter_values[key] = counter_values.get(key, 0) + metric.value()
+    return MetricsSnapshot(
+        counter_values,
+        {(metric.family, metric.labels): metric.snapshot() for metric in histograms},
+    )
+
+
+def _inc(name: str, value: int = 1) -> None:
+    counter(name).inc(value)
 
 
 def _observe(name: str, value: float) -> None:
+    histogram(name).observe(value)
+
+
+_RECEIVED = counter("webhook.received")
+_PROCESSED = counter("webhook.processed")
+_SUCCESS = counter("webhook.success")
+_FAILURE = counter("webhook.failure")
+_DURATION = histogram("webhook.duration_seconds")
+
+
+@dataclass(frozen=True, slots=True)
+class _EventTypeHandles:
+    received: Counter
+    processed: Counter
+    duration: Histogram
+
+
+_EVENT_TYPE_HANDLES: dict[str, _EventTypeHandles] = {}
+
+
+def _event_type_label(event_type: Any) -> str:
+    return event_type if isinstance(event_type, str) else INVALID_EVENT_TYPE
+
+
+def _event_type_handles(event_type: Any) -> _EventTypeHandles:
+    event_type = _event_type_label(event_type)
+    handles = _EVENT_TYPE_HANDLES.get(event_type)
+    if handles is not None:
+        return handles
+    if len(_EVENT_TYPE_HANDLES) >= MAX_EVENT_TYPES:
+        event_type = OVERFLOW_EVENT_TYPE
+        handles = _EVENT_TYPE_HANDLES.get(event_type)
+        if handles is not None:
+            return handles
+    labels = (("event_type", event_type),)
+    received = counter(f"webhook.received.{event_type}", family="webhook.received.by_type", labels=labels)
+    processed = counter(f"webhook.processed.{event_type}", family="webhook.processed.by_type", labels=labels)
+    duration = histogram(
+        f"webhook.duration_seconds.{event_type}", family="webhook.duration_seconds.by_type", labels=labels
+    )
     with _LOCK:
-        _DURATIONS[name].append(value)
+        return _EVENT_TYPE_HANDLES.setdefault(event_type, _EventTypeHandles(received, processed, duration))
 
 
 def record_webhook_received(event_type: str | None = None) -> None:
     """Record that a webhook request was received."""
-    _inc("webhook.received")
+    _RECEIVED.inc()
     if event_type:
-        _inc(f"webhook.received.{event_type}")
+        _event_type_handles(event_type).received.inc()
+
+
+def record_webhooks_received(event_types: Iterable[str | None]) -> None:
+    """Record a batch of received webhooks with one update per counter."""
+    per_type: dict[str, int] = {}
+    total = 0
+    for event_type in event_types:
+        total += 1
+        if event_type:
+            label = _event_type_label(event_type)
+            per_type[label] = per_type.get(label, 0) + 1
+    if not total:
+        return
+    _RECEIVED.inc(total)
+    for event_type, count in per_type.items():
+        _event_type_handles(event_type).received.inc(count)
 
 
 def record_webhook_processed(
@@ -38,10 +341,13 @@ def record_webhook_processed(
     success: bool = True,
     duration_seconds: float | None = None,
 ) -> None:
-    """Record webhook processing outcome and optional latency."""
-    _inc("webhook.processed")
-    _inc("webhook.success" if success else "webhook.failure")
-    if event_type:
-        _inc(f"webhook.processed.{event_type}")
+    """Record webhook processing outcome and optional latency, overall and per event type."""
+    _PROCESSED.inc()
+    (_SUCCESS if success else _FAILURE).inc()
+    handles = _event_type_handles(event_type) if event_type else None
+    if handles is not None:
+        handles.processed.inc()
     if duration_seconds is not None:
-        _observe("webhook.duration_seconds", duration_seconds)
+        _DURATION.observe(duration_seconds)
+        if handles is not None:
+            handles.duration.observe(duration_seconds)
@@ -2,13 +2,20 @@
 
 from __future__ import annotations
 
-from time import perf_counter
+import asyncio
+import json
+import os
+import weakref
 from typing import Any
 
-from orchestrator.metrics import record_webhook_processed, record_webhook_received
+from orchestrator.event_router import event_router
+from orchestrator.idempotency import PENDING, IdempotencyCache, idempotency_key
+from orchestrator.metrics import counter, record_webhook_received, record_webhooks_received
+from orchestrator.webhook_queue import MemoryWebhookQueue, QueueFull, queue_from_env
+from orchestrator.worker import WebhookWorker
 
 try:  # pragma: no cover - exercised where fastapi is installed
-    from fastapi import APIRouter
+    from fastapi import APIRouter, HTTPException, Request
 except Exception:  # pragma: no cover - fallback for minimal environments
     class APIRouter:  # type: ignore[override]
         def __init__(self, *args: Any, **kwargs: Any) -> None:
@@ -21,22 +28,215 @@ except Exception:  # pragma: no cover - fallback for minimal environments
 
             return decorator
 
+    class HTTPException(Exception):  # type: ignore[override]
+        def __init__(self, status_code: int, detail: str, headers: dict[str, str] | None = None) -> None:
+            super().__init__(detail)
+            self.status_code = status_code
+            self.detail = detail
+            self.headers = headers
+
+    Request = Any  # type: ignore[misc,assignment]
+
 
 router = APIRouter(prefix="/webhook", tags=["webhook"])
 
+# Drained by ``python -m orchestrator.worker``; see orchestrator.webhook_queue for backends.
+# The default ``memory://`` queue is private to this process, so the API drains it
+# itself with an in-process worker unless ORCHESTRATOR_INLINE_WORKER=0.
+webhook_queue = queue_from_env()
+inline_worker_enabled = os.getenv("ORCHESTRATOR_INLINE_WORKER", "1") != "0"
+_inline_workers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[WebhookWorker, asyncio.Task]]
+_inline_workers = weakref.WeakKeyDictionary()
+idempotency_cache = IdempotencyCache(
+    max_entries=int(os.getenv("ORCHESTRATOR_IDEMPOTENCY_MAX_KEYS", "100000")),
+    ttl_seconds=float(os.getenv("ORCHESTRATOR_IDEMPOTENCY_TTL_SECONDS", "86400")),
+)
+
+_ENQUEUED = counter("webhook.enqueued")
+_REJECTED = counter("webhook.rejected")
+
+MAX_BATCH_EVENTS = int(os.getenv("ORCHESTRATOR_WEBHOOK_MAX_BATCH", "1000"))
+
+
+def _ensure_inline_worker() -> None:
+    """Start (or retarget) the in-process worker for a memory queue on the running loop."""
+    if not inline_worker_enabled or not isinstance(webhook_queue, MemoryWebhookQueue):
+        return
+    loop = asyncio.get_running_loop()
+    current = _inline_workers.get(loop)
+    if current is not None:
+        worker, task = current
+        if worker.queue is webhook_queue and not task.done():
+            return
+        worker.request_shutdown()
+    worker = WebhookWorker(
+        webhook_queue,
+        event_router,
+        concurrency=int(os.getenv("ORCHESTRATOR_WORKER_CONCURRENCY", "8")),
+        batch_size=int(os.getenv("ORCHESTRATOR_WORKER_BATCH_SIZE", "32")),
+        poll_interval_seconds=0.05,
+    )
+    _inline_workers[loop] = (worker, loop.create_task(worker.run()))
+
+
+def _in_flight() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="Delivery with this idempotency key is in progress",
+        headers={"Retry-After": "1"},
+    )
+
 
 @router.post("/")
-async def receive_webhook(payload: dict[str, Any]) -> dict[str, str]:
-    """Receive and acknowledge webhook payloads."""
-    event_type = payload.get("type") if isinstance(payload, dict) else None
-    start = perf_counter()
+async def receive_webhook(payload: dict[str, Any], request: Request) -> dict[str, str]:
+    """Enqueue a webhook payload and acknowledge it without processing inline.
+
+    Deliveries carrying an idempotency key (see ``orchestrator.idempotency``)
+    that were already accepted get their original acknowledgement back.
+    """
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=422, detail="event must be a JSON object")
+    event_type = payload.get("type")
+    if event_type is not None and not isinstance(event_type, str):
+        raise HTTPException(status_code=422, detail="event type must be a string")
     record_webhook_received(event_type)
+    key = idempotency_key(getattr(request, "headers", None), payload)
+    if key is not None:
+        cached = idempotency_cache.reserve(key)
+        if cached is PENDING:
+            raise _in_flight()
+        if cached is not None:
+            return cached
     try:
-        # Placeholder for domain processing logic.
-        return {"status": "ok"}
-    finally:
-        record_webhook_processed(
-            event_type,
-            success=True,
-            duration_seconds=perf_counter() - start,
+        event_id = await asyncio.to_thread(webhook_queue.put, payload)
+    except BaseException as exc:
+        # Any failure (queue full, storage error, cancelled request) means nothing was
+        # accepted, so free the key for the provider's retry instead of answering 409.
+        if key is not None:
+            idempotency_cache.release(key)
+        if not isinstance(exc, QueueFull):
+            raise
+        _REJECTED.inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Webhook queue is full",
+            headers={"Retry-After": str(exc.retry_after_seconds)},
+        ) from exc
+    _ENQUEUED.inc()
+    _ensure_inline_worker()
+    acknowledgement = {"status": "accepted", "event_id": str(event_id)}
+    if key is not None:
+        idempotency_cache.complete(key, acknowledgement)
+    return acknowledgement
+
+
+def _parse_batch(raw: bytes, content_type: str) -> list[tuple[Any, str | None]]:
+    """Split a batch body into ``(payload, error)`` pairs.
+
+    NDJSON lines are decoded independently so one bad line only fails that
+    event; a JSON array body must parse as a whole.
+    """
+    if "ndjson" in content_type or "jsonl" in content_type:
+        entries: list[tuple[Any, str | None]] = []
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append((json.loads(line), None))
+            except ValueError:
+                entries.append((None, "invalid JSON"))
+        return entries
+    try:
+        events = json.loads(raw) if raw else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Batch body is not valid JSON") from exc
+    if not isinstance(events, list):
+        raise HTTPException(status_code=422, detail="Batch body must be a JSON array or NDJSON")
+    return [(event, None) for event in events]
+
+
+@router.post("/batch")
+async def receive_webhook_batch(request: Request) -> dict[str, Any]:
+    """Validate and enqueue many events in one pass, reporting a status per event.
+
+    Events whose ``idempotency_key``/``delivery_id`` field was already accepted
+    are reported as ``duplicate`` with their original event id.
+    """
+    entries = _parse_batch(await request.body(), request.headers.get("content-type", ""))
+    if len(entries) > MAX_BATCH_EVENTS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_EVENTS} events")
+
+    results: list[dict[str, Any]] = [{} for _ in entries]
+    valid_indexes: list[int] = []
+    valid_payloads: list[dict[str, Any]] = []
+    valid_keys: list[str | None] = []
+    received_types: list[str | None] = []
+    duplicates = 0
+    for index, (payload, error) in enumerate(entries):
+        if error is None and not isinstance(payload, dict):
+            error = "event must be a JSON object"
+        if error is None and not isinstance(payload.get("type", ""), str):
+            error = "event type must be a string"
+        if error is not None:
+            results[index] = {"index": index, "status": "invalid", "error": error}
+            continue
+        received_types.append(payload.get("type"))
+        key = idempotency_key(None, payload)
+        if key is not None:
+            cached = idempotency_cache.reserve(key)
+            if cached is not None:
+                duplicates += 1
+                if cached is PENDING:
+                    results[index] = {"index": index, "status": "in_progress"}
+                else:
+                    results[index] = {"index": index, "status": "duplicate", "event_id": cached["event_id"]}
+                continue
+        valid_indexes.append(index)
+        valid_payloads.append(payload)
+        valid_keys.append(key)
+
+    record_webhooks_received(received_types)
+    try:
+        event_ids = await asyncio.to_thread(webhook_queue.put_many, valid_payloads) if valid_payloads else []
+    except BaseException:
+        for key in valid_keys:
+            if key is not None:
+                idempotency_cache.release(key)
+        raise
+    for position, index in enumerate(valid_indexes):
+        key = valid_keys[position]
+        if position < len(event_ids):
+            event_id = str(event_ids[position])
+            results[index] = {"index": index, "status": "accepted", "event_id": event_id}
+            if key is not None:
+                idempotency_cache.complete(key, {"status": "accepted", "event_id": event_id})
+        else:
+            results[index] = {"index": index, "status": "rejected", "error": "queue full"}
+            if key is not None:
+                idempotency_cache.release(key)
+
+    rejected = len(valid_payloads) - len(event_ids)
+    _ENQUEUED.inc(len(event_ids))
+    if event_ids:
+        _ensure_inline_worker()
+    if rejected:
+        _REJECTED.inc(rejected)
+    if valid_payloads and not event_ids:
+        retry_after = getattr(webhook_queue, "retry_after_seconds", 1)
+        raise HTTPException(
+            status_code=429,
+            detail="Webhook queue is full",
+            headers={"Retry-After": str(retry_after)},
         )
+    return {
+        "accepted": len(event_ids),
+        "rejected": rejected,
+        "duplicate": duplicates,
+        "invalid": len(entries) - len(valid_payloads) - duplicates,
+        "results": results,
+    }
+
+
+async def process_webhook_event(payload: dict[str, Any]) -> None:
+    """Run the handler registered in ``event_router`` for one dequeued webhook event."""
+    await event_router.dispatch(payload)
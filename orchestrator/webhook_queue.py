@@ -0,0 +1,334 @@
+"""Bounded webhook ingestion queues.
+
+The API enqueues webhook payloads and acknowledges immediately; the
+``orchestrator.worker`` process drains them. Two backends share one interface:
+
+- :class:`MemoryWebhookQueue` for single-process use and tests; the API
+  drains it with an in-process worker since no other process can see it.
+- :class:`SQLiteWebhookQueue`, a durable queue in a SQLite file (WAL mode) so
+  the API and worker containers can run decoupled over a shared volume.
+
+Consumers lease a batch with :meth:`get_batch`, then :meth:`ack` or
+:meth:`nack` each event, or :meth:`dead_letter` events that keep failing so
+they are kept for inspection instead of retried. Leases expire after
+``lease_seconds`` so events held by a crashed worker are redelivered. When
+``max_depth`` events are pending, :meth:`put` raises :class:`QueueFull`
+carrying a ``Retry-After`` hint.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+
+class QueueFull(Exception):
+    """Raised when a queue is at ``max_depth``; callers should retry later."""
+
+    def __init__(self, retry_after_seconds: int) -> None:
+        super().__init__("Webhook queue is full")
+        self.retry_after_seconds = retry_after_seconds
+
+
+@dataclass(frozen=True, slots=True)
+class QueuedEvent:
+    event_id: int
+    payload: Any
+    attempts: int
+    enqueued_at: float
+
+
+class WebhookQueue(Protocol):
+    def put(self, payload: Any) -> int: ...
+
+    def put_many(self, payloads: list[Any]) -> list[int]: ...
+
+    def get_batch(self, max_items: int) -> list[QueuedEvent]: ...
+
+    def ack(self, event_ids: list[int]) -> None: ...
+
+    def nack(self, event_ids: list[int]) -> None: ...
+
+    def dead_letter(self, event_ids: list[int]) -> None: ...
+
+    def dead_letters(self, max_items: int = 100) -> list[QueuedEvent]: ...
+
+    def depth(self) -> int: ...
+
+
+class MemoryWebhookQueue:
+    """Bounded in-process queue with the same lease semantics as the SQLite backend.
+
+    Only the newest ``max_dead_letters`` dead-lettered events are kept.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_depth: int = 10_000,
+        lease_seconds: float = 60.0,
+        retry_after_seconds: int = 1,
+        max_dead_letters: int = 1_000,
+    ) -> None:
+        self.max_depth = max_depth
+        self.lease_seconds = lease_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.max_dead_letters = max_dead_letters
+        self._lock = threading.Lock()
+        self._next_id = 1
+        # event_id -> [payload, attempts, enqueued_at, leased_until]
+        self._events: OrderedDict[int, list[Any]] = OrderedDict()
+        self._dead: OrderedDict[int, QueuedEvent] = OrderedDict()
+
+    def put(self, payload: Any) -> int:
+        with self._lock:
+            if len(self._events) >= self.max_depth:
+                raise QueueFull(self.retry_after_seconds)
+            event_id = self._next_id
+            self._next_id += 1
+            self._events[event_id] = [payload, 0, time.time(), 0.0]
+            return event_id
+
+    def put_many(self, payloads: list[Any]) -> list[int]:
+        """Enqueue as many ``payloads`` as fit, in order; returns ids of the accepted prefix."""
+        now = time.time()
+        with self._lock:
+            room = max(self.max_depth - len(self._events), 0)
+            first_id = self._next_id
+            for offset, payload in enumerate(payloads[:room]):
+                self._events[first_id + offset] = [payload, 0, now, 0.0]
+            accepted = min(room, len(payloads))
+            self._next_id += accepted
+        return list(range(first_id, first_id + accepted))
+
+    def get_batch(self, max_items: int) -> list[QueuedEvent]:
+        now = time.time()
+        batch = []
+        with self._lock:
+            for event_id, entry in self._events.items():
+                if len(batch) >= max_items:
+                    break
+                if entry[3] <= now:
+                    entry[1] += 1
+                    entry[3] = now + self.lease_seconds
+                    batch.append(QueuedEvent(event_id, entry[0], entry[1], entry[2]))
+        return batch
+
+    def ack(self, event_ids: list[int]) -> None:
+        with self._lock:
+            for event_id in event_ids:
+                self._events.pop(event_id, None)
+
+    def nack(self, event_ids: list[int]) -> None:
+        with self._lock:
+            for event_id in event_ids:
+                entry = self._events.get(event_id)
+                if entry is not None:
+                    entry[3] = 0.0
+
+    def dead_letter(self, event_ids: list[int]) -> None:
+        with self._lock:
+            for event_id in event_ids:
+                entry = self._events.pop(event_id, None)
+                if entry is not None:
+                    self._dead[event_id] = QueuedEvent(event_id, entry[0], entry[1], entry[2])
+            while len(self._dead) > self.max_dead_letters:
+                self._dead.popitem(last=False)
+
+    def dead_letters(self, max_items: int = 100) -> list[QueuedEvent]:
+        with self._lock:
+            return list(self._dead.values())[:max_items]
+
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+
+class SQLiteWebhookQueue:
+    """Durable queue stored in SQLite, safe across processes.
+
+    Pending events live in ``webhook_events``; triggers keep their count in
+    ``webhook_queue_depth`` so the depth check on every put is a single-row
+    read. Dead-lettered events move to ``webhook_dead_letters``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_depth: int = 100_000,
+        lease_seconds: float = 60.0,
+        retry_after_seconds: int = 1,
+        busy_timeout_seconds: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.max_depth = max_depth
+        self.lease_seconds = lease_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=busy_timeout_seconds, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS webhook_events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " payload TEXT NOT NULL,"
+                " enqueued_at REAL NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " leased_until REAL NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS webhook_events_lease ON webhook_events (leased_until, id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS webhook_dead_letters ("
+                " id INTEGER PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " enqueued_at REAL NOT NULL,"
+                " attempts INTEGER NOT NULL,"
+                " dead_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS webhook_queue_depth (id INTEGER PRIMARY KEY CHECK (id = 0), depth INTEGER NOT NULL)"
+            )
+            # Seeded from a one-off count so queues created before the counter existed stay correct.
+            self._conn.execute("INSERT OR IGNORE INTO webhook_queue_depth SELECT 0, COUNT(*) FROM webhook_events")
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS webhook_events_depth_insert AFTER INSERT ON webhook_events"
+                " BEGIN UPDATE webhook_queue_depth SET depth = depth + 1 WHERE id = 0; END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS webhook_events_depth_delete AFTER DELETE ON webhook_events"
+                " BEGIN UPDATE webhook_queue_depth SET depth = depth - 1 WHERE id = 0; END"
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def put(self, payload: Any) -> int:
+        encoded = json.dumps(payload, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                depth = self._depth()
+                if depth >= self.max_depth:
+                    raise QueueFull(self.retry_after_seconds)
+                cursor = self._conn.execute(
+                    "INSERT INTO webhook_events (payload, enqueued_at) VALUES (?, ?)", (encoded, time.time())
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return int(cursor.lastrowid)
+
+    def put_many(self, payloads: list[Any]) -> list[int]:
+        """Enqueue as many ``payloads`` as fit in one transaction; returns ids of the accepted prefix."""
+        encoded = [json.dumps(payload, separators=(",", ":")) for payload in payloads]
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                depth = self._depth()
+                ids = []
+                for item in encoded[: max(self.max_depth - depth, 0)]:
+                    cursor = self._conn.execute(
+                        "INSERT INTO webhook_events (payload, enqueued_at) VALUES (?, ?)", (item, now)
+                    )
+                    ids.append(int(cursor.lastrowid))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def get_batch(self, max_items: int) -> list[QueuedEvent]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, payload, attempts, enqueued_at FROM webhook_events"
+                    " WHERE leased_until <= ? ORDER BY id LIMIT ?",
+                    (now, max_items),
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE webhook_events SET attempts = attempts + 1, leased_until = ? WHERE id = ?",
+                        [(now + self.lease_seconds, row[0]) for row in rows],
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [QueuedEvent(row[0], json.loads(row[1]), row[2] + 1, row[3]) for row in rows]
+
+    def ack(self, event_ids: list[int]) -> None:
+        if not event_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM webhook_events WHERE id = ?", [(i,) for i in event_ids])
+
+    def nack(self, event_ids: list[int]) -> None:
+        if not event_ids:
+            return
+        with self._lock:
+            self._conn.executemany("UPDATE webhook_events SET leased_until = 0 WHERE id = ?", [(i,) for i in event_ids])
+
+    def dead_letter(self, event_ids: list[int]) -> None:
+        if not event_ids:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO webhook_dead_letters (id, payload, enqueued_at, attempts, dead_at)"
+                    " SELECT id, payload, enqueued_at, attempts, ? FROM webhook_events WHERE id = ?",
+                    [(now, i) for i in event_ids],
+                )
+                self._conn.executemany("DELETE FROM webhook_events WHERE id = ?", [(i,) for i in event_ids])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def dead_letters(self, max_items: int = 100) -> list[QueuedEvent]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts, enqueued_at FROM webhook_dead_letters ORDER BY id LIMIT ?", (max_items,)
+            ).fetchall()
+        return [QueuedEvent(row[0], json.loads(row[1]), row[2], row[3]) for row in rows]
+
+    def _depth(self) -> int:
+        (depth,) = self._conn.execute("SELECT depth FROM webhook_queue_depth WHERE id = 0").fetchone()
+        return int(depth)
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._depth()
+
+
+def queue_from_env() -> WebhookQueue:
+    """Build the queue named by ``ORCHESTRATOR_QUEUE_URL`` (``memory://`` or ``sqlite:///path``).
+
+    As with SQLAlchemy URLs, ``sqlite:///rel.db`` is relative and ``sqlite:////abs.db`` is absolute.
+    """
+    url = os.getenv("ORCHESTRATOR_QUEUE_URL", "memory://")
+    max_depth = int(os.getenv("ORCHESTRATOR_QUEUE_MAX_DEPTH", "10000"))
+    if url == "memory://":
+        return MemoryWebhookQueue(max_depth=max_depth)
+    if url.startswith("sqlite:///"):
+        return SQLiteWebhookQueue(url[len("sqlite:///") :], max_depth=max_depth)
+    raise ValueError(f"Unsupported ORCHESTRATOR_QUEUE_URL: {url}")
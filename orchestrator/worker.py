@@ -0,0 +1,155 @@
+"""Webhook worker process: ``python -m orchestrator.worker``.
+
+Drains :mod:`orchestrator.webhook_queue` in batches, runs up to
+``concurrency`` events at a time through the handlers registered in
+:data:`orchestrator.event_router.event_router`, and acknowledges each
+event once processed. Failed events are released for redelivery until
+``max_attempts``, then moved to the queue's dead letters and counted in
+``webhook.dead_lettered``.
+Queue errors (e.g. SQLite "database is locked" past the busy timeout) are
+logged and counted in ``webhook.worker.errors``, and the loop retries after
+``poll_interval``; events whose ack was lost are redelivered once their lease
+expires. SIGTERM/SIGINT stop fetching new batches and let the in-flight batch finish
+before exiting.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+from orchestrator.event_router import EventRouter, event_router
+from orchestrator.metrics import counter, record_webhook_processed
+from orchestrator.webhook_queue import MemoryWebhookQueue, QueuedEvent, WebhookQueue, queue_from_env
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[Any], Awaitable[None]] | EventRouter
+
+_DEAD_LETTERED = counter("webhook.dead_lettered")
+_LOOP_ERRORS = counter("webhook.worker.errors")
+
+
+class WebhookWorker:
+    def __init__(
+        self,
+        queue: WebhookQueue,
+        handler: EventHandler,
+        *,
+        concurrency: int = 8,
+        batch_size: int = 32,
+        poll_interval_seconds: float = 0.5,
+        max_attempts: int = 5,
+    ) -> None:
+        if concurrency < 1 or batch_size < 1:
+            raise ValueError("concurrency and batch_size must be >= 1")
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_attempts = max_attempts
+        self._stopping = asyncio.Event()
+        self.processed = 0
+
+    def request_shutdown(self) -> None:
+        """Stop after the in-flight batch; safe to call from a signal handler."""
+        self._stopping.set()
+
+    async def _process(self, event: QueuedEvent, slots: asyncio.Semaphore) -> bool:
+        if isinstance(self.handler, EventRouter):
+            # The router records metrics and takes ``slots`` after its per-type limit.
+            try:
+                await self.handler.dispatch(event.payload, slots=slots)
+            except Exception:
+                logger.exception("Webhook event %s failed (attempt %d)", event.event_id, event.attempts)
+                return False
+            return True
+        event_type = event.payload.get("type") if isinstance(event.payload, dict) else None
+        async with slots:
+            start = perf_counter()
+            try:
+                await self.handler(event.payload)
+            except Exception:
+                logger.exception("Webhook event %s failed (attempt %d)", event.event_id, event.attempts)
+                success = False
+            else:
+                success = True
+            record_webhook_processed(event_type, success=success, duration_seconds=perf_counter() - start)
+            return success
+
+    async def run_once(self) -> int:
+        """Lease, process and settle one batch; returns the batch size."""
+        batch = await asyncio.to_thread(self.queue.get_batch, self.batch_size)
+        if not batch:
+            return 0
+        slots = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._process(event, slots) for event in batch))
+
+        done = [event.event_id for event, ok in zip(batch, results) if ok]
+        retry, dead = [], []
+        for event, ok in zip(batch, results):
+            if not ok:
+                (dead if event.attempts >= self.max_attempts else retry).append(event.event_id)
+        if dead:
+            logger.error("Dead-lettering webhook events after %d attempts: %s", self.max_attempts, dead)
+            _DEAD_LETTERED.inc(len(dead))
+            await asyncio.to_thread(self.queue.dead_letter, dead)
+        await asyncio.to_thread(self.queue.ack, done)
+        await asyncio.to_thread(self.queue.nack, retry)
+        self.processed += len(done)
+        return len(batch)
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if await self.run_once():
+                    continue
+            except Exception:
+                _LOOP_ERRORS.inc()
+                logger.exception("Webhook worker iteration failed; retrying in %ss", self.poll_interval_seconds)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Webhook worker stopped after %d events", self.processed)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Drain the orchestrator webhook queue.")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("ORCHESTRATOR_WORKER_CONCURRENCY", "8")))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("ORCHESTRATOR_WORKER_BATCH_SIZE", "32")))
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+
+    queue = queue_from_env()
+    if isinstance(queue, MemoryWebhookQueue):
+        logger.warning(
+            "ORCHESTRATOR_QUEUE_URL is memory://; the API drains that queue itself and this worker "
+            "cannot see its events. Use a durable URL such as sqlite:///path to run them separately."
+        )
+    worker = WebhookWorker(
+        queue,
+        event_router,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        poll_interval_seconds=args.poll_interval,
+    )
+
+    async def serve() -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, worker.request_shutdown)
+        await worker.run()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
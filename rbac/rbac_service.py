@@ -3,10 +3,17 @@ import os
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from auth.security import require_service_signature
+from auth.replay_stores import replay_store_from_env
+from auth.security import ServiceSignatureVerifier
 
 app = FastAPI(title="rbac-service")
 
+# Workers must share replay state; see auth.replay_stores for RBAC_REPLAY_* settings.
+require_service_signature = ServiceSignatureVerifier(
+    replay_store=replay_store_from_env(),
+    max_body_bytes=int(os.getenv("RBAC_MAX_BODY_BYTES", str(10 * 1024 * 1024))),
+)
+
 allowed_origins_env = os.getenv("RBAC_ALLOWED_ORIGINS", "")
 allowed_origins = [o.strip() for o in allowed_origins_env.split(",") if o.strip()]
 if allowed_origins:
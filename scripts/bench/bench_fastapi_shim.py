@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Benchmark FastAPI shim dispatch on signed RBAC requests.
+
+Compares the previous model (a fresh event loop via ``asyncio.run`` per
+request) with the sync ``handle`` wrapper on the app's long-lived loop and
+with ``handle_async`` awaited directly on the caller's loop.
+
+Run from the repository root:
+
+    PYTHONPATH=. python scripts/bench/bench_fastapi_shim.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+
+os.environ.setdefault("RBAC_SECRET", "bench-secret")
+
+from rbac.rbac_service import app  # noqa: E402
+
+
+def signed_headers(i: int) -> dict[str, str]:
+    ts = str(int(time.time()))
+    signing = f"POST\n/verify\n{ts}\n{hashlib.sha256(b'').hexdigest()}"
+    sig = hmac.new(os.environ["RBAC_SECRET"].encode(), signing.encode(), hashlib.sha256).hexdigest()
+    return {"X-Service-Id": f"bench-{i}", "X-Timestamp": ts, "X-Signature": sig}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+    headers = [signed_headers(i) for i in range(args.requests * 3)]
+
+    def run(label: str, fn) -> None:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<32} {args.requests / elapsed:>10,.0f} req/s")
+
+    def per_request_loop() -> None:
+        for h in headers[: args.requests]:
+            assert asyncio.run(app.handle_async("POST", "/verify", h)).status_code == 200
+
+    def sync_wrapper() -> None:
+        for h in headers[args.requests : 2 * args.requests]:
+            assert app.handle("POST", "/verify", h).status_code == 200
+
+    async def on_caller_loop() -> None:
+        for h in headers[2 * args.requests :]:
+            assert (await app.handle_async("POST", "/verify", h)).status_code == 200
+
+    run("asyncio.run per request", per_request_loop)
+    run("handle (long-lived loop)", sync_wrapper)
+    run("handle_async (caller loop)", lambda: asyncio.run(on_caller_loop()))
+
+
+if __name__ == "__main__":
+    main()
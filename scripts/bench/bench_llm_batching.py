@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark micro-batched versus one-at-a-time LLM calls against a stub batch backend.
+
+The stub charges a fixed per-request overhead plus a small per-prompt cost and
+serves a limited number of requests at once, like a model server with a few
+GPU slots. Each of ``--callers`` coroutines issues prompts back to back.
+
+Run from the repository root:
+
+    PYTHONPATH=. python scripts/bench/bench_llm_batching.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from orchestrator.llm_util import LLMBatcher
+
+
+class StubBatchBackend:
+    def __init__(self, overhead_ms: float, per_item_ms: float, slots: int) -> None:
+        self.overhead = overhead_ms / 1000.0
+        self.per_item = per_item_ms / 1000.0
+        self.slots = slots
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def __call__(self, prompts: list[str]) -> list[str]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.slots)
+        async with self._semaphore:
+            await asyncio.sleep(self.overhead + self.per_item * len(prompts))
+        return [f"done:{prompt}" for prompt in prompts]
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def _run(complete, callers: int, calls_per_caller: int) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+
+    async def caller(index: int) -> None:
+        for call in range(calls_per_caller):
+            started = time.perf_counter()
+            await complete(f"{index}-{call}")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(i) for i in range(callers)))
+    return time.perf_counter() - started, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=64, help="concurrent callers")
+    parser.add_argument("--calls", type=int, default=20, help="sequential calls per caller")
+    parser.add_argument("--overhead-ms", type=float, default=10.0, help="backend cost per request")
+    parser.add_argument("--per-item-ms", type=float, default=0.2, help="backend cost per prompt")
+    parser.add_argument("--slots", type=int, default=4, help="requests the backend serves at once")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'calls/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    backend = StubBatchBackend(args.overhead_ms, args.per_item_ms, args.slots)
+
+    async def single(prompt: str) -> str:
+        return (await backend([prompt]))[0]
+
+    batcher = LLMBatcher(
+        backend,
+        max_batch_size=args.batch_size,
+        max_wait_ms=args.max_wait_ms,
+        max_concurrent_batches=args.slots,
+    )
+    for label, complete in (("single", single), ("batched", batcher.acomplete)):
+        backend._semaphore = None
+        elapsed, latencies = asyncio.run(_run(complete, args.callers, args.calls))
+        rate = len(latencies) / elapsed
+        p50, p99 = (_percentile(latencies, q) * 1000 for q in (0.5, 0.99))
+        print(f"{label:>10} {rate:>10,.0f} {p50:>8.1f} {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
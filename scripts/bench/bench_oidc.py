@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark OIDCValidator verifications per second with a warm and cold token cache.
+
+Run from the repository root:
+
+    PYTHONPATH=. python scripts/bench/bench_oidc.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import random
+import time
+
+from auth import oidc
+from auth.keyring import Keyring
+from auth.oidc import JWKSCache, OIDCValidator
+
+ISSUER = "https://issuer.bench"
+AUDIENCE = "agent-mesh"
+RNG = random.Random(7)
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _uint(value: int) -> str:
+    return _b64url(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+def _prime(bits: int) -> int:
+    while True:
+        n = RNG.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if all(pow(a, n - 1, n) == 1 for a in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)):
+            return n
+
+
+class Signer:
+    def __init__(self) -> None:
+        while True:
+            p, q = _prime(1024), _prime(1024)
+            phi = (p - 1) * (q - 1)
+            if p != q and phi % 65537:
+                break
+        self.rsa_n, self.rsa_d = p * q, pow(65537, -1, phi)
+        self.ec_d = RNG.randrange(1, oidc._N)
+        x, y, z = oidc._p256_double_mul(self.ec_d, oidc._G, 0, oidc._G)
+        z_inv = pow(z, -1, oidc._P)
+        self.ec_x, self.ec_y = x * z_inv**2 % oidc._P, y * z_inv**3 % oidc._P
+
+    def jwks(self) -> dict:
+        return {
+            "keys": [
+                {"kty": "RSA", "kid": "rsa", "n": _uint(self.rsa_n), "e": _uint(65537)},
+                {"kty": "EC", "kid": "ec", "crv": "P-256", "x": _uint(self.ec_x), "y": _uint(self.ec_y)},
+            ]
+        }
+
+    def token(self, alg: str, subject: str) -> str:
+        header = {"alg": alg, "kid": {"RS256": "rsa", "ES256": "ec"}.get(alg)}
+        claims = {"iss": ISSUER, "aud": AUDIENCE, "sub": subject, "exp": int(time.time()) + 3600}
+        encoded = [_b64url(json.dumps(part).encode()) for part in (header, claims)]
+        signing_input = ".".join(encoded).encode()
+        digest = hashlib.sha256(signing_input).digest()
+        if alg == "HS256":
+            sig = hmac.new(b"bench-secret", signing_input, hashlib.sha256).digest()
+        elif alg == "RS256":
+            size = (self.rsa_n.bit_length() + 7) // 8
+            suffix = oidc._SHA256_DIGEST_INFO + digest
+            em = b"\x00\x01" + b"\xff" * (size - len(suffix) - 3) + b"\x00" + suffix
+            sig = pow(int.from_bytes(em, "big"), self.rsa_d, self.rsa_n).to_bytes(size, "big")
+        else:
+            k = RNG.randrange(1, oidc._N)
+            r = oidc._p256_affine_x(oidc._p256_double_mul(k, oidc._G, 0, oidc._G)) % oidc._N
+            s = pow(k, -1, oidc._N) * (int.from_bytes(digest, "big") + r * self.ec_d) % oidc._N
+            sig = r.to_bytes(32, "big") + s.to_bytes(32, "big")
+        return f"{encoded[0]}.{encoded[1]}.{_b64url(sig)}"
+
+
+def rate(validator: OIDCValidator, tokens: list[str], seconds: float) -> float:
+    done = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        validator.validate(tokens[done % len(tokens)])
+        done += 1
+    return done / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--tokens", type=int, default=32)
+    args = parser.parse_args()
+
+    signer = Signer()
+    jwks = JWKSCache("https://idp.bench/jwks", fetcher=lambda _url: signer.jwks())
+    keyring = Keyring(default="bench-secret")
+
+    print(f"{'alg':>6}  {'cold/s':>10}  {'warm/s':>12}")
+    for alg in ("HS256", "RS256", "ES256"):
+        tokens = [signer.token(alg, f"user-{i}") for i in range(args.tokens)]
+        cold = OIDCValidator(issuer=ISSUER, audience=AUDIENCE, jwks=jwks, hs256_keyring=keyring, cache_size=0)
+        warm = OIDCValidator(issuer=ISSUER, audience=AUDIENCE, jwks=jwks, hs256_keyring=keyring)
+        for token in tokens:
+            warm.validate(token)
+        print(f"{alg:>6}  {rate(cold, tokens, args.seconds):>10,.0f}  {rate(warm, tokens, args.seconds):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
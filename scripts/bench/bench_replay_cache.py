@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Benchmark ReplayCache.check_and_store latency against live key count.
+
+Run from the repository root:
+
+    PYTHONPATH=. python scripts/bench/bench_replay_cache.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from auth.security import ReplayCache
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def bench(live_keys: int, ops: int, services: int) -> float:
+    cache = ReplayCache(shards=16, max_entries=live_keys + ops)
+    for i in range(live_keys):
+        cache.check_and_store(f"svc-{i % services}:{i}:prefill", 300, shard_key=f"svc-{i % services}")
+
+    start = time.perf_counter()
+    for i in range(ops):
+        service = f"svc-{i % services}"
+        cache.check_and_store(f"{service}:{i}:bench", 300, shard_key=service)
+    return (time.perf_counter() - start) / ops
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=50_000)
+    parser.add_argument("--services", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'live keys':>12}  {'ns/op':>10}")
+    for size in SIZES:
+        per_op = bench(size, args.ops, args.services)
+        print(f"{size:>12,}  {per_op * 1e9:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
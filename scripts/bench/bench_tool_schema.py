@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark compiled versus interpreted JSON-schema validation of tool arguments.
+
+Run from the repository root:
+
+    PYTHONPATH=. python scripts/bench/bench_tool_schema.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.tool_schema import compile_schema, validate
+
+LEAF = {
+    "type": "object",
+    "properties": {
+        "field": {"type": "string", "minLength": 1, "pattern": "^[a-z_]+$"},
+        "op": {"enum": ["eq", "lt", "gt", "in"]},
+        "value": {"type": ["string", "number", "null"]},
+    },
+    "required": ["field", "op"],
+    "additionalProperties": False,
+}
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string", "minLength": 1, "maxLength": 256},
+        "limit": {"type": "integer", "minimum": 1, "maximum": 1000},
+        "groups": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "filters": {"type": "array", "maxItems": 64, "items": LEAF},
+                    "weights": {"type": "array", "items": {"type": "number", "minimum": 0}},
+                },
+                "required": ["name", "filters"],
+            },
+        },
+    },
+    "required": ["query", "groups"],
+}
+
+
+def _payload(groups: int, filters: int) -> dict:
+    return {
+        "query": "nested payload",
+        "limit": 100,
+        "groups": [
+            {
+                "name": f"group-{g}",
+                "filters": [{"field": "field_name", "op": "eq", "value": i} for i in range(filters)],
+                "weights": [0.5] * filters,
+            }
+            for g in range(groups)
+        ],
+    }
+
+
+def _rate(check, payload, seconds: float) -> float:
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            check(payload)
+        calls += 100
+    return calls / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per measurement")
+    args = parser.parse_args()
+
+    compiled = compile_schema(SCHEMA)
+    print(f"{'payload':>16} {'interpreted/s':>14} {'compiled/s':>12} {'speedup':>8}")
+    for groups, filters in ((1, 1), (4, 8), (16, 32)):
+        payload = _payload(groups, filters)
+        interpreted = _rate(lambda value: validate(SCHEMA, value), payload, args.seconds)
+        fast = _rate(compiled, payload, args.seconds)
+        label = f"{groups}x{filters} filters"
+        print(f"{label:>16} {interpreted:>14,.0f} {fast:>12,.0f} {fast / interpreted:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
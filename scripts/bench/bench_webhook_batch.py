@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark webhook ingestion: one event per POST vs /webhook/batch.
+
+Requests go through the orchestrator app's async dispatch with an in-memory
+queue, so the numbers isolate per-request and JSON overhead.
+
+Run from the repository root:
+
+    PYTHONPATH=. python scripts/bench/bench_webhook_batch.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from orchestrator import webhook
+from orchestrator.api import app
+from orchestrator.webhook_queue import MemoryWebhookQueue
+
+
+async def single(events: list[dict]) -> float:
+    start = time.perf_counter()
+    for event in events:
+        response = await app.handle_async("POST", "/webhook/", json_body=event)
+        assert response.status_code == 200
+    return len(events) / (time.perf_counter() - start)
+
+
+async def batched(events: list[dict], batch_size: int, ndjson: bool) -> float:
+    headers = {"Content-Type": "application/x-ndjson" if ndjson else "application/json"}
+    bodies = []
+    for start in range(0, len(events), batch_size):
+        chunk = events[start : start + batch_size]
+        if ndjson:
+            bodies.append(b"\n".join(json.dumps(e).encode() for e in chunk))
+        else:
+            bodies.append(json.dumps(chunk).encode())
+    start = time.perf_counter()
+    for body in bodies:
+        response = await app.handle_async("POST", "/webhook/batch", headers, content=body)
+        assert response.status_code == 200
+    return len(events) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    events = [{"type": f"evt.{i % 8}", "id": i, "data": {"ok": True}} for i in range(args.events)]
+
+    def fresh_queue() -> None:
+        webhook.webhook_queue = MemoryWebhookQueue(max_depth=args.events + 1)
+
+    fresh_queue()
+    print(f"{'single POST per event':<28} {asyncio.run(single(events)):>12,.0f} events/s")
+    fresh_queue()
+    print(f"{'batch (JSON array)':<28} {asyncio.run(batched(events, args.batch_size, False)):>12,.0f} events/s")
+    fresh_queue()
+    print(f"{'batch (NDJSON)':<28} {asyncio.run(batched(events, args.batch_size, True)):>12,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
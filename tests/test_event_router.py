@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+import pytest
+
+from orchestrator import metrics
+from orchestrator.event_router import EventRouter
+from orchestrator.webhook_queue import MemoryWebhookQueue
+from orchestrator.worker import WebhookWorker
+
+
+def test_dispatch_routes_sync_handlers_to_threads_and_async_to_loop():
+    router = EventRouter(max_workers=2)
+    calls = []
+
+    @router.on("router.sync")
+    def sync_handler(payload):
+        calls.append(("sync", payload["n"], threading.current_thread() is threading.main_thread()))
+
+    @router.on("router.async")
+    async def async_handler(payload):
+        calls.append(("async", payload["n"], threading.current_thread() is threading.main_thread()))
+
+    async def scenario():
+        await router.dispatch({"type": "router.sync", "n": 1})
+        await router.dispatch({"type": "router.async", "n": 2})
+        await router.dispatch({"type": "router.unknown", "n": 3})
+
+    unrouted = metrics.counter("webhook.unrouted").value()
+    asyncio.run(scenario())
+    router.close()
+
+    assert calls == [("sync", 1, False), ("async", 2, True)]
+    assert metrics.counter("webhook.unrouted").value() == unrouted + 1
+    assert metrics.histogram("webhook.duration_seconds.router.sync").snapshot().count == 1
+    assert router.event_types() == ["router.async", "router.sync"]
+
+
+def test_default_handler_and_duplicate_registration():
+    router = EventRouter()
+    seen = []
+    router.register(None, lambda payload: seen.append(payload))
+    router.register("a", lambda payload: None)
+    with pytest.raises(ValueError):
+        router.register("a", lambda payload: None)
+
+    asyncio.run(router.dispatch({"type": "b"}))
+    router.close()
+    assert seen == [{"type": "b"}]
+
+
+def test_failures_are_recorded_and_propagate():
+    router = EventRouter()
+
+    @router.on("router.fail")
+    async def fail(payload):
+        raise RuntimeError("boom")
+
+    before = metrics.counter("webhook.failure").value()
+    with pytest.raises(RuntimeError):
+        asyncio.run(router.dispatch({"type": "router.fail"}))
+    assert metrics.counter("webhook.failure").value() == before + 1
+
+
+def test_per_type_limit_does_not_starve_other_types_in_worker():
+    router = EventRouter()
+    release = None
+    running = {"noisy": 0, "peak": 0}
+    quiet_done = []
+
+    @router.on("noisy", max_concurrency=1)
+    async def noisy(payload):
+        running["noisy"] += 1
+        running["peak"] = max(running["peak"], running["noisy"])
+        await release.wait()
+        running["noisy"] -= 1
+
+    @router.on("quiet")
+    async def quiet(payload):
+        quiet_done.append(payload["n"])
+        if len(quiet_done) == 2:
+            release.set()
+
+    queue = MemoryWebhookQueue()
+    for i in range(6):
+        queue.put({"type": "noisy", "n": i})
+    queue.put({"type": "quiet", "n": 0})
+    queue.put({"type": "quiet", "n": 1})
+    worker = WebhookWorker(queue, router, concurrency=2, batch_size=10)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        return await asyncio.wait_for(worker.run_once(), timeout=2)
+
+    assert asyncio.run(scenario()) == 8
+    assert quiet_done == [0, 1]
+    assert running["peak"] == 1
+    assert worker.processed == 8
@@ -0,0 +1,174 @@
+"""Routing and injection behaviour of the in-tree FastAPI shim."""
+
+import inspect
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+
+def test_static_and_parameterised_routes_resolve_in_registration_order():
+    app = FastAPI()
+
+    @app.get("/plans/{plan_id}")
+    def get_plan(plan_id: str) -> dict[str, str]:
+        return {"plan": plan_id}
+
+    @app.get("/plans/latest")
+    def latest() -> dict[str, str]:
+        return {"plan": "latest-static"}
+
+    @app.get("/plans/{plan_id}/steps/{step}")
+    def get_step(plan_id: str, step: str) -> dict[str, str]:
+        return {"plan": plan_id, "step": step}
+
+    @app.get("/health")
+    def health() -> dict[str, str]:
+        return {"status": "ok"}
+
+    client = TestClient(app)
+    assert client.get("/plans/a").json() == {"plan": "a"}
+    assert client.get("/plans/latest").json() == {"plan": "latest"}
+    assert client.get("/plans/a/steps/2").json() == {"plan": "a", "step": "2"}
+    assert client.get("/health").json() == {"status": "ok"}
+    assert client.get("/plans").status_code == 404
+    assert client.get("/plans/a/steps").status_code == 404
+    assert client.post("/health").status_code == 404
+
+
+def test_include_router_applies_prefix_and_injects_json_body():
+    router = APIRouter(prefix="/webhook")
+
+    @router.post("/")
+    async def receive(payload: dict) -> dict:
+        return {"received": payload["type"]}
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    assert client.post("/webhook/", json={"type": "push"}).json() == {"received": "push"}
+    assert client.post("/webhook/").status_code == 422
+
+
+def test_dispatch_does_not_reflect_on_callables(monkeypatch):
+    app = FastAPI()
+    seen = []
+
+    def dependency(request: Request) -> None:
+        if request.headers.get("x-deny"):
+            raise HTTPException(status_code=403, detail="denied")
+        seen.append(request.url.path)
+
+    @app.get("/items/{item_id}", dependencies=[Depends(dependency)])
+    def get_item(item_id: str, request: Request) -> dict[str, str]:
+        return {"item": item_id, "method": request.method}
+
+    def fail(*_args, **_kwargs):
+        raise AssertionError("inspect.signature called during dispatch")
+
+    monkeypatch.setattr(inspect, "signature", fail)
+    client = TestClient(app)
+    assert client.get("/items/7").json() == {"item": "7", "method": "GET"}
+    assert client.get("/items/7", headers={"X-Deny": "1"}).status_code == 403
+    assert seen == ["/items/7"]
+
+
+def test_handle_async_runs_on_callers_loop():
+    import asyncio
+
+    app = FastAPI()
+    loops = []
+
+    async def dependency() -> None:
+        loops.append(asyncio.get_running_loop())
+
+    @app.get("/ping", dependencies=[Depends(dependency)])
+    async def ping() -> dict[str, str]:
+        loops.append(asyncio.get_running_loop())
+        return {"pong": "1"}
+
+    async def scenario():
+        response = await app.handle_async("GET", "/ping")
+        return response, asyncio.get_running_loop()
+
+    response, caller_loop = asyncio.run(scenario())
+    assert response.json() == {"pong": "1"}
+    assert loops == [caller_loop, caller_loop]
+
+    # The sync wrapper reuses one background loop across calls.
+    loops.clear()
+    TestClient(app).get("/ping")
+    TestClient(app).get("/ping")
+    assert loops[0] is loops[2] and loops[0] is not caller_loop
+
+
+def test_asgi_interface_streams_request_body():
+    import asyncio
+    import json
+
+    app = FastAPI()
+
+    @app.post("/echo/{name}")
+    async def echo(name: str, payload: dict, request: Request) -> dict:
+        return {"name": name, "payload": payload, "bytes": len(await request.body())}
+
+    raw = json.dumps({"items": list(range(50))}).encode()
+    messages = [
+        {"type": "http.request", "body": raw[:10], "more_body": True},
+        {"type": "http.request", "body": raw[10:], "more_body": False},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/echo/x", "headers": [(b"content-type", b"application/json")]}
+    asyncio.run(app(scope, receive, send))
+
+    assert sent[0]["status"] == 200
+    assert json.loads(sent[1]["body"]) == {"name": "x", "payload": {"items": list(range(50))}, "bytes": len(raw)}
+
+
+def test_sync_handlers_and_dependencies_run_off_the_loop_thread():
+    import asyncio
+    import threading
+
+    app = FastAPI()
+    threads = []
+
+    def dependency() -> None:
+        threads.append(threading.get_ident())
+
+    @app.get("/block", dependencies=[Depends(dependency)])
+    def block() -> dict[str, str]:
+        threads.append(threading.get_ident())
+        return {"ok": "1"}
+
+    async def scenario():
+        response = await app.handle_async("GET", "/block")
+        return response, threading.get_ident()
+
+    response, loop_thread = asyncio.run(scenario())
+    assert response.json() == {"ok": "1"}
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_handle_from_the_apps_loop_thread_raises_instead_of_deadlocking():
+    app = FastAPI()
+
+    @app.get("/inner")
+    def inner() -> dict[str, str]:
+        return {"inner": "1"}
+
+    @app.get("/outer")
+    async def outer() -> dict[str, str]:
+        try:
+            app.handle("GET", "/inner")
+        except RuntimeError as exc:
+            return {"error": str(exc)}
+        return {"error": ""}
+
+    assert "handle_async" in TestClient(app).get("/outer").json()["error"]
@@ -0,0 +1,131 @@
+import sqlite3
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from orchestrator import idempotency, webhook
+from orchestrator.api import app
+from orchestrator.idempotency import PENDING, IdempotencyCache, idempotency_key
+from orchestrator.metrics import counter
+from orchestrator.webhook_queue import MemoryWebhookQueue
+
+
+@pytest.fixture(autouse=True)
+def no_inline_worker(monkeypatch):
+    """These tests inspect queue contents, so keep the API's in-process worker from draining it."""
+    monkeypatch.setattr(webhook, "inline_worker_enabled", False)
+
+
+def test_idempotency_key_prefers_headers_then_payload_fields():
+    assert idempotency_key({"x-github-delivery": "gh-1"}, {"delivery_id": "p-1"}) == "gh-1"
+    assert idempotency_key({}, {"delivery_id": "p-1"}) == "p-1"
+    assert idempotency_key(None, {"idempotency_key": ""}) is None
+
+
+def test_cache_reserve_complete_release_and_bounds(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(idempotency.time, "monotonic", lambda: now[0])
+    cache = IdempotencyCache(max_entries=2, ttl_seconds=10)
+
+    assert cache.reserve("a") is None
+    assert cache.reserve("a") is PENDING
+    cache.complete("a", {"event_id": "1"})
+    assert cache.reserve("a") == {"event_id": "1"}
+
+    assert cache.reserve("b") is None
+    cache.release("b")
+    assert cache.reserve("b") is None
+
+    assert cache.reserve("c") is None
+    assert len(cache) == 2
+    assert cache.reserve("a") is None  # evicted by the size bound
+
+    now[0] += 11
+    assert cache.reserve("c") is None  # expired
+    assert len(cache) == 1
+
+
+def test_receive_webhook_returns_original_ack_for_retried_delivery(monkeypatch):
+    queue = MemoryWebhookQueue(max_depth=10)
+    monkeypatch.setattr(webhook, "webhook_queue", queue)
+    monkeypatch.setattr(webhook, "idempotency_cache", IdempotencyCache())
+    hits = counter("webhook.idempotency.hit").value()
+    client = TestClient(app)
+    headers = {"X-GitHub-Delivery": "delivery-1"}
+
+    first = client.post("/webhook/", headers=headers, json={"type": "push"})
+    retry = client.post("/webhook/", headers=headers, json={"type": "push"})
+    other = client.post("/webhook/", json={"type": "push"})
+
+    assert first.json() == retry.json()
+    assert other.json()["event_id"] != first.json()["event_id"]
+    assert queue.depth() == 2
+    assert counter("webhook.idempotency.hit").value() == hits + 1
+
+
+def test_receive_webhook_releases_key_when_queue_is_full(monkeypatch):
+    queue = MemoryWebhookQueue(max_depth=1)
+    queue.put({"type": "filler"})
+    monkeypatch.setattr(webhook, "webhook_queue", queue)
+    monkeypatch.setattr(webhook, "idempotency_cache", IdempotencyCache())
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "k"}
+
+    assert client.post("/webhook/", headers=headers, json={"type": "push"}).status_code == 429
+    queue.ack([event.event_id for event in queue.get_batch(1)])
+    assert client.post("/webhook/", headers=headers, json={"type": "push"}).status_code == 200
+
+
+class BrokenQueue(MemoryWebhookQueue):
+    """Fails the first enqueue with a storage error, then behaves normally."""
+
+    def __init__(self):
+        super().__init__(max_depth=10)
+        self.failures = 1
+
+    def _maybe_fail(self):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+
+    def put(self, payload):
+        self._maybe_fail()
+        return super().put(payload)
+
+    def put_many(self, payloads):
+        self._maybe_fail()
+        return super().put_many(payloads)
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/webhook/", {"type": "push", "delivery_id": "d1"}),
+    ("/webhook/batch", [{"type": "push", "delivery_id": "d1"}]),
+])
+def test_enqueue_errors_release_the_key(monkeypatch, path, body):
+    monkeypatch.setattr(webhook, "webhook_queue", BrokenQueue())
+    monkeypatch.setattr(webhook, "idempotency_cache", IdempotencyCache())
+    client = TestClient(app)
+
+    with pytest.raises(sqlite3.OperationalError):
+        client.post(path, json=body)
+    retry = client.post(path, json=body)
+
+    assert retry.status_code == 200
+    assert webhook.webhook_queue.depth() == 1
+
+
+def test_batch_endpoint_reports_duplicates(monkeypatch):
+    queue = MemoryWebhookQueue(max_depth=10)
+    monkeypatch.setattr(webhook, "webhook_queue", queue)
+    monkeypatch.setattr(webhook, "idempotency_cache", IdempotencyCache())
+    client = TestClient(app)
+
+    first = client.post("/webhook/batch", json=[{"type": "push", "delivery_id": "d1"}]).json()
+    body = client.post(
+        "/webhook/batch", json=[{"type": "push", "delivery_id": "d1"}, {"type": "push", "delivery_id": "d2"}]
+    ).json()
+
+    assert body["accepted"] == 1 and body["duplicate"] == 1 and body["invalid"] == 0
+    assert body["results"][0] == {"index": 0, "status": "duplicate", "event_id": first["results"][0]["event_id"]}
+    assert queue.depth() == 2
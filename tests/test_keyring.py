@@ -0,0 +1,73 @@
+import hashlib
+import hmac
+import json
+import os
+
+import pytest
+
+from auth.keyring import Keyring, KeyringEmpty
+
+
+def _mac(secret: str, message: bytes) -> str:
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def test_env_keyring_accepts_current_and_previous(monkeypatch):
+    monkeypatch.setenv("TEST_SECRET", "new-secret")
+    monkeypatch.setenv("TEST_SECRET_PREVIOUS", "old-secret")
+    keyring = Keyring.from_env("TEST_SECRET")
+
+    assert keyring.verify(b"msg", _mac("new-secret", b"msg")) == "current"
+    assert keyring.verify(b"msg", _mac("old-secret", b"msg")) == "previous"
+    assert keyring.verify(b"msg", _mac("other", b"msg")) is None
+    assert keyring.sign(b"msg") == _mac("new-secret", b"msg")
+
+    stats = keyring.stats()
+    assert stats["current"].verified == 1
+    assert stats["previous"].verified == 1
+    assert stats[None].verified == 1
+
+
+def test_env_keyring_picks_up_rotation(monkeypatch):
+    monkeypatch.setenv("TEST_SECRET", "first")
+    monkeypatch.delenv("TEST_SECRET_PREVIOUS", raising=False)
+    keyring = Keyring.from_env("TEST_SECRET")
+    assert keyring.match_secret("first") == "current"
+
+    monkeypatch.setenv("TEST_SECRET", "second")
+    assert keyring.match_secret("first") is None
+    assert keyring.match_secret("second") == "current"
+
+
+def test_missing_secret_raises(monkeypatch):
+    monkeypatch.delenv("TEST_SECRET", raising=False)
+    monkeypatch.delenv("TEST_SECRET_PREVIOUS", raising=False)
+    with pytest.raises(KeyringEmpty, match="TEST_SECRET"):
+        Keyring.from_env("TEST_SECRET").sign(b"msg")
+    assert Keyring.from_env("TEST_SECRET", default="fallback").match_secret("fallback") == "current"
+
+
+def test_file_keyring_hot_reloads_and_bounds_active_keys(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"keys": [{"id": "k2", "secret": "s2"}, {"id": "k1", "secret": "s1"}]}))
+    keyring = Keyring(path=str(path), max_active_keys=2, reload_interval_seconds=0)
+    assert keyring.key_ids() == ["k2", "k1"]
+
+    path.write_text(
+        json.dumps({"keys": [{"id": "k3", "secret": "s3"}, {"id": "k2", "secret": "s2"}, {"id": "k1", "secret": "s1"}]})
+    )
+    os.utime(path, ns=(1, 10**18))
+    assert keyring.key_ids() == ["k3", "k2"]
+    assert keyring.verify(b"m", _mac("s1", b"m")) is None
+    assert keyring.verify(b"m", _mac("s3", b"m")) == "k3"
+
+
+def test_file_keyring_keeps_keys_on_bad_reload(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"keys": [{"id": "k1", "secret": "s1"}]}))
+    keyring = Keyring(path=str(path), reload_interval_seconds=0)
+    assert keyring.key_ids() == ["k1"]
+
+    path.write_text("{not json")
+    os.utime(path, ns=(1, 10**18))
+    assert keyring.key_ids() == ["k1"]
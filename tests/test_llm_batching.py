@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from orchestrator.llm_util import LLMBatcher, LLMError, acall_llm, call_llm
+
+
+class BatchBackend:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    async def __call__(self, prompts):
+        self.batches.append(list(prompts))
+        await asyncio.sleep(self.delay)
+        return [ValueError(f"bad {p}") if p.startswith("bad") else p.upper() for p in prompts]
+
+
+def test_flushes_when_batch_is_full():
+    backend = BatchBackend()
+    batcher = LLMBatcher(backend, max_batch_size=4, max_wait_ms=10_000)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.acomplete(f"p{i}") for i in range(8))), 2)
+
+    assert asyncio.run(scenario()) == [f"P{i}" for i in range(8)]
+    assert backend.batches == [["p0", "p1", "p2", "p3"], ["p4", "p5", "p6", "p7"]]
+
+
+def test_flushes_partial_batch_after_max_wait():
+    backend = BatchBackend()
+    batcher = LLMBatcher(backend, max_batch_size=100, max_wait_ms=20)
+
+    async def scenario():
+        started = time.perf_counter()
+        results = await asyncio.gather(*(batcher.acomplete(f"p{i}") for i in range(3)))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(scenario())
+
+    assert results == ["P0", "P1", "P2"]
+    assert backend.batches == [["p0", "p1", "p2"]]
+    assert 0.015 <= elapsed < 0.5
+
+
+def test_per_prompt_errors_stay_with_their_caller():
+    batcher = LLMBatcher(BatchBackend(), max_batch_size=3, max_wait_ms=10_000)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.acomplete("ok"), batcher.acomplete("bad one"), batcher.acomplete("fine"), return_exceptions=True
+        )
+
+    ok, bad, fine = asyncio.run(scenario())
+
+    assert ok == "OK" and fine == "FINE"
+    assert isinstance(bad, ValueError) and str(bad) == "bad bad one"
+
+
+def test_whole_batch_failures_reach_every_caller():
+    def broken(prompts):
+        raise RuntimeError("backend down")
+
+    def short(prompts):
+        return ["only one"]
+
+    async def run(client):
+        batcher = LLMBatcher(client, max_batch_size=2, max_wait_ms=10_000)
+        return await asyncio.gather(batcher.acomplete("a"), batcher.acomplete("b"), return_exceptions=True)
+
+    assert [str(e) for e in asyncio.run(run(broken))] == ["backend down", "backend down"]
+    assert all(isinstance(e, LLMError) for e in asyncio.run(run(short)))
+
+
+def test_concurrent_batches_are_bounded():
+    active = peak = 0
+
+    async def backend(prompts):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return prompts
+
+    batcher = LLMBatcher(backend, max_batch_size=2, max_wait_ms=1, max_concurrent_batches=2)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.acomplete(str(i)) for i in range(12)))
+
+    assert asyncio.run(scenario()) == [str(i) for i in range(12)]
+    assert peak == 2
+
+
+def test_cancelled_callers_are_not_sent():
+    backend = BatchBackend()
+    batcher = LLMBatcher(backend, max_batch_size=10, max_wait_ms=20)
+
+    async def scenario():
+        doomed = asyncio.ensure_future(batcher.acomplete("doomed"))
+        kept = asyncio.ensure_future(batcher.acomplete("kept"))
+        await asyncio.sleep(0)
+        doomed.cancel()
+        return await kept
+
+    assert asyncio.run(scenario()) == "KEPT"
+    assert backend.batches == [["kept"]]
+
+
+def test_sync_threads_share_batches_through_call_llm():
+    backend = BatchBackend()
+    batcher = LLMBatcher(backend, max_batch_size=8, max_wait_ms=50)
+    results = {}
+
+    def worker(i):
+        results[i] = call_llm(prompt=f"t{i}", llm_client=batcher)["content"]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    batcher.close()
+
+    assert results == {i: f"T{i}" for i in range(8)}
+    assert len(backend.batches) < 8
+
+
+def test_acall_llm_accepts_batcher():
+    batcher = LLMBatcher(lambda prompts: [p[::-1] for p in prompts], max_wait_ms=1)
+
+    assert asyncio.run(acall_llm(prompt="abc", llm_client=batcher))["content"] == "cba"
+
+
+def test_rejects_invalid_configuration():
+    with pytest.raises(ValueError):
+        LLMBatcher(lambda prompts: prompts, max_batch_size=0)
+    with pytest.raises(ValueError):
+        LLMBatcher(lambda prompts: prompts, max_wait_ms=-1)
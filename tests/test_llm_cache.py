@@ -0,0 +1,267 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from orchestrator import llm_util
+from orchestrator.llm_cache import PromptCache, normalize_prompt, prompt_cache_from_env, prompt_cache_key
+from orchestrator.llm_util import LLMService, acall_llm, call_llm
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, prompt):
+        self.calls.append(prompt)
+        return f"answer:{len(self.calls)}"
+
+
+def test_key_normalizes_whitespace_but_not_model_or_params():
+    assert normalize_prompt("  check\t deployment\n\nhealth ") == "check deployment health"
+    assert prompt_cache_key("check  health") == prompt_cache_key(" check health\n")
+    assert prompt_cache_key("check health") != prompt_cache_key("Check health")
+    assert prompt_cache_key("p", model="a") != prompt_cache_key("p", model="b")
+    assert prompt_cache_key("p", params={"temperature": 0}) != prompt_cache_key("p", params={"temperature": 1})
+    assert prompt_cache_key("p", params={"temperature": None}) == prompt_cache_key("p")
+
+
+def test_call_llm_marks_cached_responses():
+    cache = PromptCache()
+    client = CountingClient()
+
+    first = call_llm(prompt="check health", llm_client=client, cache=cache)
+    second = call_llm(prompt="  check   health ", llm_client=client, cache=cache)
+
+    assert first == {"ok": True, "prompt": "check health", "content": "answer:1", "cached": False}
+    assert second == {"ok": True, "prompt": "  check   health ", "content": "answer:1", "cached": True}
+    assert client.calls == ["check health"]
+
+
+def test_different_clients_do_not_share_entries():
+    cache = PromptCache()
+
+    assert call_llm(prompt="p", llm_client=str.upper, cache=cache)["content"] == "P"
+    assert call_llm(prompt="p", llm_client=str.title, cache=cache)["cached"] is False
+
+
+def test_anonymous_clients_with_one_qualname_do_not_share_entries():
+    cache = PromptCache()
+
+    def make(suffix):
+        return lambda prompt: prompt + suffix
+
+    assert call_llm(prompt="p", llm_client=make("1"), cache=cache)["content"] == "p1"
+    assert call_llm(prompt="p", llm_client=make("2"), cache=cache)["content"] == "p2"
+    assert call_llm(prompt="p", llm_client=CountingClient(), cache=cache)["cached"] is False
+    assert call_llm(prompt="p", llm_client=CountingClient().__call__, cache=cache)["cached"] is False
+
+    client = make("3")
+    call_llm(prompt="p", llm_client=client, cache=cache)
+    assert call_llm(prompt="p", llm_client=client, cache=cache)["cached"] is True
+
+
+def test_memory_tier_evicts_lru_and_expires():
+    clock = Clock()
+    cache = PromptCache(max_entries=2, ttl_seconds=10, clock=clock)
+    for prompt in ("a", "b"):
+        cache.get_or_compute(cache.key(prompt), lambda: prompt.upper())
+    cache.get_or_compute(cache.key("a"), lambda: "unused")  # refresh "a"
+    cache.get_or_compute(cache.key("c"), lambda: "C")
+
+    assert cache.get_or_compute(cache.key("a"), lambda: "new") == ("A", True)
+    assert cache.get_or_compute(cache.key("b"), lambda: "B2") == ("B2", False)
+
+    clock.now += 11
+    assert cache.get_or_compute(cache.key("a"), lambda: "A2") == ("A2", False)
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "llm.db")
+    client = CountingClient()
+    cache = PromptCache(path=path)
+    call_llm(prompt="intent", llm_client=client, cache=cache)
+    cache.close()
+
+    reopened = PromptCache(path=path)
+    result = call_llm(prompt="intent", llm_client=client, cache=reopened)
+
+    assert result["cached"] is True and result["content"] == "answer:1"
+    assert len(client.calls) == 1
+    assert len(reopened) == 1  # promoted into memory
+    reopened.close()
+
+
+def test_sqlite_tier_honours_ttl_and_size(tmp_path):
+    clock = Clock()
+    path = str(tmp_path / "llm.db")
+    cache = PromptCache(max_entries=1, path=path, max_disk_entries=10, ttl_seconds=60, clock=clock)
+    for i in range(25):
+        clock.now += 1
+        cache.get_or_compute(cache.key(f"p{i}"), lambda i=i: f"c{i}")
+
+    assert cache.disk_entries <= 10
+    assert cache.get_or_compute(cache.key("p24"), lambda: "recomputed") == ("c24", True)
+    assert cache.get_or_compute(cache.key("p0"), lambda: "recomputed") == ("recomputed", False)
+
+    clock.now += 61
+    assert cache.get_or_compute(cache.key("p23"), lambda: "fresh") == ("fresh", False)
+    cache.close()
+
+
+def test_concurrent_identical_prompts_are_coalesced():
+    cache = PromptCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow(prompt):
+        calls.append(prompt)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(call_llm(prompt="same", llm_client=slow, cache=cache)))
+        for _ in range(4)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["same"]
+    assert sorted(r["cached"] for r in results) == [False, True, True, True]
+
+
+def test_disk_tier_failures_degrade_to_misses(tmp_path, monkeypatch):
+    cache = PromptCache(path=str(tmp_path / "llm.db"))
+
+    def locked(*_args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache._disk, "get", locked)
+    monkeypatch.setattr(cache._disk, "put", locked)
+
+    assert cache.get_or_compute(cache.key("p"), lambda: "computed") == ("computed", False)
+    assert cache.get_or_compute(cache.key("p"), lambda: "unused") == ("computed", True)
+    assert asyncio.run(cache.aget_or_compute(cache.key("q"), _async_value("async"))) == ("async", False)
+    assert cache._inflight == {}
+    cache.close()
+
+
+def test_waiters_are_released_when_the_disk_write_fails(tmp_path, monkeypatch):
+    cache = PromptCache(path=str(tmp_path / "llm.db"))
+    started, release = threading.Event(), threading.Event()
+
+    def locked(*_args):
+        raise sqlite3.OperationalError("database is locked")
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    monkeypatch.setattr(cache._disk, "put", locked)
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute(cache.key("p"), slow)), daemon=True)
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(cache.get_or_compute(cache.key("p"), slow)), daemon=True)
+    waiter.start()
+    release.set()
+    leader.join(2)
+    waiter.join(2)
+
+    assert sorted(results) == [("done", False), ("done", True)]
+    cache.close()
+
+
+def test_reentrant_compute_does_not_wait_on_itself():
+    cache = PromptCache()
+    key = cache.key("p")
+
+    def outer():
+        inner, _ = cache.get_or_compute(key, lambda: "inner")
+        return f"outer({inner})"
+
+    results = []
+    runner = threading.Thread(target=lambda: results.append(cache.get_or_compute(key, outer)), daemon=True)
+    runner.start()
+    runner.join(2)
+
+    assert results == [("outer(inner)", False)]
+
+
+def _async_value(value):
+    async def compute():
+        return value
+
+    return compute
+
+
+def test_async_coalescing_and_errors_are_not_cached():
+    cache = PromptCache()
+    calls = []
+
+    async def client(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    async def scenario():
+        first = await asyncio.gather(*(acall_llm(prompt="p", llm_client=client, cache=cache) for _ in range(3)),
+                                     return_exceptions=True)
+        second = await acall_llm(prompt="p", llm_client=client, cache=cache)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in first)
+    assert second["content"] == "ok" and second["cached"] is False
+    assert len(calls) == 2
+
+
+def test_service_cache_keys_include_params():
+    client = CountingClient()
+    service = LLMService([], llm_client=client, cache=PromptCache())
+
+    assert service.call_llm(prompt="p")["cached"] is False
+    assert service.call_llm(prompt="p")["cached"] is True
+    assert service.call_llm(prompt="p", temperature=0.5)["cached"] is False
+    assert len(client.calls) == 2
+    service.close()
+
+
+def test_cache_is_opt_in_via_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("LLM_CACHE_URL", raising=False)
+    assert prompt_cache_from_env() is None
+    assert call_llm(prompt="p")["cached"] is False
+
+    monkeypatch.setattr(llm_util, "default_prompt_cache", PromptCache())
+    call_llm(prompt="p")
+    assert call_llm(prompt="p")["cached"] is True
+
+    monkeypatch.setenv("LLM_CACHE_URL", f"sqlite:///{tmp_path}/env.db")
+    monkeypatch.setenv("LLM_CACHE_TTL_SECONDS", "30")
+    cache = prompt_cache_from_env()
+    assert cache.ttl_seconds == 30.0 and cache.disk_entries == 0
+    cache.close()
+
+    monkeypatch.setenv("LLM_CACHE_URL", "redis://nope")
+    with pytest.raises(ValueError, match="Unsupported LLM_CACHE_URL"):
+        prompt_cache_from_env()
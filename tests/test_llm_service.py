@@ -0,0 +1,315 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from orchestrator.llm_transport import AsyncHTTPTransport
+from agents.tester import arun_tester_flow, run_tester_flow
+from orchestrator.llm_util import LLMError, LLMService, acall_llm, astream_llm, call_llm
+
+
+class StubModelServer:
+    """Local chat-completions server; ``script`` maps a call index to (status, delay, headers).
+
+    Streaming requests get ``deltas`` as server-sent events, ``delay`` apart.
+    """
+
+    def __init__(self, *, delay=0.0, script=None, deltas=("a", "b", "c")):
+        self.delay = delay
+        self.script = script or {}
+        self.deltas = deltas
+        self.events_sent = 0
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.bodies = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    index = server.calls
+                    server.calls += 1
+                    server.active += 1
+                    server.peak = max(server.peak, server.active)
+                    server.bodies.append((body, self.headers.get("Authorization")))
+                status, delay, headers = server.script.get(index, (200, server.delay, {}))
+                try:
+                    if status == 200 and body.get("stream"):
+                        return self._stream(delay)
+                    time.sleep(delay)
+                    if status == 200:
+                        prompt = body["messages"][0]["content"]
+                        payload = {"choices": [{"message": {"role": "assistant", "content": f"echo:{prompt}"}}]}
+                    else:
+                        payload = {"error": {"message": "stub failure"}}
+                    data = json.dumps(payload).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with server._lock:
+                        server.active -= 1
+
+            def _stream(self, delay):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                events = [{"choices": [{"delta": {"content": delta}}]} for delta in server.deltas]
+                try:
+                    for event in [*events, "[DONE]"]:
+                        data = event if isinstance(event, str) else json.dumps(event)
+                        frame = f"data: {data}\n\n".encode()
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(frame), frame))
+                        self.wfile.flush()
+                        server.events_sent += 1
+                        time.sleep(delay)
+                    self.wfile.write(b"0\r\n\r\n")
+                except OSError:
+                    self.close_connection = True  # the client stopped reading
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(**kwargs):
+        server = StubModelServer(**kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_acall_llm_reuses_keep_alive_connection(stub_server):
+    server = stub_server()
+    service = LLMService([server.url], model="stub-model", api_key="secret")
+
+    async def scenario():
+        results = [await service.acall_llm(prompt=f"p{i}") for i in range(5)]
+        await service.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert [r["content"] for r in results] == [f"echo:p{i}" for i in range(5)]
+    assert results[0] == {"ok": True, "prompt": "p0", "content": "echo:p0", "cached": False}
+    assert service.transport.connections_opened(server.url) == 1
+    body, authorization = server.bodies[0]
+    assert body["model"] == "stub-model"
+    assert authorization == "Bearer secret"
+
+
+def test_per_endpoint_concurrency_is_capped(stub_server):
+    server = stub_server(delay=0.05)
+    service = LLMService([server.url], max_concurrency_per_endpoint=3)
+
+    async def scenario():
+        results = await asyncio.gather(*(service.acomplete(f"p{i}") for i in range(12)))
+        await service.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert results == [f"echo:p{i}" for i in range(12)]
+    assert server.peak <= 3
+    assert service.transport.connections_opened(server.url) <= 3
+
+
+def test_retries_retryable_status_with_retry_after(stub_server):
+    server = stub_server(script={0: (503, 0, {}), 1: (429, 0, {"Retry-After": "0"})})
+    service = LLMService([server.url], max_retries=2, backoff_base_seconds=0.01)
+
+    assert service.call_llm(prompt="hello")["content"] == "echo:hello"
+    assert server.calls == 3
+    service.close()
+
+
+def test_gives_up_after_max_retries(stub_server):
+    server = stub_server(script={i: (503, 0, {}) for i in range(5)})
+    service = LLMService([server.url], max_retries=1, backoff_base_seconds=0.001)
+
+    with pytest.raises(LLMError) as info:
+        service.complete("hello")
+
+    assert info.value.status == 503 and info.value.retryable
+    assert server.calls == 2
+    service.close()
+
+
+def test_client_errors_are_not_retried(stub_server):
+    server = stub_server(script={0: (400, 0, {})})
+    service = LLMService([server.url], max_retries=3)
+
+    with pytest.raises(LLMError) as info:
+        service.complete("hello")
+
+    assert info.value.status == 400 and not info.value.retryable
+    assert server.calls == 1
+    service.close()
+
+
+def test_connection_errors_fail_over_to_next_endpoint(stub_server):
+    server = stub_server()
+    service = LLMService(["http://127.0.0.1:9/down", server.url], backoff_base_seconds=0.001)
+
+    assert service.complete("hello") == "echo:hello"
+    service.close()
+
+
+def test_hedged_request_wins_against_slow_endpoint(stub_server):
+    slow = stub_server(delay=1.0)
+    fast = stub_server()
+    service = LLMService([slow.url, fast.url], hedge_after_seconds=0.05)
+
+    async def scenario():
+        started = time.perf_counter()
+        content = await service.acomplete("hedge me")
+        elapsed = time.perf_counter() - started
+        await service.aclose()
+        return content, elapsed
+
+    content, elapsed = asyncio.run(scenario())
+
+    assert content == "echo:hedge me"
+    assert elapsed < 0.5
+    assert fast.calls == 1
+
+
+def test_without_endpoints_falls_back_to_offline_client(monkeypatch):
+    monkeypatch.delenv("LLM_ENDPOINTS", raising=False)
+
+    assert LLMService().call_llm(prompt="hi") == {"ok": True, "prompt": "hi", "content": "stub:hi", "cached": False}
+    assert LLMService(llm_client=str.upper).complete("hi") == "HI"
+
+
+def test_service_plugs_into_call_llm_and_acall_llm(stub_server):
+    server = stub_server()
+    service = LLMService([server.url])
+
+    assert call_llm(prompt="sync", llm_client=service)["content"] == "echo:sync"
+    assert asyncio.run(acall_llm(prompt="async", llm_client=service))["content"] == "echo:async"
+    service.close()
+
+
+def test_acall_llm_runs_sync_clients_off_the_loop():
+    async def async_client(prompt):
+        return prompt[::-1]
+
+    assert asyncio.run(acall_llm(prompt="abc", llm_client=async_client))["content"] == "cba"
+    assert asyncio.run(acall_llm(prompt="abc", llm_client=str.upper))["content"] == "ABC"
+    with pytest.raises(ValueError, match="`prompt` is required."):
+        asyncio.run(acall_llm())
+
+
+def test_sync_api_rejects_running_loop():
+    service = LLMService([], llm_client=str.upper)
+
+    async def scenario():
+        service.complete("x")
+
+    with pytest.raises(RuntimeError, match="acall_llm"):
+        asyncio.run(scenario())
+
+
+def test_transport_rejects_unsupported_urls():
+    transport = AsyncHTTPTransport()
+
+    with pytest.raises(ValueError, match="Unsupported URL"):
+        asyncio.run(transport.post_json("ftp://example.com/x", {}))
+
+
+def test_astream_yields_server_sent_deltas_and_reuses_the_connection(stub_server):
+    server = stub_server()
+    service = LLMService([server.url], model="stub-model")
+
+    async def scenario():
+        results = [await astream_llm(prompt="p", llm_client=service).result() for _ in range(2)]
+        await service.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert [r["content"] for r in results] == ["abc", "abc"]
+    assert server.bodies[0][0]["stream"] is True
+    assert service.transport.connections_opened(server.url) == 1
+
+
+def test_stream_is_retried_until_the_first_delta(stub_server):
+    server = stub_server(script={0: (503, 0, {"Retry-After": "0"})})
+    service = LLMService([server.url])
+
+    async def scenario():
+        deltas = [delta async for delta in service.astream("p")]
+        await service.aclose()
+        return deltas
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+    assert server.calls == 2
+
+
+def test_plain_json_reply_streams_as_one_delta(stub_server):
+    server = stub_server()
+    service = LLMService([server.url], request_builder=lambda prompt, model, params: {
+        "messages": [{"role": "user", "content": prompt}]
+    })
+
+    async def scenario():
+        deltas = [delta async for delta in service.astream("p")]
+        await service.aclose()
+        return deltas
+
+    assert asyncio.run(scenario()) == ["echo:p"]
+
+
+def test_tester_flow_stops_the_service_stream_early(stub_server):
+    server = stub_server(delay=0.2, deltas=("PASS", " because", " of", " many", " reasons"))
+    service = LLMService([server.url])
+    payload = {"intent": "check", "expect": "PASS"}
+
+    started = time.perf_counter()
+    result = run_tester_flow(payload, llm_client=service)
+    elapsed = time.perf_counter() - started
+    service.close()
+
+    assert result["passed"] is True
+    assert result["stopped_early"] is True
+    assert result["llm"]["content"] == "PASS"
+    assert elapsed < 0.5  # the full stream takes over a second
+
+    async def scenario():
+        result = await arun_tester_flow(payload, llm_client=service)
+        await service.aclose()
+        return result
+
+    started = time.perf_counter()
+    result = asyncio.run(scenario())
+    assert result["stopped_early"] is True
+    assert time.perf_counter() - started < 0.5
+    assert server.events_sent < 2 * 6
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from orchestrator.llm_util import LLMBatcher, astream_llm, call_llm, stream_llm
+
+
+def test_stream_yields_deltas_and_aggregates_payload():
+    def client(prompt):
+        yield "Hello"
+        yield ", "
+        yield prompt
+
+    stream = stream_llm(prompt="world", llm_client=client)
+
+    assert list(stream) == ["Hello", ", ", "world"]
+    assert stream.result() == call_llm(prompt="world", llm_client=lambda p: f"Hello, {p}")
+
+
+def test_plain_string_client_streams_as_one_delta():
+    stream = stream_llm(prompt="hi")
+
+    assert list(stream) == ["stub:hi"]
+    assert stream.result() == {"ok": True, "prompt": "hi", "content": "stub:hi", "cached": False}
+
+
+def test_invalid_delta_fails_and_stops_client():
+    closed = []
+
+    def client(prompt):
+        try:
+            yield "fine"
+            yield 42
+            yield "never"
+        finally:
+            closed.append(True)
+
+    stream = stream_llm(prompt="p", llm_client=client)
+    assert next(stream) == "fine"
+    with pytest.raises(ValueError, match="LLM client must return a string response."):
+        next(stream)
+    assert closed == [True]
+
+
+def test_closing_stream_stops_client_early():
+    produced = []
+
+    def client(prompt):
+        for i in range(100):
+            produced.append(i)
+            yield str(i)
+
+    with stream_llm(prompt="p", llm_client=client) as stream:
+        for delta in stream:
+            if delta == "2":
+                break
+
+    assert produced == [0, 1, 2]
+    assert stream.result()["content"] == "012"
+
+
+def test_prompt_is_validated_before_streaming():
+    with pytest.raises(ValueError, match="`prompt` is required."):
+        stream_llm()
+
+
+def test_async_stream_accepts_async_generators_and_plain_clients():
+    async def client(prompt):
+        for word in prompt.split():
+            await asyncio.sleep(0)
+            yield word + " "
+
+    async def scenario():
+        stream = astream_llm(prompt="a b c", llm_client=client)
+        deltas = [delta async for delta in stream]
+        batched = await astream_llm(
+            prompt="x", llm_client=LLMBatcher(lambda prompts: [p * 2 for p in prompts], max_wait_ms=1)
+        ).result()
+        return deltas, await stream.result(), batched
+
+    deltas, payload, batched = asyncio.run(scenario())
+
+    assert deltas == ["a ", "b ", "c "]
+    assert payload["content"] == "a b c "
+    assert batched["content"] == "xx"
+
+
+def test_async_stream_stops_early():
+    produced = []
+
+    async def client(prompt):
+        for i in range(100):
+            produced.append(i)
+            yield str(i)
+
+    async def scenario():
+        async with astream_llm(prompt="p", llm_client=client) as stream:
+            async for delta in stream:
+                if delta == "1":
+                    break
+        return await stream.result()
+
+    assert asyncio.run(scenario())["content"] == "01"
+    assert produced == [0, 1]
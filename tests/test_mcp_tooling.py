@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import threading
+import time
 from typing import Any
 
-from app import mcp_gateway
-from app.mcp_tooling import call_tool_by_name, register_tools
+import pytest
+
+from app import mcp_gateway, mcp_tooling
+from app.mcp_tooling import call_tool_by_name, call_tools_batch, register_tools
 from mcp_server import create_server
 
 
@@ -23,6 +29,12 @@ def _setup_registry() -> dict[str, Any]:
     return register_tools(FakeMCP())
 
 
+def _register_test_tool(monkeypatch, name: str, handler: Any) -> None:
+    # Snapshots are immutable, so restoring the current one undoes the add.
+    monkeypatch.setattr(mcp_tooling, "_REGISTRY", mcp_tooling.tool_registry())
+    mcp_tooling.add_tool(mcp_tooling.ToolSpec(name=name, handler=handler), replace=True)
+
+
 def test_registration_parity_between_gateway_and_server() -> None:
     mcp_a = FakeMCP()
     gateway_registry = mcp_gateway.initialize_gateway(mcp_a)
@@ -95,3 +107,253 @@ def test_dispatch_unauthorized() -> None:
     assert response["ok"] is False
     assert response["request_id"] == "req-4"
     assert response["error"]["code"] == "unauthorized"
+
+
+def test_batch_dispatch_keeps_order_and_reports_partial_failures() -> None:
+    _setup_registry()
+    requests = [
+        {"tool_name": "echo", "arguments": {"message": "a"}, "request_id": "b-1"},
+        {"tool_name": "echo", "arguments": {"message": ""}, "request_id": "b-2"},
+        {"tool_name": "nope", "request_id": "b-3"},
+        {"tool_name": "health.check", "request_id": "b-4", "authorization_header": None},
+        {"tool_name": "health.check", "request_id": "b-5"},
+    ]
+
+    responses = asyncio.run(mcp_gateway.dispatch_tool_requests(requests, "Bearer token"))
+
+    assert [r["request_id"] for r in responses] == ["b-1", "b-2", "b-3", "b-4", "b-5"]
+    assert responses[0]["result"] == {"message": "a"}
+    assert [r["error"]["code"] for r in responses[1:4]] == ["invalid_arguments", "tool_not_found", "unauthorized"]
+    assert responses[4] == {"ok": True, "request_id": "b-5", "tool_name": "health.check", "result": {"status": "ok"}}
+
+
+def test_batch_dispatch_runs_concurrently_with_per_call_timeouts(monkeypatch) -> None:
+    _setup_registry()
+
+    def slow_sync(**_: Any) -> str:
+        time.sleep(0.2)
+        return "sync"
+
+    async def slow_async(**_: Any) -> str:
+        await asyncio.sleep(0.2)
+        return "async"
+
+    async def hang(**_: Any) -> None:
+        await asyncio.sleep(10)
+
+    def boom(**_: Any) -> None:
+        raise RuntimeError("kaput")
+
+    for name, handler in {"slow.sync": slow_sync, "slow.async": slow_async, "hang": hang, "boom": boom}.items():
+        _register_test_tool(monkeypatch, name, handler)
+
+    requests = [{"tool_name": "slow.sync", "request_id": str(i)} for i in range(4)]
+    requests += [{"tool_name": "slow.async", "request_id": "a"}, {"tool_name": "hang"}, {"tool_name": "boom"}]
+    start = time.perf_counter()
+    responses = asyncio.run(call_tools_batch(requests, "Bearer token", timeout_seconds=0.5))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.9
+    assert [r.get("result") for r in responses[:5]] == ["sync"] * 4 + ["async"]
+    assert responses[5]["error"]["code"] == "timeout"
+    assert responses[6]["error"] == {"code": "execution_failed", "message": "RuntimeError: kaput", "details": None}
+
+
+def test_async_handlers_run_from_sync_and_async_entry_points(monkeypatch) -> None:
+    _setup_registry()
+
+    async def lookup(*, key: str) -> dict[str, str]:
+        await asyncio.sleep(0)
+        return {"key": key}
+
+    _register_test_tool(monkeypatch, "kv.get", lookup)
+
+    assert call_tool_by_name("kv.get", {"key": "a"}, "Bearer t", "r1")["result"] == {"key": "a"}
+    response = asyncio.run(mcp_tooling.acall_tool_by_name("kv.get", {"key": "b"}, "Bearer t", "r2"))
+    assert response == {"ok": True, "request_id": "r2", "tool_name": "kv.get", "result": {"key": "b"}}
+    assert mcp_tooling.ToolSpec("kv.get", lookup, lambda a: None).is_async
+
+
+def test_acall_propagates_deadline_to_nested_calls(monkeypatch) -> None:
+    _setup_registry()
+    seen: dict[str, float | None] = {}
+
+    def inner(**_: Any) -> str:
+        seen["inner"] = mcp_tooling.current_deadline()
+        return "inner"
+
+    async def outer(**_: Any) -> Any:
+        seen["outer"] = mcp_tooling.current_deadline()
+        nested = await mcp_tooling.acall_tool_by_name("inner", {}, "Bearer t", timeout_seconds=60)
+        return nested["result"]
+
+    _register_test_tool(monkeypatch, "inner", inner)
+    _register_test_tool(monkeypatch, "outer", outer)
+
+    response = asyncio.run(mcp_tooling.acall_tool_by_name("outer", {}, "Bearer t", timeout_seconds=5))
+    assert response["result"] == "inner"
+    assert seen["outer"] is not None and seen["inner"] == seen["outer"]
+
+    expired = asyncio.run(mcp_tooling.acall_tool_by_name("inner", {}, "Bearer t", deadline=time.monotonic() - 1))
+    assert expired["error"]["code"] == "timeout"
+
+
+def test_timeout_signals_cooperative_cancellation_to_sync_handlers(monkeypatch) -> None:
+    _setup_registry()
+    stopped = threading.Event()
+
+    def poll(**_: Any) -> None:
+        while not mcp_tooling.cancellation_requested():
+            time.sleep(0.005)
+        stopped.set()
+
+    _register_test_tool(monkeypatch, "poll", poll)
+    response = asyncio.run(mcp_tooling.acall_tool_by_name("poll", {}, "Bearer t", timeout_seconds=0.05))
+
+    assert response["error"]["code"] == "timeout"
+    assert stopped.wait(1)
+
+
+def test_wall_and_cpu_time_are_recorded_per_tool(monkeypatch) -> None:
+    _setup_registry()
+
+    def spin(**_: Any) -> None:
+        end = time.thread_time() + 0.02
+        while time.thread_time() < end:
+            pass
+
+    async def idle(**_: Any) -> None:
+        await asyncio.sleep(0.05)
+
+    _register_test_tool(monkeypatch, "spin", spin)
+    _register_test_tool(monkeypatch, "idle", idle)
+    asyncio.run(mcp_tooling.acall_tool_by_name("spin", {}, "Bearer t"))
+    asyncio.run(mcp_tooling.acall_tool_by_name("idle", {}, "Bearer t"))
+
+    spin_wall, spin_cpu = (h.snapshot() for h in mcp_tooling._tool_metrics("spin"))
+    idle_wall, idle_cpu = (h.snapshot() for h in mcp_tooling._tool_metrics("idle"))
+    assert spin_cpu.total >= 0.02 and spin_wall.count == 1
+    assert idle_wall.total >= 0.05 and idle_cpu.total < 0.02
+
+
+def test_servers_share_one_registry_snapshot() -> None:
+    gateway_mcp, server_mcp = FakeMCP(), FakeMCP()
+    gateway_registry = mcp_gateway.initialize_gateway(gateway_mcp)
+    server = create_server(server_mcp)
+
+    assert server.registry is gateway_registry is mcp_tooling.tool_registry()
+    with pytest.raises(TypeError):
+        gateway_registry["echo"] = lambda **_: None  # type: ignore[index]
+
+
+def test_add_and_remove_tool_swap_snapshots_without_disturbing_inflight_calls(monkeypatch) -> None:
+    mcp = FakeMCP()
+    register_tools(mcp)
+    monkeypatch.setattr(mcp_tooling, "_REGISTRY", mcp_tooling.tool_registry())
+    before = mcp_tooling.tool_registry()
+    started, release = threading.Event(), threading.Event()
+
+    def slow(**_: Any) -> str:
+        started.set()
+        release.wait(2)
+        return "finished"
+
+    after_add = mcp_tooling.add_tool(mcp_tooling.ToolSpec(name="hot.slow", handler=slow))
+    assert "hot.slow" not in before and "hot.slow" in after_add
+    assert after_add.version == before.version + 1
+    assert mcp.registered["hot.slow"] is slow
+    with pytest.raises(ValueError):
+        mcp_tooling.add_tool(mcp_tooling.ToolSpec(name="hot.slow", handler=slow))
+
+    async def scenario() -> dict[str, Any]:
+        call = asyncio.ensure_future(mcp_tooling.acall_tool_by_name("hot.slow", {}, "Bearer t"))
+        await asyncio.to_thread(started.wait, 2)
+        assert mcp_tooling.remove_tool("hot.slow")
+        release.set()
+        return await call
+
+    assert asyncio.run(scenario())["result"] == "finished"
+    assert call_tool_by_name("hot.slow", {}, "Bearer t")["error"]["code"] == "tool_not_found"
+    assert not mcp_tooling.remove_tool("hot.slow")
+
+
+async def _drain(stream: Any) -> list[dict[str, Any]]:
+    return [envelope async for envelope in stream]
+
+
+def test_streaming_generator_tools_yield_chunks_then_final_envelope(monkeypatch) -> None:
+    _setup_registry()
+
+    def lines(*, count: int = 3, **_: Any):
+        for i in range(count):
+            yield f"line {i}"
+
+    async def tokens(**_: Any):
+        for token in ("a", "b"):
+            await asyncio.sleep(0)
+            yield token
+
+    _register_test_tool(monkeypatch, "logs.tail", lines)
+    _register_test_tool(monkeypatch, "llm.tokens", tokens)
+
+    sync_stream = asyncio.run(_drain(mcp_gateway.stream_tool_request("logs.tail", {"count": 2}, "Bearer t", "s-1")))
+    assert sync_stream == [
+        {"ok": True, "request_id": "s-1", "tool_name": "logs.tail", "sequence": 0, "chunk": "line 0"},
+        {"ok": True, "request_id": "s-1", "tool_name": "logs.tail", "sequence": 1, "chunk": "line 1"},
+        {"ok": True, "request_id": "s-1", "tool_name": "logs.tail", "result": {"chunks": 2}, "done": True},
+    ]
+    async_stream = asyncio.run(_drain(mcp_tooling.astream_tool_by_name("llm.tokens", {}, "Bearer t")))
+    assert [e.get("chunk") for e in async_stream] == ["a", "b", None]
+
+    plain = asyncio.run(_drain(mcp_tooling.astream_tool_by_name("echo", {"message": "hi"}, "Bearer t")))
+    assert plain == [{"ok": True, "request_id": None, "tool_name": "echo", "result": {"message": "hi"}, "done": True}]
+    denied = asyncio.run(_drain(mcp_tooling.astream_tool_by_name("logs.tail", {}, None)))
+    assert denied[0]["error"]["code"] == "unauthorized" and denied[0]["done"] is True
+
+    assert call_tool_by_name("logs.tail", {"count": 2}, "Bearer t")["result"] == ["line 0", "line 1"]
+    assert asyncio.run(mcp_tooling.acall_tool_by_name("llm.tokens", {}, "Bearer t"))["result"] == ["a", "b"]
+
+
+def test_streaming_failure_follows_sent_chunks(monkeypatch) -> None:
+    _setup_registry()
+
+    async def partial(**_: Any):
+        yield 1
+        raise RuntimeError("disk gone")
+
+    _register_test_tool(monkeypatch, "partial", partial)
+    envelopes = asyncio.run(_drain(mcp_tooling.astream_tool_by_name("partial", {}, "Bearer t")))
+
+    assert envelopes[0]["chunk"] == 1
+    assert envelopes[1]["error"]["code"] == "execution_failed" and envelopes[1]["done"] is True
+
+
+def test_slow_consumer_throttles_sync_producer_and_close_stops_it(monkeypatch) -> None:
+    _setup_registry()
+    produced: list[int] = []
+    stopped = threading.Event()
+
+    def firehose(**_: Any):
+        try:
+            for i in range(1000):
+                produced.append(i)
+                yield i
+        finally:
+            stopped.set()
+
+    _register_test_tool(monkeypatch, "firehose", firehose)
+
+    async def scenario() -> list[int]:
+        seen = []
+        stream = mcp_tooling.astream_tool_by_name("firehose", {}, "Bearer t", max_buffered_chunks=2)
+        async with contextlib.aclosing(stream):
+            async for envelope in stream:
+                seen.append(envelope["chunk"])
+                await asyncio.sleep(0.02)
+                if len(seen) == 5:
+                    break
+        return seen
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+    assert stopped.wait(1)
+    assert len(produced) <= 5 + 2 + 2
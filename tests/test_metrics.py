@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from orchestrator import metrics
+
+
+def test_record_helpers_update_counters_and_histogram():
+    before_received = metrics.counter("webhook.received").value()
+    before_failure = metrics.counter("webhook.failure").value()
+    before_duration = metrics.histogram("webhook.duration_seconds").snapshot().count
+
+    metrics.record_webhook_received("metrics.test")
+    metrics.record_webhook_processed("metrics.test", success=False, duration_seconds=0.02)
+    metrics.record_webhook_processed(None, duration_seconds=None)
+
+    assert metrics.counter("webhook.received").value() == before_received + 1
+    assert metrics.counter("webhook.failure").value() == before_failure + 1
+    assert metrics.counter("webhook.received.metrics.test").value() == 1
+    assert metrics.counter("webhook.processed.metrics.test").value() == 1
+    assert metrics.histogram("webhook.duration_seconds").snapshot().count == before_duration + 1
+
+
+def test_counter_merges_per_thread_shards():
+    counter = metrics.Counter("test.sharded")
+
+    def work() -> None:
+        for _ in range(1000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value() == 8000
+
+
+def test_exited_threads_fold_their_cells_into_the_total():
+    counter = metrics.Counter("test.short_lived")
+    histogram = metrics.Histogram("test.short_lived_latency", bounds=(1.0,))
+
+    def work() -> None:
+        counter.inc(2)
+        histogram.observe(0.5)
+
+    for _ in range(50):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    assert counter.value() == 100
+    assert histogram.snapshot().counts == (50, 0)
+    assert len(counter._cells) == 0 and len(histogram._cells) == 0
+
+
+def test_sharded_requires_a_cell_factory():
+    with pytest.raises(TypeError):
+        metrics._Sharded("abstract")
+
+
+def test_histogram_memory_is_bounded_and_quantiles_are_estimated():
+    histogram = metrics.Histogram("test.latency", bounds=(0.01, 0.1, 1.0))
+    for _ in range(10_000):
+        histogram.observe(0.05)
+    histogram.observe(5.0)
+
+    snapshot = histogram.snapshot()
+    assert snapshot.counts == (0, 10_000, 0, 1)
+    assert snapshot.count == 10_001
+    assert abs(snapshot.total - 505.0) < 1e-6
+    assert 0.01 < snapshot.quantile(0.5) <= 0.1
+    assert snapshot.quantile(1.0) == 1.0
+    assert metrics.Histogram("empty").snapshot().quantile(0.5) is None
+
+
+def test_event_type_labels_are_capped(monkeypatch):
+    monkeypatch.setattr(metrics, "_EVENT_TYPE_HANDLES", {})
+    monkeypatch.setattr(metrics, "MAX_EVENT_TYPES", 2)
+
+    for event_type in ("cap.a", "cap.b", "cap.c", "cap.d"):
+        metrics.record_webhook_received(event_type)
+
+    assert set(metrics._EVENT_TYPE_HANDLES) == {"cap.a", "cap.b", metrics.OVERFLOW_EVENT_TYPE}
+    assert metrics._EVENT_TYPE_HANDLES[metrics.OVERFLOW_EVENT_TYPE].received.value() >= 2
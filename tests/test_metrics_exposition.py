@@ -0,0 +1,107 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from orchestrator import metrics
+from orchestrator.api import app
+from orchestrator.exposition import OPENMETRICS_CONTENT_TYPE, MetricsExporter, render_openmetrics
+from orchestrator.metrics import HistogramSnapshot, MetricsSnapshot
+
+
+def _snapshot(received: int, bucket_counts: tuple[int, int, int]) -> MetricsSnapshot:
+    return MetricsSnapshot(
+        counters={
+            ("webhook.received", ()): received,
+            ("webhook.received.by_type", (("event_type", 'we"ird'),)): 1,
+        },
+        histograms={
+            ("webhook.duration_seconds", ()): HistogramSnapshot((0.1, 1.0), bucket_counts, sum(bucket_counts), 0.5),
+        },
+    )
+
+
+def test_render_openmetrics_counters_buckets_and_quantiles():
+    text = render_openmetrics(_snapshot(3, (2, 1, 1)), quantiles=(0.5,))
+
+    assert "# TYPE webhook_received counter\nwebhook_received_total 3\n" in text
+    assert 'webhook_received_by_type_total{event_type="we\\"ird"} 1' in text
+    assert 'webhook_duration_seconds_bucket{le="0.1"} 2' in text
+    assert 'webhook_duration_seconds_bucket{le="+Inf"} 4' in text
+    assert "webhook_duration_seconds_count 4" in text
+    assert 'webhook_duration_seconds_estimated_quantile{quantile="0.5"} 0.1' in text
+    assert text.endswith("# EOF\n")
+
+
+def test_snapshot_round_trip_and_merge():
+    merged = _snapshot(3, (2, 1, 1)).merge(MetricsSnapshot.from_dict(_snapshot(4, (0, 0, 2)).to_dict()))
+
+    assert merged.counters[("webhook.received", ())] == 7
+    assert merged.histograms[("webhook.duration_seconds", ())].counts == (2, 1, 3)
+
+
+def test_exporter_merges_sibling_worker_files_and_caches(tmp_path):
+    sibling = tmp_path / f"metrics-{os.getppid()}.json"
+    sibling.write_text(json.dumps(MetricsSnapshot({("webhook.received", ()): 1000}, {}).to_dict()))
+    (tmp_path / "metrics-bad.json").write_text("{oops")
+    exporter = MetricsExporter(directory=str(tmp_path), cache_seconds=60)
+
+    local = metrics.counter("webhook.received").value()
+    first = exporter.render()
+    assert f"webhook_received_total {local + 1000}" in first
+
+    metrics.record_webhook_received()
+    assert exporter.render() is first
+
+    exporter.flush()
+    assert os.path.exists(tmp_path / f"metrics-{os.getpid()}.json")
+
+
+def test_exporter_archives_files_of_dead_workers(tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    payload = json.dumps(MetricsSnapshot({("webhook.received", ()): 1000}, {}).to_dict())
+    (tmp_path / f"metrics-{dead.pid}.json").write_text(payload)
+    exporter = MetricsExporter(directory=str(tmp_path), cache_seconds=0)
+
+    local = metrics.counter("webhook.received").value()
+    assert f"webhook_received_total {local + 1000}\n" in exporter.render()
+    assert sorted(os.listdir(tmp_path)) == [".metrics.lock", "metrics-archive.json"]
+    # The archived total survives later scrapes, so the counter never goes backwards.
+    assert f"webhook_received_total {local + 1000}\n" in exporter.render()
+
+
+def test_exporter_archives_its_own_totals_on_stop(tmp_path):
+    exporter = MetricsExporter(directory=str(tmp_path), flush_interval_seconds=0.01)
+    exporter.start()
+    time.sleep(0.05)
+    assert os.path.exists(tmp_path / f"metrics-{os.getpid()}.json")
+
+    exporter.stop()
+    assert not os.path.exists(tmp_path / f"metrics-{os.getpid()}.json")
+    archived = MetricsSnapshot.from_dict(json.loads((tmp_path / "metrics-archive.json").read_text()))
+    assert archived.counters[("webhook.received", ())] == metrics.counter("webhook.received").value()
+
+
+def test_metrics_route_serves_openmetrics_text():
+    metrics.record_webhook_processed("route.test", duration_seconds=0.01)
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.media_type == OPENMETRICS_CONTENT_TYPE
+    assert "# TYPE webhook_duration_seconds histogram" in response.text
+
+
+def test_non_string_event_types_do_not_break_scrapes():
+    client = TestClient(app)
+    for event_type in (5, {"a": 1}):
+        assert client.post("/webhook/", json={"type": event_type}).status_code == 422
+    metrics.record_webhooks_received([7, ["x"], "ok.type"])
+    metrics.record_webhook_processed({"b": 2}, duration_seconds=0.01)
+
+    text = render_openmetrics(metrics.snapshot())
+    assert f'webhook_received_by_type_total{{event_type="{metrics.INVALID_EVENT_TYPE}"}}' in text
+    assert client.get("/metrics").status_code == 200
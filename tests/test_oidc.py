@@ -0,0 +1,268 @@
+"""Tests for auth.oidc with locally generated HS256, RS256 and ES256 keys."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import io
+import json
+import random
+import threading
+import time
+
+import pytest
+
+from auth import oidc, security
+from auth.keyring import Keyring
+from auth.oidc import JWKSCache, OIDCValidator, TokenValidationError
+from fastapi import HTTPException, Request
+
+ISSUER = "https://issuer.internal"
+AUDIENCE = "agent-mesh"
+NOW = 2_000_000_000
+RNG = random.Random(1234)
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _uint(value: int) -> str:
+    return _b64url(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+def _is_probable_prime(n: int) -> bool:
+    if n < 2 or n % 2 == 0:
+        return n == 2
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d, r = d // 2, r + 1
+    for _ in range(16):
+        x = pow(RNG.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _prime(bits: int) -> int:
+    while True:
+        candidate = RNG.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if _is_probable_prime(candidate):
+            return candidate
+
+
+def _rsa_keypair() -> tuple[int, int, int]:
+    e = 65537
+    while True:
+        p, q = _prime(512), _prime(512)
+        phi = (p - 1) * (q - 1)
+        if p != q and phi % e:
+            return p * q, e, pow(e, -1, phi)
+
+
+RSA_N, RSA_E, RSA_D = _rsa_keypair()
+EC_D = RNG.randrange(1, oidc._N)
+
+
+def _ec_public() -> tuple[int, int]:
+    x, y, z = oidc._p256_double_mul(EC_D, oidc._G, 0, oidc._G)
+    z_inv = pow(z, -1, oidc._P)
+    return x * z_inv * z_inv % oidc._P, y * z_inv * z_inv * z_inv % oidc._P
+
+
+def _sign(alg: str, signing_input: bytes) -> bytes:
+    if alg == "HS256":
+        return hmac.new(b"hs-secret", signing_input, hashlib.sha256).digest()
+    if alg == "RS256":
+        size = (RSA_N.bit_length() + 7) // 8
+        suffix = oidc._SHA256_DIGEST_INFO + hashlib.sha256(signing_input).digest()
+        encoded = b"\x00\x01" + b"\xff" * (size - len(suffix) - 3) + b"\x00" + suffix
+        return pow(int.from_bytes(encoded, "big"), RSA_D, RSA_N).to_bytes(size, "big")
+    z = int.from_bytes(hashlib.sha256(signing_input).digest(), "big")
+    while True:
+        k = RNG.randrange(1, oidc._N)
+        r = oidc._p256_affine_x(oidc._p256_double_mul(k, oidc._G, 0, oidc._G)) % oidc._N
+        s = pow(k, -1, oidc._N) * (z + r * EC_D) % oidc._N
+        if r and s:
+            return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+
+def build_jwt(claims: dict, *, alg: str = "HS256", kid: str | None = None) -> str:
+    header = {"alg": alg, "typ": "JWT", **({"kid": kid} if kid else {})}
+    encoded = [_b64url(json.dumps(part, separators=(",", ":")).encode()) for part in (header, claims)]
+    signing_input = ".".join(encoded).encode()
+    return f"{encoded[0]}.{encoded[1]}.{_b64url(_sign(alg, signing_input))}"
+
+
+def _claims(**overrides) -> dict:
+    return {"iss": ISSUER, "aud": AUDIENCE, "sub": "user-123", "exp": NOW + 300, **overrides}
+
+
+def _jwks() -> dict:
+    ec_x, ec_y = _ec_public()
+    return {
+        "keys": [
+            {"kty": "RSA", "kid": "rsa-1", "n": _uint(RSA_N), "e": _uint(RSA_E)},
+            {"kty": "EC", "kid": "ec-1", "crv": "P-256", "x": _uint(ec_x), "y": _uint(ec_y)},
+        ]
+    }
+
+
+@pytest.fixture
+def validator(monkeypatch) -> OIDCValidator:
+    monkeypatch.setenv("OIDC_TEST_SECRET", "hs-secret")
+    jwks = JWKSCache("https://idp.invalid/jwks", fetcher=lambda _url: _jwks())
+    return OIDCValidator(
+        issuer=ISSUER,
+        audience=AUDIENCE,
+        jwks=jwks,
+        hs256_keyring=Keyring.from_env("OIDC_TEST_SECRET"),
+        clock=lambda: NOW,
+    )
+
+
+@pytest.mark.parametrize("alg, kid", [("HS256", None), ("RS256", "rsa-1"), ("ES256", "ec-1")])
+def test_accepts_valid_tokens_for_each_algorithm(validator, alg, kid):
+    token = build_jwt(_claims(aud=["other", AUDIENCE]), alg=alg, kid=kid)
+    assert validator.validate(token)["sub"] == "user-123"
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [
+        _claims(iss="https://evil.example"),
+        _claims(aud="different-aud"),
+        _claims(exp=NOW - 60),
+        _claims(nbf=NOW + 120),
+        _claims(exp=float("inf")),
+        _claims(exp=float("nan")),
+        _claims(nbf=float("-inf")),
+        {"iss": ISSUER, "aud": AUDIENCE},
+    ],
+)
+def test_rejects_invalid_claims(validator, claims):
+    with pytest.raises(TokenValidationError):
+        validator.validate(build_jwt(claims, alg="ES256", kid="ec-1"))
+
+
+def test_rejects_tampered_signature_and_alg_none(validator):
+    header, claims, sig = build_jwt(_claims(), alg="RS256", kid="rsa-1").split(".")
+    forged_claims = _b64url(json.dumps(_claims(sub="admin")).encode())
+    with pytest.raises(TokenValidationError, match="signature"):
+        validator.validate(f"{header}.{forged_claims}.{sig}")
+
+    none_header = _b64url(json.dumps({"alg": "none"}).encode())
+    with pytest.raises(TokenValidationError, match="Algorithm"):
+        validator.validate(f"{none_header}.{claims}.")
+
+
+def test_verified_token_cache_hits_until_expiry():
+    now = [NOW]
+    keyring = Keyring(env_var=None, default="hs-secret")
+    validator = OIDCValidator(issuer=ISSUER, audience=AUDIENCE, hs256_keyring=keyring, leeway_seconds=0, clock=lambda: now[0])
+    token = build_jwt(_claims(exp=NOW + 10))
+
+    validator.validate(token)
+    validator.validate(token)
+    assert (validator.cache_hits, validator.cache_misses) == (1, 1)
+    assert keyring.stats()["current"].verified == 1
+
+    now[0] = NOW + 11
+    with pytest.raises(TokenValidationError, match="expired"):
+        validator.validate(token)
+
+
+def test_jwks_kid_miss_backs_off():
+    clock = [0.0]
+    cache = JWKSCache("https://idp.invalid/jwks", fetcher=lambda _url: _jwks(), miss_backoff_seconds=5, clock=lambda: clock[0])
+
+    assert cache.get("rsa-1", "RS256") is not None
+    assert cache.fetches == 1
+    assert cache.get("unknown", "RS256") is None
+    assert cache.get("unknown", "RS256") is None
+    assert cache.fetches == 2
+
+    clock[0] = 6.0
+    assert cache.get("unknown", "RS256") is None
+    assert cache.fetches == 3
+    clock[0] = 12.0
+    assert cache.get("unknown", "RS256") is None
+    assert cache.fetches == 3
+    assert cache.get("rsa-1", "ES256") is None
+
+
+def test_jwks_failed_refresh_keeps_last_good_keys():
+    responses = [_jwks()]
+
+    def fetcher(_url):
+        if responses:
+            return responses.pop()
+        raise OSError("idp down")
+
+    clock = [0.0]
+    cache = JWKSCache("https://idp.invalid/jwks", ttl_seconds=10, fetcher=fetcher, clock=lambda: clock[0])
+    assert cache.get("ec-1", "ES256") is not None
+    clock[0] = 20.0
+    assert cache.get("ec-1", "ES256") is not None
+
+
+def test_jwks_expiry_refetches_once_for_concurrent_lookups():
+    release = threading.Event()
+    calls = []
+
+    def fetcher(_url):
+        calls.append(_url)
+        release.wait(5)
+        return _jwks()
+
+    cache = JWKSCache("https://idp.invalid/jwks", fetcher=fetcher)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("ec-1", "ES256"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(key is not None for key in results)
+
+
+def test_validator_from_env_fetches_jwks_lazily(monkeypatch):
+    calls = []
+
+    def urlopen(url, timeout):
+        calls.append(url)
+        return io.BytesIO(json.dumps(_jwks()).encode())
+
+    monkeypatch.setattr(oidc.urllib.request, "urlopen", urlopen)
+    monkeypatch.setenv("OIDC_LAZY_ISSUER", ISSUER)
+    monkeypatch.setenv("OIDC_LAZY_AUDIENCE", AUDIENCE)
+    monkeypatch.setenv("OIDC_LAZY_JWKS_URL", "https://idp.invalid/jwks")
+
+    validator = oidc.oidc_validator_from_env("OIDC_LAZY")
+    assert calls == [] and validator.jwks._thread is None
+
+    assert validator.jwks.get("ec-1", "ES256") is not None
+    assert len(calls) == 1 and validator.jwks._thread is not None
+    validator.jwks.stop()
+
+
+def test_require_bearer_accepts_oidc_tokens(validator, monkeypatch):
+    monkeypatch.setattr(security, "oidc_validator", validator)
+
+    def call(token: str) -> str:
+        return security.require_bearer(Request("GET", "/plans/a", {"Authorization": f"Bearer {token}"}))
+
+    assert call(build_jwt(_claims(), alg="ES256", kid="ec-1"))
+    with pytest.raises(HTTPException) as excinfo:
+        call(build_jwt(_claims(aud="nope")))
+    assert excinfo.value.status_code == 403
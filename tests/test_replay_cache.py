@@ -0,0 +1,85 @@
+import pytest
+
+from auth import security
+from auth.security import ReplayCache, ReplayCacheOverflow
+
+
+def _freeze(monkeypatch, now: float) -> None:
+    monkeypatch.setattr(security.time, "time", lambda: now)
+
+
+def test_rejects_duplicate_until_ttl_expires(monkeypatch):
+    cache = ReplayCache(shards=4, max_entries=100)
+    _freeze(monkeypatch, 1_000.0)
+    assert cache.check_and_store("svc:1:sig", 30, shard_key="svc")
+    assert not cache.check_and_store("svc:1:sig", 30, shard_key="svc")
+
+    _freeze(monkeypatch, 1_031.0)
+    assert cache.check_and_store("svc:1:sig", 30, shard_key="svc")
+    assert len(cache) == 1
+
+
+def test_expired_buckets_are_dropped(monkeypatch):
+    cache = ReplayCache(shards=1, max_entries=100)
+    _freeze(monkeypatch, 1_000.0)
+    for i in range(10):
+        assert cache.check_and_store(f"k{i}", 5)
+    assert len(cache) == 10
+
+    _freeze(monkeypatch, 1_010.0)
+    assert cache.check_and_store("fresh", 5)
+    assert len(cache) == 1
+
+
+def test_overflow_reject_raises(monkeypatch):
+    cache = ReplayCache(shards=1, max_entries=2, overflow="reject")
+    _freeze(monkeypatch, 1_000.0)
+    assert cache.check_and_store("a", 60)
+    assert cache.check_and_store("b", 60)
+    with pytest.raises(ReplayCacheOverflow):
+        cache.check_and_store("c", 60)
+    assert not cache.check_and_store("a", 60)
+
+
+def test_overflow_evict_drops_soonest_expiring(monkeypatch):
+    cache = ReplayCache(shards=1, max_entries=2, overflow="evict")
+    _freeze(monkeypatch, 1_000.0)
+    assert cache.check_and_store("short", 10)
+    assert cache.check_and_store("long", 60)
+    assert cache.check_and_store("new", 60)
+
+    assert len(cache) == 2
+    assert not cache.check_and_store("long", 60)
+    assert not cache.check_and_store("new", 60)
+
+
+def test_one_service_can_use_the_whole_capacity(monkeypatch):
+    cache = ReplayCache(shards=4, max_entries=400)
+    _freeze(monkeypatch, 1_000.0)
+    for i in range(200):
+        assert cache.check_and_store(f"svc:{i}:sig", 60, shard_key="svc")
+    assert len(cache) == 200
+
+
+@pytest.mark.parametrize("shards", [1, 16])
+def test_reject_mode_admits_exactly_max_entries(monkeypatch, shards):
+    cache = ReplayCache(shards=shards, max_entries=160, overflow="reject")
+    _freeze(monkeypatch, 1_000.0)
+    for i in range(160):
+        assert cache.check_and_store(f"svc:{i}:sig", 60)
+    with pytest.raises(ReplayCacheOverflow):
+        cache.check_and_store("svc:160:sig", 60)
+
+    # Expired keys in untouched shards must not keep counting against the cap.
+    _freeze(monkeypatch, 1_061.0)
+    for i in range(160, 320):
+        assert cache.check_and_store(f"svc:{i}:sig", 60)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"shards": 0}, {"shards": 4, "max_entries": 2}, {"bucket_seconds": 0}, {"overflow": "drop"}],
+)
+def test_invalid_configuration_rejected(kwargs):
+    with pytest.raises(ValueError):
+        ReplayCache(**kwargs)
@@ -0,0 +1,242 @@
+import asyncio
+import multiprocessing
+import threading
+
+import pytest
+
+from auth.replay_stores import RedisReplayStore, SharedMemoryReplayStore, replay_store_from_env
+from auth.security import ReplayCacheOverflow, ReplayStoreUnavailable
+
+
+class FakeRedisServer:
+    """Minimal RESP server implementing SET with NX/EX on localhost."""
+
+    def __init__(self) -> None:
+        self.data: dict[bytes, bytes] = {}
+        self.commands: list[list[bytes]] = []
+        self.connections = 0
+        self._server: asyncio.base_events.Server | None = None
+
+    async def __aenter__(self) -> "FakeRedisServer":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                self.commands.append(args)
+                writer.write(self._reply(args))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _reply(self, args: list[bytes]) -> bytes:
+        if args[0].upper() == b"SET":
+            key, value, *opts = args[1:]
+            if b"NX" in [o.upper() for o in opts] and key in self.data:
+                return b"$-1\r\n"
+            self.data[key] = value
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
+
+
+def test_redis_store_rejects_replay_and_pools_connections():
+    async def scenario():
+        async with FakeRedisServer() as server:
+            store = RedisReplayStore(f"redis://127.0.0.1:{server.port}/0", pool_size=2)
+            assert await store.check_and_store("svc:1:sig", 300)
+            assert not await store.check_and_store("svc:1:sig", 300)
+
+            results = await asyncio.gather(*(store.check_and_store(f"svc:{i}:sig", 300) for i in range(20)))
+            await store.aclose()
+            return server, results
+
+    server, results = asyncio.run(scenario())
+    assert results == [i != 1 for i in range(20)]
+    assert server.connections <= 2
+    assert server.commands[0] == [b"SET", b"rbac:replay:svc:1:sig", b"1", b"NX", b"EX", b"300"]
+
+
+def test_redis_store_unreachable_fails_closed():
+    async def scenario():
+        async with FakeRedisServer() as server:
+            port = server.port
+        store = RedisReplayStore(f"redis://127.0.0.1:{port}/0", timeout_seconds=0.5)
+        await store.check_and_store("k", 1)
+
+    with pytest.raises(ReplayStoreUnavailable):
+        asyncio.run(scenario())
+
+
+@pytest.fixture
+def threaded_redis():
+    """A FakeRedisServer on its own loop thread, so it outlives the caller's event loops."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(FakeRedisServer().__aenter__(), loop).result(5)
+    yield server
+    asyncio.run_coroutine_threadsafe(server.__aexit__(), loop).result(5)
+
+    async def hang_up():
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+
+    asyncio.run_coroutine_threadsafe(hang_up(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_redis_store_survives_a_new_event_loop(threaded_redis):
+    store = RedisReplayStore(f"redis://127.0.0.1:{threaded_redis.port}/0")
+
+    assert asyncio.run(store.check_and_store("a", 300))
+    # The pooled connection belongs to the first, now closed, loop.
+    assert asyncio.run(store.check_and_store("b", 300))
+    assert not asyncio.run(store.check_and_store("a", 300))
+
+
+def test_redis_error_replies_fail_closed(threaded_redis):
+    store = RedisReplayStore(f"redis://:secret@127.0.0.1:{threaded_redis.port}/0")
+
+    with pytest.raises(ReplayStoreUnavailable, match="unknown command"):
+        asyncio.run(store.check_and_store("k", 1))
+
+
+def test_redis_connection_is_closed_when_cancelled():
+    async def scenario():
+        hung_up = asyncio.Event()
+
+        async def silent(reader, writer):
+            await reader.read()  # never reply; returns at EOF
+            hung_up.set()
+            writer.close()
+
+        server = await asyncio.start_server(silent, "127.0.0.1", 0)
+        store = RedisReplayStore(f"redis://127.0.0.1:{server.sockets[0].getsockname()[1]}/0")
+        task = asyncio.create_task(store.check_and_store("k", 1))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.wait_for(hung_up.wait(), 1)
+        server.close()
+        return store
+
+    assert asyncio.run(scenario())._idle == []
+
+
+def test_shared_memory_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "replay")
+    first = SharedMemoryReplayStore(path, slots=1024, stripes=4)
+    second = SharedMemoryReplayStore(path, slots=64, stripes=1)
+    try:
+        assert first.check_and_store("svc:1:sig", 300)
+        assert not second.check_and_store("svc:1:sig", 300)
+        assert second.check_and_store("svc:2:sig", 300)
+        assert not first.check_and_store("svc:2:sig", 300)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_shared_memory_store_reuses_expired_slots_and_overflows(tmp_path, monkeypatch):
+    from auth import replay_stores
+
+    monkeypatch.setattr(replay_stores.time, "time", lambda: 1_000.0)
+    store = SharedMemoryReplayStore(str(tmp_path / "replay"), slots=4, stripes=1, max_probe=4)
+    try:
+        for i in range(4):
+            assert store.check_and_store(f"k{i}", 10)
+        with pytest.raises(ReplayCacheOverflow):
+            store.check_and_store("k4", 10)
+
+        monkeypatch.setattr(replay_stores.time, "time", lambda: 1_011.0)
+        assert store.check_and_store("k4", 10)
+        assert store.check_and_store("k0", 10)
+    finally:
+        store.close()
+
+
+def _claim(path: str, key: str, queue) -> None:
+    store = SharedMemoryReplayStore(path)
+    queue.put(store.check_and_store(key, 300))
+    store.close()
+
+
+def test_shared_memory_store_across_processes(tmp_path):
+    path = str(tmp_path / "replay")
+    SharedMemoryReplayStore(path, slots=1024, stripes=4).close()
+
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_claim, args=(path, "svc:1:sig", queue)) for _ in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(timeout=10)
+
+    assert sorted(queue.get(timeout=5) for _ in procs) == [False, False, False, True]
+
+
+def test_replay_store_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("RBAC_REPLAY_BACKEND", raising=False)
+    assert replay_store_from_env() is None
+
+    monkeypatch.setenv("RBAC_REPLAY_BACKEND", "redis")
+    monkeypatch.setenv("RBAC_REPLAY_REDIS_URL", "redis://127.0.0.1:6390/2")
+    store = replay_store_from_env()
+    assert isinstance(store, RedisReplayStore)
+    assert (store.port, store.db) == (6390, 2)
+
+    monkeypatch.setenv("RBAC_REPLAY_BACKEND", "bogus")
+    with pytest.raises(ValueError):
+        replay_store_from_env()
+
+
+def test_verifier_uses_injected_async_store(monkeypatch):
+    import hashlib
+    import hmac
+    import time
+
+    from fastapi import HTTPException, Request
+
+    from auth.security import ServiceSignatureVerifier
+
+    class DictStore:
+        def __init__(self) -> None:
+            self.keys: set[str] = set()
+
+        async def check_and_store(self, key, ttl_seconds, *, shard_key=None):
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            return True
+
+    monkeypatch.setenv("RBAC_SECRET", "super-secret")
+    store = DictStore()
+    verifier = ServiceSignatureVerifier(replay_store=store)
+    ts = str(int(time.time()))
+    signing = f"POST\n/verify\n{ts}\n{hashlib.sha256(b'').hexdigest()}"
+    sig = hmac.new(b"super-secret", signing.encode(), hashlib.sha256).hexdigest()
+    headers = {"X-Service-Id": "svc-a", "X-Timestamp": ts, "X-Signature": sig}
+
+    assert asyncio.run(verifier(Request("POST", "/verify", headers))) == "svc-a"
+    assert store.keys == {f"svc-a:{ts}:{sig}"}
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(verifier(Request("POST", "/verify", headers)))
+    assert excinfo.value.status_code == 403
@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import hmac
+import time
+
+import pytest
+
+from auth.security import ServiceSignatureVerifier
+from fastapi import HTTPException, Request
+
+SECRET = "super-secret"
+
+
+class TrackingRequest(Request):
+    chunk_size = 4
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.chunks_read = 0
+
+    async def stream(self):
+        async for chunk in super().stream():
+            self.chunks_read += 1
+            yield chunk
+
+
+def _signed_request(body: bytes, *, path: str = "/onboarding", **extra_headers: str) -> TrackingRequest:
+    ts = str(int(time.time()))
+    signing = f"POST\n{path}\n{ts}\n{hashlib.sha256(body).hexdigest()}"
+    headers = {
+        "X-Service-Id": "svc-stream",
+        "X-Timestamp": ts,
+        "X-Signature": hmac.new(SECRET.encode(), signing.encode(), hashlib.sha256).hexdigest(),
+        **extra_headers,
+    }
+    return TrackingRequest("POST", path, headers, body)
+
+
+def _status(verifier: ServiceSignatureVerifier, request: Request) -> int:
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(verifier(request))
+    return excinfo.value.status_code
+
+
+def test_streaming_hash_caches_body_and_digest(monkeypatch):
+    monkeypatch.setenv("RBAC_SECRET", SECRET)
+    body = b'{"manifest": "' + b"x" * 37 + b'"}'
+    request = _signed_request(body)
+
+    assert asyncio.run(ServiceSignatureVerifier()(request)) == "svc-stream"
+    assert request.chunks_read > 1
+    assert request.state.body_sha256 == hashlib.sha256(body).hexdigest()
+    assert asyncio.run(request.body()) == body
+
+
+def test_declared_oversize_rejected_before_reading(monkeypatch):
+    monkeypatch.setenv("RBAC_SECRET", SECRET)
+    request = _signed_request(b"x" * 32, **{"Content-Length": "32"})
+
+    assert _status(ServiceSignatureVerifier(max_body_bytes=16), request) == 413
+    assert request.chunks_read == 0
+
+
+def test_streamed_oversize_rejected_mid_body(monkeypatch):
+    monkeypatch.setenv("RBAC_SECRET", SECRET)
+    request = _signed_request(b"x" * 64)
+
+    assert _status(ServiceSignatureVerifier(max_body_bytes=16), request) == 413
+    assert request.chunks_read == 5
+
+
+def test_header_and_timestamp_checks_do_not_read_body(monkeypatch):
+    monkeypatch.setenv("RBAC_SECRET", SECRET)
+    verifier = ServiceSignatureVerifier()
+
+    missing = TrackingRequest("POST", "/onboarding", {"X-Service-Id": "svc"}, b"payload")
+    assert _status(verifier, missing) == 401
+    stale = _signed_request(b"payload", **{"X-Timestamp": "1"})
+    assert _status(verifier, stale) == 403
+    assert missing.chunks_read == stale.chunks_read == 0
+
+
+def test_buffered_mode_matches_streaming(monkeypatch):
+    monkeypatch.setenv("RBAC_SECRET", SECRET)
+    request = _signed_request(b"payload")
+
+    assert asyncio.run(ServiceSignatureVerifier(stream_body=False)(request)) == "svc-stream"
+    assert request.chunks_read == 0
@@ -1,9 +1,13 @@
+import io
+import json
 import re
+import threading
+import time
 import warnings
 
 import pytest
 
-from agents.tester import run_tester_flow
+from agents.tester import run_tester_flow, run_tester_suite
 from orchestrator.llm_util import (
     PROMPT_INTENT_DEPRECATION_MESSAGE,
     call_llm,
@@ -63,3 +67,141 @@ def test_call_llm_rejects_invalid_argument_shapes(kwargs, message):
 def test_call_llm_rejects_non_string_llm_response():
     with pytest.raises(ValueError, match=re.escape("LLM client must return a string response.")):
         call_llm(prompt="health check", llm_client=lambda _: 123)
+
+
+def _counting_stream(produced):
+    def client(prompt):
+        for word in ["deployment", " is", " healthy", " and", " serving", " traffic"]:
+            produced.append(word)
+            yield word
+
+    return client
+
+
+def test_tester_flow_stops_streaming_once_expectation_is_met():
+    produced = []
+
+    result = run_tester_flow(
+        {"intent": "check deployment health", "expect": "healthy"}, llm_client=_counting_stream(produced)
+    )
+
+    assert result["passed"] is True
+    assert result["stopped_early"] is True
+    assert result["llm"] == {
+        "ok": True,
+        "prompt": "check deployment health",
+        "content": "deployment is healthy",
+        "cached": False,
+    }
+    assert len(produced) == 3
+
+
+def test_tester_flow_with_custom_decider_fails_fast():
+    produced = []
+
+    result = run_tester_flow(
+        {"intent": "check deployment health"},
+        llm_client=_counting_stream(produced),
+        decide=lambda content: False if content.startswith("deployment") else None,
+    )
+
+    assert result["passed"] is False
+    assert result["stopped_early"] is True
+    assert produced == ["deployment"]
+
+
+def test_tester_flow_fails_when_stream_ends_undecided():
+    result = run_tester_flow({"intent": "check", "expect": "degraded"}, llm_client=_counting_stream([]))
+
+    assert result["passed"] is False
+    assert result["stopped_early"] is False
+    assert result["llm"]["content"] == "deployment is healthy and serving traffic"
+
+
+def test_tester_flow_rejects_invalid_expect():
+    with pytest.raises(ValueError, match=re.escape("payload.expect must be a non-empty string")):
+        run_tester_flow({"intent": "check", "expect": ""})
+
+
+def test_tester_suite_runs_concurrently_and_streams_ndjson():
+    active = peak = 0
+    lock = threading.Lock()
+
+    def client(prompt):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return f"done:{prompt}"
+
+    output = io.StringIO()
+    payloads = [{"intent": f"intent {i}"} for i in range(20)]
+
+    summary = run_tester_suite(payloads, concurrency=4, llm_client=client, output=output)
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(record["index"] for record in records) == list(range(20))
+    assert all(record["llm"]["content"] == f"done:{record['intent']}" for record in records)
+    assert peak == 4
+    assert summary["total"] == summary["ok"] == 20 and summary["errors"] == 0
+    latency = summary["latency_seconds"]
+    assert 0.02 <= latency["p50"] <= latency["p90"] <= latency["p99"] <= latency["max"]
+
+
+def test_tester_suite_validates_every_payload_before_running():
+    calls = []
+
+    with pytest.raises(ValueError) as info:
+        run_tester_suite([{"intent": "ok"}, {}, {"intent": " "}], llm_client=calls.append)
+
+    message = str(info.value)
+    assert "2 invalid payload(s)" in message
+    assert "payloads[1]: payload missing required field(s): intent" in message
+    assert "payloads[2]: payload.intent must be a non-empty string" in message
+    assert calls == []
+
+
+def test_tester_suite_records_errors_and_verdicts():
+    def client(prompt):
+        if prompt == "explode":
+            raise RuntimeError("model unavailable")
+        yield "all systems healthy"
+
+    summary = run_tester_suite(
+        [
+            {"intent": "explode", "expect": "x"},
+            {"intent": "check", "expect": "healthy"},
+            {"intent": "check", "expect": "down"},
+        ],
+        llm_client=client,
+    )
+
+    assert summary["errors"] == 1
+    assert summary["passed"] == 1 and summary["failed"] == 1
+
+
+def test_tester_suite_resumes_from_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / "suite.ndjson")
+    payloads = [{"intent": "a"}, {"intent": "b"}, {"intent": "a"}]
+    calls = []
+
+    def flaky(prompt):
+        calls.append(prompt)
+        if prompt == "b":
+            raise RuntimeError("transient")
+        return prompt.upper()
+
+    first = run_tester_suite(payloads, llm_client=flaky, checkpoint_path=checkpoint, concurrency=1)
+    assert first["ok"] == 2 and first["errors"] == 1
+    with open(checkpoint, "a") as handle:
+        handle.write('{"key": "torn')  # simulate a crash mid-write
+
+    calls.clear()
+    second = run_tester_suite(payloads, llm_client=str.upper, checkpoint_path=checkpoint)
+
+    assert second["resumed"] == 2
+    assert second["ok"] == 3 and second["errors"] == 0
+    assert calls == []
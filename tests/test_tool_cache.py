@@ -0,0 +1,165 @@
+import asyncio
+import threading
+from typing import Any
+
+import pytest
+
+from app import mcp_tooling, tool_cache
+from app.mcp_tooling import call_tool_by_name, register_tools
+from app.tool_cache import PURE, CachePolicy, ToolResultCache, cache_key
+
+
+class _NullMCP:
+    def tool(self, name: str):
+        return lambda fn: fn
+
+
+def _cached_tool(monkeypatch, name: str, handler: Any, policy: CachePolicy = PURE) -> None:
+    register_tools(_NullMCP())
+    monkeypatch.setattr(mcp_tooling, "_REGISTRY", mcp_tooling.tool_registry())
+    mcp_tooling.add_tool(mcp_tooling.ToolSpec(name=name, handler=handler, cache=policy), replace=True)
+
+
+def test_cache_key_is_canonical():
+    assert cache_key("t", {"b": 1, "a": [1, 2]}) == cache_key("t", {"a": [1, 2], "b": 1})
+    assert cache_key("t", {"a": object()}) is None
+    with pytest.raises(ValueError):
+        CachePolicy("ttl")
+
+
+def test_lru_bound_ttl_expiry_and_invalidation(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(tool_cache.time, "monotonic", lambda: now[0])
+    cache = ToolResultCache(max_entries=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    short = CachePolicy.ttl(5)
+    for name in ("a", "b", "a", "c"):
+        cache.get_or_compute(("t", name), short, lambda name=name: compute(name))
+    assert calls == ["a", "b", "c"] and len(cache) == 2
+    cache.get_or_compute(("t", "b"), short, lambda: compute("b"))  # evicted as least recently used
+    assert calls[-1] == "b"
+
+    now[0] = 6
+    cache.get_or_compute(("t", "c"), short, lambda: compute("c"))
+    assert calls[-1] == "c"
+
+    assert cache.invalidate("t", arguments=None) == 2
+    assert len(cache) == 0
+
+
+def test_call_tool_by_name_caches_after_authorization(monkeypatch):
+    calls = []
+
+    def lookup(*, key: str) -> dict[str, str]:
+        calls.append(key)
+        return {"value": key.upper()}
+
+    _cached_tool(monkeypatch, "lookup.cached", lookup)
+    first = call_tool_by_name("lookup.cached", {"key": "x"}, "Bearer t", "r1")
+    second = call_tool_by_name("lookup.cached", {"key": "x"}, "Bearer t", "r2")
+    denied = call_tool_by_name("lookup.cached", {"key": "x"}, None, "r3")
+
+    assert first["result"] == second["result"] == {"value": "X"}
+    assert second["request_id"] == "r2"
+    assert denied["error"]["code"] == "unauthorized"
+    assert calls == ["x"]
+    assert mcp_tooling.tool_cache_stats()["lookup.cached"]["hit_rate"] == pytest.approx(0.5)
+
+    assert mcp_tooling.invalidate_tool_cache("lookup.cached", {"key": "x"}) == 1
+    call_tool_by_name("lookup.cached", {"key": "x"}, "Bearer t")
+    assert calls == ["x", "x"]
+
+
+def test_concurrent_identical_calls_are_coalesced(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow(*, key: str) -> str:
+        calls.append(key)
+        started.set()
+        release.wait(2)
+        return key
+
+    _cached_tool(monkeypatch, "slow.cached", slow)
+
+    async def scenario():
+        tasks = [
+            asyncio.ensure_future(mcp_tooling.acall_tool_by_name("slow.cached", {"key": "k"}, "Bearer t", str(i)))
+            for i in range(5)
+        ]
+        await asyncio.to_thread(started.wait, 2)
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    responses = asyncio.run(scenario())
+    assert [r["result"] for r in responses] == ["k"] * 5
+    assert [r["request_id"] for r in responses] == ["0", "1", "2", "3", "4"]
+    assert calls == ["k"]
+
+
+def test_failures_are_not_cached(monkeypatch):
+    attempts = []
+
+    def flaky(**_: Any) -> str:
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise mcp_tooling.ToolExecutionError("first try fails")
+        return "ok"
+
+    _cached_tool(monkeypatch, "flaky.cached", flaky)
+    assert call_tool_by_name("flaky.cached", {}, "Bearer t")["ok"] is False
+    assert call_tool_by_name("flaky.cached", {}, "Bearer t")["result"] == "ok"
+    assert call_tool_by_name("flaky.cached", {}, "Bearer t")["result"] == "ok"
+    assert len(attempts) == 2
+
+
+def test_cached_results_are_copies():
+    cache = ToolResultCache()
+    leader = cache.get_or_compute(("t", "k"), PURE, lambda: {"items": [1]})
+    leader["items"].append("leader")
+    hit = cache.get_or_compute(("t", "k"), PURE, lambda: None)
+    hit["items"].append("caller")
+
+    assert cache.get_or_compute(("t", "k"), PURE, lambda: None) == {"items": [1]}
+
+
+def test_sync_call_inside_async_leader_computes_directly():
+    cache = ToolResultCache()
+    key = ("t", "k")
+
+    async def leader():
+        # A sync tool invoked on the loop thread while this coroutine leads the same key.
+        return cache.get_or_compute(key, PURE, lambda: "inner")
+
+    results = []
+    runner = threading.Thread(target=lambda: results.append(asyncio.run(cache.aget_or_compute(key, PURE, leader))),
+                              daemon=True)
+    runner.start()
+    runner.join(2)
+
+    assert results == ["inner"]
+    assert cache.get_or_compute(key, PURE, lambda: "unused") == "inner"
+
+
+def test_uncopyable_results_are_returned_but_not_cached(monkeypatch):
+    lock = threading.Lock()
+    calls = []
+
+    def make_lock(**_: Any) -> Any:
+        calls.append(1)
+        return lock
+
+    _cached_tool(monkeypatch, "lock.cached", make_lock)
+    cache = ToolResultCache()
+
+    assert cache.get_or_compute(("t", "k"), PURE, lambda: lock) is lock
+    assert cache._inflight == {} and len(cache) == 0
+    assert call_tool_by_name("lock.cached", {}, "Bearer t")["result"] is lock
+    assert call_tool_by_name("lock.cached", {}, "Bearer t")["result"] is lock
+    assert len(calls) == 2
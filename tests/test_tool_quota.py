@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from typing import Any
+
+import pytest
+
+from app import mcp_tooling
+from app.mcp_tooling import ToolSpec, call_tool_by_name, register_tools
+from app.tool_quota import QuotaExceeded, QuotaPolicy, ToolQuotas, principal_from_authorization
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_and_reports_retry_after():
+    clock = _Clock()
+    quotas = ToolQuotas(QuotaPolicy(rate_per_second=2, burst=2), clock=clock)
+
+    quotas.acquire("p", "echo")
+    quotas.acquire("p", "echo")
+    with pytest.raises(QuotaExceeded) as excinfo:
+        quotas.acquire("p", "echo")
+    assert (excinfo.value.scope, excinfo.value.reason) == ("principal", "rate")
+    assert excinfo.value.retry_after_seconds == pytest.approx(0.5)
+
+    quotas.acquire("q", "echo")  # other principals have their own bucket
+    clock.now = 0.5
+    quotas.acquire("p", "echo")
+
+
+def test_in_flight_quota_and_checking_both_limits_before_charging():
+    quotas = ToolQuotas(QuotaPolicy(max_in_flight=2), clock=_Clock())
+    per_tool = QuotaPolicy(max_in_flight=1)
+
+    quotas.acquire("p", "slow", per_tool)
+    with pytest.raises(QuotaExceeded) as excinfo:
+        quotas.acquire("p", "slow", per_tool)
+    assert excinfo.value.scope == "tool"
+    quotas.acquire("p", "fast")  # the rejected call did not take a principal slot
+    with pytest.raises(QuotaExceeded):
+        quotas.acquire("p", "fast")
+
+    quotas.release("p", "slow", per_tool)
+    quotas.acquire("p", "slow", per_tool)
+
+
+def test_idle_buckets_are_evicted_lazily():
+    clock = _Clock()
+    quotas = ToolQuotas(QuotaPolicy(rate_per_second=1, max_in_flight=5), idle_seconds=10, clock=clock)
+    for principal in ("a", "b", "c"):
+        quotas.acquire(principal, "t")
+    quotas.release("a", "t")
+    quotas.release("b", "t")
+    assert len(quotas) == 3
+
+    clock.now = 11
+    quotas.acquire("d", "t")
+    assert len(quotas) == 2  # "c" still has a call in flight
+
+
+def test_principal_id_does_not_expose_the_token():
+    principal = principal_from_authorization("Bearer secret-token")
+    assert principal == principal_from_authorization("Bearer secret-token")
+    assert "secret" not in principal and len(principal) == 16
+
+
+def test_gateway_returns_rate_limited_envelope(monkeypatch):
+    register_tools(object())
+    monkeypatch.setattr(mcp_tooling, "_QUOTAS", ToolQuotas(QuotaPolicy(rate_per_second=1, burst=1)))
+
+    assert call_tool_by_name("echo", {"message": "a"}, "Bearer one", "r1")["ok"] is True
+    limited = call_tool_by_name("echo", {"message": "a"}, "Bearer one", "r2")
+    assert call_tool_by_name("echo", {"message": "a"}, "Bearer two", "r3")["ok"] is True
+
+    assert limited["request_id"] == "r2"
+    assert limited["error"]["code"] == "rate_limited"
+    assert limited["error"]["details"]["scope"] == "principal"
+    assert 0 < limited["error"]["details"]["retry_after_seconds"] <= 1
+
+
+def test_per_tool_concurrency_quota_applies_across_entry_points(monkeypatch):
+    register_tools(object())
+    monkeypatch.setattr(mcp_tooling, "_REGISTRY", mcp_tooling.tool_registry())
+    started, release = threading.Event(), threading.Event()
+
+    def exclusive(**_: Any) -> str:
+        started.set()
+        release.wait(2)
+        return "done"
+
+    mcp_tooling.add_tool(ToolSpec(name="exclusive", handler=exclusive, rate_limit=QuotaPolicy(max_in_flight=1)))
+
+    async def scenario() -> tuple[dict, list[dict]]:
+        first = asyncio.ensure_future(mcp_tooling.acall_tool_by_name("exclusive", {}, "Bearer t"))
+        await asyncio.to_thread(started.wait, 2)
+        batch = await mcp_tooling.call_tools_batch([{"tool_name": "exclusive"}], "Bearer t")
+        release.set()
+        return await first, batch
+
+    first, batch = asyncio.run(scenario())
+    assert first["result"] == "done"
+    assert batch[0]["error"]["code"] == "rate_limited"
+    assert call_tool_by_name("exclusive", {}, "Bearer t")["result"] == "done"  # slot was released
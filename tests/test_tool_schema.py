@@ -0,0 +1,94 @@
+import pytest
+
+from app import mcp_tooling
+from app.mcp_tooling import call_tool_by_name, list_tools, register_tools
+from app.tool_schema import SchemaValidationError, compile_schema, validate
+from mcp_server import create_server
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string", "minLength": 1, "maxLength": 20, "pattern": "^[a-z ]+$"},
+        "limit": {"type": "integer", "minimum": 1, "maximum": 50},
+        "mode": {"enum": ["fast", "exact"]},
+        "filters": {
+            "type": "array",
+            "maxItems": 3,
+            "items": {
+                "type": "object",
+                "properties": {"field": {"type": "string"}, "value": {"type": ["string", "number", "null"]}},
+                "required": ["field"],
+                "additionalProperties": False,
+            },
+        },
+        "score": {"anyOf": [{"type": "number", "exclusiveMinimum": 0}, {"const": "auto"}]},
+    },
+    "required": ["query"],
+}
+
+CASES = [
+    ({"query": "find things"}, None),
+    ({"query": "find", "limit": 5, "mode": "fast", "filters": [{"field": "a", "value": None}], "score": "auto"}, None),
+    ({}, "missing required property 'query'"),
+    ({"query": ""}, "$.query: shorter than 1 characters"),
+    ({"query": "UPPER"}, "$.query: does not match pattern '^[a-z ]+$'"),
+    ({"query": "a", "limit": True}, "$.limit: expected integer"),
+    ({"query": "a", "limit": 51}, "$.limit: greater than maximum 50"),
+    ({"query": "a", "mode": "slow"}, "$.mode: must be one of ['fast', 'exact']"),
+    ({"query": "a", "filters": [{"field": "a"}, {"field": "b", "extra": 1}]}, "$.filters[1].extra: no value is allowed here"),
+    ({"query": "a", "filters": [{"field": "a", "value": [1]}]}, "$.filters[0].value: expected string or number or null"),
+    ({"query": "a", "score": 0}, "$.score: matches none of the 'anyOf' schemas"),
+    ([], "expected object"),
+]
+
+
+@pytest.mark.parametrize("instance, error", CASES)
+def test_compiled_and_interpreted_validation_agree(instance, error):
+    compiled = compile_schema(SCHEMA)
+    for check in (compiled, lambda value: validate(SCHEMA, value)):
+        if error is None:
+            check(instance)
+        else:
+            with pytest.raises(SchemaValidationError) as excinfo:
+                check(instance)
+            assert str(excinfo.value) == error
+
+
+def test_compile_rejects_unsupported_keywords():
+    with pytest.raises(ValueError):
+        compile_schema({"type": "object", "patternProperties": {}})
+    with pytest.raises(ValueError):
+        compile_schema({"type": "tuple"})
+
+
+def test_registered_schemas_validate_calls_and_are_listed(monkeypatch):
+    server = create_server(type("NullMCP", (), {"tool": lambda self, name: (lambda fn: fn)})())
+
+    listing = {entry["name"]: entry for entry in server.list_tools()}
+    assert listing["echo"]["inputSchema"]["required"] == ["message"]
+    assert listing["health.check"]["inputSchema"] == {"type": "object"}
+
+    response = call_tool_by_name("echo", {"message": 3}, "Bearer t", "s-1")
+    assert response["error"] == {
+        "code": "invalid_arguments",
+        "message": "$.message: expected string",
+        "details": {"path": "$.message"},
+    }
+
+
+def test_custom_validator_runs_after_schema(monkeypatch):
+    calls = []
+    spec = mcp_tooling.ToolSpec(
+        name="guarded",
+        handler=lambda **_: "ok",
+        validator=lambda arguments: calls.append(arguments),
+        schema={"type": "object", "required": ["x"]},
+    )
+    register_tools(object())
+    monkeypatch.setattr(mcp_tooling, "_REGISTRY", mcp_tooling.tool_registry())
+    mcp_tooling.add_tool(spec)
+
+    assert call_tool_by_name("guarded", {}, "Bearer t")["error"]["code"] == "invalid_arguments"
+    assert call_tool_by_name("guarded", {"x": 1}, "Bearer t")["result"] == "ok"
+    assert calls == [{"x": 1}]
+    assert [entry["name"] for entry in list_tools()] == ["echo", "health.check", "guarded"]
@@ -0,0 +1,292 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from orchestrator import webhook, webhook_queue
+from orchestrator.api import app
+from orchestrator.event_router import EventRouter
+from orchestrator.webhook_queue import MemoryWebhookQueue, QueueFull, SQLiteWebhookQueue, queue_from_env
+from orchestrator.worker import WebhookWorker
+
+
+@pytest.fixture(autouse=True)
+def no_inline_worker(monkeypatch):
+    """These tests inspect queue contents, so keep the API's in-process worker from draining it."""
+    monkeypatch.setattr(webhook, "inline_worker_enabled", False)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def queue(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryWebhookQueue(max_depth=3, lease_seconds=30)
+    else:
+        q = SQLiteWebhookQueue(str(tmp_path / "queue.db"), max_depth=3, lease_seconds=30)
+        yield q
+        q.close()
+
+
+def test_queue_lease_ack_nack_and_bound(queue, monkeypatch):
+    ids = [queue.put({"type": "push", "n": i}) for i in range(3)]
+    with pytest.raises(QueueFull) as excinfo:
+        queue.put({"type": "push"})
+    assert excinfo.value.retry_after_seconds >= 1
+
+    batch = queue.get_batch(2)
+    assert [e.event_id for e in batch] == ids[:2]
+    assert [e.payload["n"] for e in batch] == [0, 1]
+    assert queue.get_batch(5)[0].event_id == ids[2]
+    assert queue.get_batch(5) == []
+
+    queue.ack([ids[0]])
+    queue.nack([ids[1]])
+    redelivered = queue.get_batch(5)
+    assert [(e.event_id, e.attempts) for e in redelivered] == [(ids[1], 2)]
+    assert queue.depth() == 2
+
+    now = webhook_queue.time.time()
+    monkeypatch.setattr(webhook_queue.time, "time", lambda: now + 31)
+    assert {e.event_id for e in queue.get_batch(5)} == {ids[1], ids[2]}
+
+
+def test_sqlite_queue_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "queue.db")
+    producer, consumer = SQLiteWebhookQueue(path), SQLiteWebhookQueue(path)
+    event_id = producer.put({"type": "push"})
+
+    assert [e.event_id for e in consumer.get_batch(10)] == [event_id]
+    assert producer.get_batch(10) == []
+    producer.close()
+    consumer.close()
+
+
+def test_receive_webhook_acks_after_enqueue_and_applies_backpressure(monkeypatch):
+    queue = MemoryWebhookQueue(max_depth=1, retry_after_seconds=7)
+    monkeypatch.setattr(webhook, "webhook_queue", queue)
+    client = TestClient(app)
+
+    accepted = client.post("/webhook/", json={"type": "push"})
+    assert accepted.status_code == 200
+    assert accepted.json()["status"] == "accepted"
+    assert queue.depth() == 1
+
+    rejected = client.post("/webhook/", json={"type": "push"})
+    assert rejected.status_code == 429
+    assert rejected.headers["retry-after"] == "7"
+
+
+def test_receive_webhook_rejects_non_string_type_before_enqueue(monkeypatch):
+    queue = MemoryWebhookQueue()
+    monkeypatch.setattr(webhook, "webhook_queue", queue)
+    client = TestClient(app)
+
+    for event_type in (5, {"a": 1}, ["push"]):
+        response = client.post("/webhook/", json={"type": event_type})
+        assert response.status_code == 422
+        assert response.json()["detail"] == "event type must be a string"
+    assert client.post("/webhook/", json=["not", "an", "object"]).status_code == 422
+    assert queue.depth() == 0
+
+
+def test_worker_processes_retries_and_dead_letters_after_max_attempts(tmp_path):
+    queue = SQLiteWebhookQueue(str(tmp_path / "queue.db"))
+    seen = []
+
+    async def handler(payload):
+        seen.append(payload["n"])
+        if payload["n"] == 2:
+            raise RuntimeError("boom")
+
+    for i in range(5):
+        queue.put({"type": "push", "n": i})
+    worker = WebhookWorker(queue, handler, concurrency=2, batch_size=10, max_attempts=2)
+
+    async def scenario():
+        assert await worker.run_once() == 5
+        assert await worker.run_once() == 1
+        assert await worker.run_once() == 0
+
+    asyncio.run(scenario())
+    assert sorted(seen) == [0, 1, 2, 2, 3, 4]
+    assert worker.processed == 4
+    assert queue.depth() == 0
+    assert [(e.payload["n"], e.attempts) for e in queue.dead_letters()] == [(2, 2)]
+    queue.close()
+
+
+def test_sqlite_depth_counter_tracks_every_connection(tmp_path):
+    path = str(tmp_path / "queue.db")
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE webhook_events (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL,"
+        " enqueued_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, leased_until REAL NOT NULL DEFAULT 0)"
+    )
+    legacy.execute("INSERT INTO webhook_events (payload, enqueued_at) VALUES ('{}', 0)")
+    legacy.commit()
+    legacy.close()
+
+    producer, consumer = SQLiteWebhookQueue(path, max_depth=3), SQLiteWebhookQueue(path, max_depth=3)
+    assert producer.depth() == 1
+    producer.put_many([{"n": 1}, {"n": 2}, {"n": 3}])
+    assert consumer.depth() == 3
+    with pytest.raises(QueueFull):
+        consumer.put({"n": 4})
+
+    batch = consumer.get_batch(3)
+    consumer.ack([batch[0].event_id])
+    consumer.dead_letter([batch[1].event_id])
+    assert producer.depth() == 1
+    assert [e.event_id for e in producer.dead_letters()] == [batch[1].event_id]
+    producer.close()
+    consumer.close()
+
+
+def test_dead_letters_leave_the_queue(queue):
+    ids = [queue.put({"n": i}) for i in range(2)]
+    queue.get_batch(2)
+    queue.dead_letter([ids[0]])
+
+    assert queue.depth() == 1
+    assert [(e.event_id, e.payload, e.attempts) for e in queue.dead_letters()] == [(ids[0], {"n": 0}, 1)]
+    assert [e.event_id for e in queue.get_batch(5)] == []
+
+
+def test_worker_run_drains_then_stops_on_shutdown():
+    queue = MemoryWebhookQueue()
+    for i in range(10):
+        queue.put({"n": i})
+
+    async def scenario():
+        worker = WebhookWorker(queue, lambda _payload: asyncio.sleep(0), batch_size=4, poll_interval_seconds=0.01)
+
+        async def stop_when_empty():
+            while queue.depth():
+                await asyncio.sleep(0.01)
+            worker.request_shutdown()
+
+        await asyncio.gather(worker.run(), stop_when_empty())
+        return worker.processed
+
+    assert asyncio.run(scenario()) == 10
+
+
+class FlakyQueue(MemoryWebhookQueue):
+    """Raises a storage error on the first get_batch and the first ack."""
+
+    def __init__(self):
+        super().__init__(lease_seconds=0.05)
+        self.failures = {"get_batch": 1, "ack": 1}
+
+    def _maybe_fail(self, operation):
+        if self.failures[operation]:
+            self.failures[operation] -= 1
+            raise sqlite3.OperationalError("database is locked")
+
+    def get_batch(self, max_items):
+        self._maybe_fail("get_batch")
+        return super().get_batch(max_items)
+
+    def ack(self, event_ids):
+        self._maybe_fail("ack")
+        super().ack(event_ids)
+
+
+def test_worker_survives_queue_errors():
+    queue = FlakyQueue()
+    for i in range(5):
+        queue.put({"n": i})
+    seen = []
+
+    async def handler(payload):
+        seen.append(payload["n"])
+
+    async def scenario():
+        worker = WebhookWorker(queue, handler, batch_size=10, poll_interval_seconds=0.01)
+
+        async def stop_when_empty():
+            deadline = time.monotonic() + 5
+            while queue.depth() and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            worker.request_shutdown()
+
+        await asyncio.gather(worker.run(), stop_when_empty())
+
+    asyncio.run(scenario())
+    assert queue.depth() == 0 and queue.failures == {"get_batch": 0, "ack": 0}
+    # The batch whose ack failed is redelivered after its lease, so it is handled twice.
+    assert sorted(seen) == sorted(list(range(5)) * 2)
+
+
+def test_queue_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("ORCHESTRATOR_QUEUE_URL", raising=False)
+    assert isinstance(queue_from_env(), MemoryWebhookQueue)
+    monkeypatch.setenv("ORCHESTRATOR_QUEUE_URL", f"sqlite:///{tmp_path}/q.db")
+    queue = queue_from_env()
+    assert isinstance(queue, SQLiteWebhookQueue) and queue.path == f"{tmp_path}/q.db"
+    queue.close()
+    monkeypatch.setenv("ORCHESTRATOR_QUEUE_URL", "kafka://nope")
+    with pytest.raises(ValueError):
+        queue_from_env()
+
+
+def test_batch_endpoint_reports_per_event_status(monkeypatch):
+    queue = MemoryWebhookQueue(max_depth=3)
+    monkeypatch.setattr(webhook, "webhook_queue", queue)
+    client = TestClient(app)
+
+    response = client.post("/webhook/batch", json=[{"type": "a"}, "nope", {"type": 5}, {"type": "b"}, {}, {"type": "c"}])
+    body = response.json()
+
+    assert response.status_code == 200
+    assert (body["accepted"], body["rejected"], body["invalid"]) == (3, 1, 2)
+    assert [r["status"] for r in body["results"]] == ["accepted", "invalid", "invalid", "accepted", "accepted", "rejected"]
+    assert [e.payload for e in queue.get_batch(10)] == [{"type": "a"}, {"type": "b"}, {}]
+
+
+def test_batch_endpoint_accepts_ndjson_and_rejects_when_full(monkeypatch):
+    queue = MemoryWebhookQueue(max_depth=2, retry_after_seconds=3)
+    monkeypatch.setattr(webhook, "webhook_queue", queue)
+    client = TestClient(app)
+    headers = {"Content-Type": "application/x-ndjson"}
+
+    response = client.post("/webhook/batch", headers=headers, content=b'{"type": "a"}\n\n{broken\n{"type": "b"}\n')
+    assert [r["status"] for r in response.json()["results"]] == ["accepted", "invalid", "accepted"]
+
+    full = client.post("/webhook/batch", headers=headers, content=b'{"type": "c"}\n')
+    assert full.status_code == 429
+    assert full.headers["retry-after"] == "3"
+
+    assert client.post("/webhook/batch", json={"type": "a"}).status_code == 422
+    monkeypatch.setattr(webhook, "MAX_BATCH_EVENTS", 1)
+    assert client.post("/webhook/batch", json=[{}, {}]).status_code == 413
+
+
+def test_put_many_accepts_prefix_that_fits(queue):
+    queue.put({"n": 0})
+    ids = queue.put_many([{"n": 1}, {"n": 2}, {"n": 3}])
+
+    assert len(ids) == 2
+    assert [e.payload["n"] for e in queue.get_batch(10)] == [0, 1, 2]
+
+
+def test_api_drains_memory_queue_in_process(monkeypatch):
+    queue = MemoryWebhookQueue()
+    router = EventRouter()
+    seen = []
+    router.register("inline.test", lambda payload: seen.append(payload["n"]))
+    monkeypatch.setattr(webhook, "webhook_queue", queue)
+    monkeypatch.setattr(webhook, "event_router", router)
+    monkeypatch.setattr(webhook, "inline_worker_enabled", True)
+    client = TestClient(app)
+
+    assert client.post("/webhook/", json={"type": "inline.test", "n": 1}).status_code == 200
+    assert client.post("/webhook/batch", json=[{"type": "inline.test", "n": 2}]).status_code == 200
+
+    deadline = time.monotonic() + 5
+    while len(seen) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(seen) == [1, 2]
+    assert queue.depth() == 0